@@ -0,0 +1,286 @@
+"""
+Side-effect-free library API for theming marimo notebooks.
+
+The source functions work on notebook text and never touch the
+filesystem. The batch functions read (and optionally write) notebook
+files and yield a ``FileResult`` per file instead of printing, so they
+can be embedded in build systems without capturing stdout.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from .html_head import is_head_path
+from .io_limits import account_io
+from .notebook_formats import PYTHON_FORMAT, NotebookFormat, format_for_path
+from .util import theme_name_for
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+
+@dataclass(frozen=True)
+class FileResult:
+    """
+    Outcome of processing a single notebook file.
+
+    ``status`` is one of ``applied``, ``failed`` (no marimo.App found),
+    ``cleared``, ``themed``, ``no_theme``, ``no_app``, ``exported``,
+    ``cached`` or ``error``. ``output`` is the file an export wrote.
+    """
+
+    path: str
+    status: str
+    theme: str | None = None
+    css_file: str | None = None
+    error: str | None = None
+    output: str | None = None
+
+
+def read_css_file(
+    text: str, *, notebook_format: NotebookFormat = PYTHON_FORMAT
+) -> str | None:
+    """Get the raw css_file value of a notebook's App configuration."""
+    span = notebook_format.locate_config(text)
+    return (
+        notebook_format.get_option(span.content, "css_file") if span else None
+    )
+
+
+def read_theme(
+    text: str, *, notebook_format: NotebookFormat = PYTHON_FORMAT
+) -> str | None:
+    """Get the name of the theme applied to a notebook, if any."""
+    css_file = read_css_file(text, notebook_format=notebook_format)
+    return theme_name_for(css_file) if css_file is not None else None
+
+
+def apply_to_source(
+    text: str,
+    css_path: str | Path,
+    head_path: str | Path | None = None,
+    *,
+    notebook_format: NotebookFormat = PYTHON_FORMAT,
+) -> str:
+    """
+    Set the css_file of a notebook's App configuration.
+
+    Args:
+        text: Notebook source
+        css_path: Value to set css_file to
+        head_path: Optional value to set html_head_file to in the same
+            rewrite
+        notebook_format: Format of the notebook, Python by default
+
+    Returns:
+        The updated notebook source
+
+    Raises:
+        ValueError: If the notebook has no App configuration.
+
+    """
+    span = notebook_format.locate_config(text)
+    if span is None:
+        msg = "No marimo.App found"
+        raise ValueError(msg)
+    new_app_content = notebook_format.set_option(
+        span.content, "css_file", str(Path(css_path))
+    )
+    if head_path is not None:
+        new_app_content = notebook_format.set_option(
+            new_app_content, "html_head_file", str(head_path)
+        )
+    return (
+        text[: span.start_offset] + new_app_content + text[span.end_offset :]
+    )
+
+
+def clear_source(
+    text: str, *, notebook_format: NotebookFormat = PYTHON_FORMAT
+) -> str:
+    """
+    Remove the css_file from a notebook's App configuration.
+
+    An html_head_file generated by motheme is removed along with it.
+    Returns the source unchanged if it has no App call or no css_file.
+    """
+    span = notebook_format.locate_config(text)
+    if (
+        span is None
+        or notebook_format.get_option(span.content, "css_file") is None
+    ):
+        return text
+    new_app_content = notebook_format.remove_option(span.content, "css_file")
+    head_path = notebook_format.get_option(new_app_content, "html_head_file")
+    if head_path is not None and is_head_path(head_path):
+        new_app_content = notebook_format.remove_option(
+            new_app_content, "html_head_file"
+        )
+    return (
+        text[: span.start_offset] + new_app_content + text[span.end_offset :]
+    )
+
+
+def read_notebook(path: str | Path) -> str:
+    """Read a notebook as text, keeping its line endings."""
+    with Path(path).open("r", encoding="utf-8", newline="") as f:
+        text = f.read()
+    account_io(len(text.encode("utf-8")))
+    return text
+
+
+def write_notebook(path: str | Path, text: str) -> None:
+    """Write a notebook with a single write call, keeping line endings."""
+    account_io(len(text.encode("utf-8")))
+    with Path(path).open("w", encoding="utf-8", newline="") as f:
+        f.write(text)
+
+
+def _css_path_for(
+    path: str, css_path: str | Path, *, relative_to_notebook: bool
+) -> Path:
+    """Get the css_file (or html_head_file) value for a notebook."""
+    if not relative_to_notebook:
+        return Path(css_path)
+    notebook_dir = Path(path).resolve().parent
+    return Path(os.path.relpath(Path(css_path).absolute(), notebook_dir))
+
+
+def apply_files(
+    paths: Iterable[str],
+    css_path: str | Path,
+    *,
+    relative_to_notebook: bool = False,
+    write: bool = True,
+    head_path: str | Path | None = None,
+) -> Iterator[FileResult]:
+    """
+    Apply a theme file to notebooks, yielding a result per file.
+
+    Args:
+        paths: Notebook file paths
+        css_path: Theme CSS file to reference
+        relative_to_notebook: Reference css_path (and head_path)
+            relative to each notebook's directory instead of as given
+        write: If False, only report what would change
+        head_path: Optional html_head_file to reference as well
+
+    """
+    theme = theme_name_for(css_path)
+    for path in paths:
+        try:
+            text = read_notebook(path)
+            target = _css_path_for(
+                path, css_path, relative_to_notebook=relative_to_notebook
+            )
+            head_target = (
+                None
+                if head_path is None
+                else _css_path_for(
+                    path, head_path, relative_to_notebook=relative_to_notebook
+                )
+            )
+            try:
+                new_text = apply_to_source(
+                    text,
+                    target,
+                    head_target,
+                    notebook_format=format_for_path(path),
+                )
+            except ValueError:
+                yield FileResult(path, "failed")
+                continue
+            if write and new_text != text:
+                write_notebook(path, new_text)
+            yield FileResult(path, "applied", theme, str(target))
+        except OSError as e:
+            yield FileResult(path, "error", error=str(e))
+
+
+def clear_files(
+    paths: Iterable[str], *, write: bool = True
+) -> Iterator[FileResult]:
+    """
+    Remove themes from notebooks, yielding a result per file.
+
+    Args:
+        paths: Notebook file paths
+        write: If False, only report what would change
+
+    """
+    for path in paths:
+        try:
+            text = read_notebook(path)
+            notebook_format = format_for_path(path)
+            new_text = clear_source(text, notebook_format=notebook_format)
+            if new_text == text:
+                yield FileResult(path, "no_theme")
+                continue
+            if write:
+                write_notebook(path, new_text)
+            css_file = read_css_file(text, notebook_format=notebook_format)
+            yield FileResult(path, "cleared", css_file=css_file)
+        except OSError as e:
+            yield FileResult(path, "error", error=str(e))
+
+
+def read_files(paths: Iterable[str]) -> Iterator[FileResult]:
+    """Read the theme of each notebook, yielding a result per file."""
+    for path in paths:
+        notebook_format = format_for_path(path)
+        try:
+            span = notebook_format.locate_config(read_notebook(path))
+        except OSError as e:
+            yield FileResult(path, "error", error=str(e))
+            continue
+        if span is None:
+            yield FileResult(path, "no_app")
+            continue
+        css_file = notebook_format.get_option(span.content, "css_file")
+        if css_file is None:
+            yield FileResult(path, "no_theme")
+        else:
+            yield FileResult(
+                path, "themed", theme_name_for(css_file), css_file
+            )
+
+
+async def apply_files_async(
+    paths: Iterable[str],
+    css_path: str | Path,
+    *,
+    relative_to_notebook: bool = False,
+    write: bool = True,
+    head_path: str | Path | None = None,
+) -> list[FileResult]:
+    """Run ``apply_files`` in a worker thread for event-loop callers."""
+    return await asyncio.to_thread(
+        lambda: list(
+            apply_files(
+                paths,
+                css_path,
+                relative_to_notebook=relative_to_notebook,
+                write=write,
+                head_path=head_path,
+            )
+        )
+    )
+
+
+async def clear_files_async(
+    paths: Iterable[str], *, write: bool = True
+) -> list[FileResult]:
+    """Run ``clear_files`` in a worker thread for event-loop callers."""
+    return await asyncio.to_thread(
+        lambda: list(clear_files(paths, write=write))
+    )
+
+
+async def read_files_async(paths: Iterable[str]) -> list[FileResult]:
+    """Run ``read_files`` in a worker thread for event-loop callers."""
+    return await asyncio.to_thread(lambda: list(read_files(paths)))
@@ -2,7 +2,14 @@
 
 from __future__ import annotations
 
+import re
 from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+# Notebooks may import marimo under an alias, as in ``app = mo.App()``
+_MARIMO_ALIAS = re.compile(r"^import marimo as (\w+)", re.MULTILINE)
+_APP_CALL = re.compile(r"\b\w+\.App\(")
 
 
 @dataclass
@@ -14,19 +21,46 @@ class AppBlock:
     content: str
 
 
+@dataclass
+class AppSpan(AppBlock):
+    """A marimo.App block located by character offsets in the file text."""
+
+    start_offset: int
+    end_offset: int
+
+
+def split_lines(text: str) -> list[str]:
+    """Split text into lines at each newline, keeping line endings."""
+    lines = text.split("\n")
+    last = lines.pop()
+    return [f"{line}\n" for line in lines] + ([last] if last else [])
+
+
+@lru_cache(maxsize=16)
+def _declaration_pattern(alias: str) -> re.Pattern[str]:
+    return re.compile(rf"app = (?:marimo|{re.escape(alias)})\.App\(")
+
+
+def app_declaration(text: str) -> re.Pattern[str]:
+    """Get the pattern of the App declaration under the marimo alias."""
+    match = _MARIMO_ALIAS.search(text)
+    return _declaration_pattern(match.group(1) if match else "marimo")
+
+
 def find_app_block(content: list[str]) -> AppBlock | None:
     """
     Find and extract the marimo.App block from file content.
 
     Returns None if no App block is found.
     """
+    declaration = app_declaration("".join(content))
     in_app_block = False
     app_block_lines = []
     open_parentheses = 0
     start_line = -1
 
     for i, line in enumerate(content):
-        if "app = marimo.App(" in line:
+        if declaration.search(line):
             in_app_block = True
             start_line = i
             open_parentheses = line.count("(") - line.count(")")
@@ -64,3 +98,148 @@ def update_file_content(
         + [new_content]
         + file_content[app_block.end_line + 1 :]
     )
+
+
+def find_app_span(text: str) -> AppSpan | None:
+    """
+    Locate the marimo.App block directly in the file text.
+
+    Gives the same block as ``find_app_block(split_lines(text))`` but
+    jumps straight to the declaration with one search instead of
+    scanning every line before it, and also returns the character
+    offsets so the block can be replaced without splitting the file.
+    """
+    declaration = app_declaration(text)
+    match = declaration.search(text)
+    if match is None:
+        return None
+    pos = match.start()
+    line_start = text.rfind("\n", 0, pos) + 1
+    start_line = text.count("\n", 0, line_start)
+
+    block_start = line_start
+    block_line = start_line
+    open_parentheses = 0
+    app_block_lines: list[str] = []
+    offset = line_start
+    line_no = start_line
+    while offset < len(text):
+        newline = text.find("\n", offset)
+        end = len(text) if newline == -1 else newline + 1
+        line = text[offset:end]
+
+        if declaration.search(line):
+            # A new declaration restarts the block, like find_app_block
+            block_start, block_line = offset, line_no
+            open_parentheses = line.count("(") - line.count(")")
+            app_block_lines = [line]
+        else:
+            open_parentheses += line.count("(") - line.count(")")
+            app_block_lines.append(line.strip())
+
+        if open_parentheses == 0:
+            return AppSpan(
+                start_line=block_line,
+                end_line=line_no,
+                content="".join(app_block_lines),
+                start_offset=block_start,
+                end_offset=end,
+            )
+        offset = end
+        line_no += 1
+
+    return None
+
+
+@lru_cache(maxsize=128)
+def set_app_kwarg(line: str, key: str, value: str) -> str:
+    """Set a string keyword argument of a marimo.App call."""
+    if f"{key}=" in line:
+        # Replace existing parameter, keeping backslashes in the value
+        return re.sub(
+            rf'{re.escape(key)}=["\'"][^"\']*["\']',
+            lambda _: f'{key}="{value}"',
+            line,
+        )
+    if line.strip().endswith(".App()"):
+        # No existing parameters
+        return _APP_CALL.sub(
+            lambda m: f'{m.group(0)}{key}="{value}"', line, count=1
+        )
+    # Has existing parameters, insert the new one first
+    return _APP_CALL.sub(
+        lambda m: f'{m.group(0)}{key}="{value}", ', line, count=1
+    )
+
+
+@lru_cache(maxsize=128)
+def remove_app_kwarg(line: str, key: str) -> str:
+    """Remove a string keyword argument of a marimo.App call."""
+    # Remove the parameter and its value
+    pattern = rf',?\s*{re.escape(key)}=(["\'])(?:(?!\1).)*\1'
+    new_line = re.sub(pattern, "", line)
+
+    # Clean up any potential double commas or empty parentheses
+    new_line = re.sub(r",\s*,", ",", new_line)
+    new_line = re.sub(r"\(\s*,", "(", new_line)
+    return re.sub(r",\s*\)", ")", new_line)
+
+
+@lru_cache(maxsize=128)
+def extract_app_kwarg(line: str, key: str) -> str | None:
+    """Extract the value of a string keyword argument of marimo.App."""
+    match = re.search(rf'{re.escape(key)}=["\'](.*?)["\']', line)
+    return match.group(1) if match else None
+
+
+def modify_app_line(line: str, css_file_path: Path) -> str:
+    """Modify a marimo.App line to include or update the css_file parameter."""
+    return set_app_kwarg(line, "css_file", str(css_file_path))
+
+
+def clean_app_line(line: str) -> str:
+    """
+    Remove css_file parameter and cleaning up punctuation.
+
+    Args:
+        line: The line containing marimo.App() call.
+
+    Returns:
+        Cleaned line with css_file parameter removed and punctuation fixed
+
+    """
+    return remove_app_kwarg(line, "css_file")
+
+
+def extract_css_path(line: str) -> str | None:
+    """
+    Extract the css_file value from marimo.App line.
+
+    Args:
+        line: The line containing marimo.App() call
+
+    Returns:
+        The css_file path if found, None otherwise
+
+    """
+    return extract_app_kwarg(line, "css_file")
+
+
+@lru_cache(maxsize=128)
+def extract_theme_name(line: str) -> str | None:
+    """
+    Extract theme name from marimo.App line.
+
+    Args:
+        line: The line containing marimo.App() call
+
+    Returns:
+        Theme name if found, None otherwise
+
+    """
+    css_path = extract_css_path(line)
+    if css_path is None:
+        return None
+
+    # Extract theme name from path
+    return Path(css_path).stem
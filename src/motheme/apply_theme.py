@@ -1,81 +1,145 @@
 """Apply a Marimo theme to specified notebook files."""
 
-import re
-from functools import lru_cache
-from pathlib import Path
-
-from .app_parser import find_app_block, update_file_content
-from .util import get_themes_dir, validate_theme_exists
-
+from __future__ import annotations
 
-@lru_cache(maxsize=128)
-def modify_app_line(line: str, css_file_path: Path) -> str:
-    """Modify a marimo.App line to include or update the css_file parameter."""
-    if "css_file=" in line:
-        # Replace existing css_file parameter
-        return re.sub(
-            r'css_file=["\'"][^"\']*["\']', f'css_file="{css_file_path}"', line
-        )
-    if line.strip().endswith("marimo.App()"):
-        # No existing parameters
-        return line.replace(
-            "marimo.App()", f'marimo.App(css_file="{css_file_path}")'
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from .api import apply_files
+from .html_head import write_head_file
+from .shared_base import (
+    build_shared_base,
+    entry_family,
+    get_entry_path,
+    is_entry_current,
+    publish_base,
+)
+from .switch_theme import (
+    get_active_head_path,
+    get_active_theme_path,
+    switch_theme,
+)
+from .theme_store import pin_theme
+from .util import get_theme_index, get_themes_dir, validate_theme_exists
+
+if TYPE_CHECKING:
+    from .report import Report
+
+
+def _resolve_shared_entry(theme_name: str) -> Path | None:
+    """Get a theme's shared base entry, rebuilding it if out of date."""
+    try:
+        css_path = validate_theme_exists(theme_name, get_themes_dir())
+    except FileNotFoundError:
+        return None
+    if is_entry_current(theme_name, css_path):
+        return get_entry_path(theme_name)
+    # Rebuild the family of themes the entry's base was built from
+    index = get_theme_index()
+    names = [name for name in entry_family(theme_name) if name in index]
+    if build_shared_base(names) is None:
+        return None
+    return get_entry_path(theme_name)
+
+
+def _resolve_theme_target(
+    theme_name: str, *, alias: bool, pin: bool = False, shared: bool = False
+) -> Path | None:
+    """Get the theme file, or the switched alias, notebooks should use."""
+    if shared:
+        return _resolve_shared_entry(theme_name)
+    if pin:
+        return pin_theme(theme_name)
+    if alias:
+        if switch_theme(theme_name) is None:
+            return None
+        return get_active_theme_path()
+    try:
+        return validate_theme_exists(theme_name, get_themes_dir())
+    except FileNotFoundError:
+        return None
+
+
+def _write_theme_head(
+    theme_name: str, target_path: Path, *, alias: bool
+) -> Path | None:
+    """Write the html_head_file with font hints for the applied theme."""
+    if alias:
+        # The alias head is rewritten by `motheme switch`, so always
+        # create it even if the current theme loads no web fonts
+        return write_head_file(
+            theme_name, target_path, get_active_head_path(), always=True
         )
-    # Has existing parameters, insert css_file
-    return line.replace(
-        "marimo.App(", f'marimo.App(css_file="{css_file_path}", '
-    )
-
-
-def process_file(
-    file_path: str, css_file_path: Path
-) -> tuple[bool, list[str]]:
-    """Process a single file and return (success, new_content)."""
-    with Path(file_path).open() as f:
-        content = f.readlines()
-
-    app_block = find_app_block(content)
-    if not app_block:
-        return False, content
-
-    new_app_content = modify_app_line(app_block.content, css_file_path)
-    new_content = update_file_content(content, app_block, new_app_content)
-
-    return True, new_content
-
-
-def apply_theme(theme_name: str, files: list[str]) -> None:
+    head_path = write_head_file(theme_name, target_path)
+    if head_path is None:
+        print(f"{theme_name} loads no web fonts; skipping html_head_file")
+    return head_path
+
+
+def apply_theme(  # noqa: PLR0913
+    theme_name: str,
+    files: list[str],
+    *,
+    alias: bool = False,
+    pin: bool = False,
+    head: bool = False,
+    shared: bool = False,
+    report: Report | None = None,
+) -> None:
     """
     Apply a Marimo theme to specified notebook files.
 
     :param theme_name: Name of the theme to apply
     :param files: List of Marimo notebook files to modify
+    :param alias: Point notebooks at the project's active theme alias
+        and switch the alias to the theme, instead of referencing the
+        theme file directly
+    :param pin: Point notebooks at the theme's immutable stored content
+        recorded in motheme.lock, so later updates do not change them
+    :param head: Also generate an html_head_file that preconnects to and
+        preloads the theme's web fonts, and reference it from each
+        notebook in the same rewrite
+    :param shared: Point notebooks at the theme's entry stylesheet, which
+        holds only the theme's own declarations and imports the base
+        shared by its theme family from each notebook's public/ dir
+    :param report: Optional report to record each file's outcome in
     """
     # Validate theme
-    themes_dir = get_themes_dir()
-    try:
-        css_file_path = validate_theme_exists(theme_name, themes_dir)
-    except FileNotFoundError:
+    target_path = _resolve_theme_target(
+        theme_name, alias=alias, pin=pin, shared=shared
+    )
+    if target_path is None:
         return
 
+    head_path = (
+        _write_theme_head(theme_name, target_path, alias=alias)
+        if head
+        else None
+    )
+
     # Process files
     modified_files = []
-    current_file = None
-    try:
-        for file_name in files:
-            current_file = file_name
-            theme_applied, new_content = process_file(file_name, css_file_path)
-
-            if theme_applied:
-                with Path(file_name).open("w") as f:
-                    f.writelines(new_content)
-                modified_files.append(file_name)
-                print(f"Applied {theme_name} theme to {file_name}")
-            else:
-                print(f"Failed to apply {theme_name} theme to {file_name}")
-
-    except OSError as e:
-        print(f"Error processing {current_file}: {e}")
+    for result in apply_files(
+        files,
+        target_path,
+        relative_to_notebook=alias or pin,
+        head_path=head_path,
+    ):
+        if result.status == "applied":
+            if shared:
+                publish_base(theme_name, Path(result.path).parent)
+            modified_files.append(result.path)
+            print(f"Applied {theme_name} theme to {result.path}")
+        elif result.status == "error":
+            print(f"Error processing {result.path}: {result.error}")
+        else:
+            print(f"Failed to apply {theme_name} theme to {result.path}")
+        if report:
+            report.add(
+                result.path,
+                result.status,
+                theme_name if result.status == "applied" else None,
+            )
 
     # Summary
     if modified_files:
@@ -1,25 +1,89 @@
 """CLI for motheme."""
 
+from typing import Optional
+
 import arguably
 
 from motheme.apply_theme import apply_theme
 from motheme.clear_theme import clear_theme
 from motheme.create_theme import create_theme
 from motheme.current_theme import current_theme
+from motheme.doctor import check_references, relocate_themes
+from motheme.export_theme import export_theme
+from motheme.fleet import DEFAULT_JOBS, run_fleet
+from motheme.font_vendor import vendor_theme_fonts
+from motheme.generate_theme import generate_themes
+from motheme.history import show_history
+from motheme.io_limits import io_limits, parse_size
 from motheme.list_themes import list_themes
+from motheme.live_edit import edit_theme
+from motheme.marimo_config import (
+    SCOPES,
+    apply_config_theme,
+    clear_config_theme,
+)
+from motheme.preview import build_gallery
+from motheme.registries import list_registries, update_from_registries
 from motheme.remove_theme import remove_theme_files
-from motheme.theme_downloader import download_themes
+from motheme.report import Report, combine_reports
+from motheme.shared_base import build_shared_base
+from motheme.switch_theme import switch_theme
+from motheme.theme_bundle import create_bundle, install_themes
+from motheme.theme_store import lock_themes, verify_lock
+from motheme.usage import collect_garbage, theme_usage
 from motheme.util import (
     check_files_provided,
     expand_files,
+    parse_shard,
     quiet_mode,
 )
 
 
 @arguably.command
-def update() -> None:
-    """Update Marimo themes from GitHub repository."""
-    download_themes()
+def update(
+    source: Optional[str] = None,
+    *,
+    sha256: Optional[str] = None,
+    theme: Optional[str] = None,
+) -> None:
+    """
+    Update Marimo themes from the theme registries or an offline source.
+
+    Args:
+        source: Local directory, file:// URL or .tar.gz/.tgz/.zip bundle
+            to install themes from instead of the registries
+        sha256: Expected sha256 digest of the bundle archive
+        theme: [-t] Comma-separated names of the themes to install from
+            the registries, instead of all of them
+
+    """
+    if source:
+        install_themes(source, sha256=sha256)
+    else:
+        names = (
+            [n.strip() for n in theme.split(",") if n.strip()]
+            if theme
+            else None
+        )
+        update_from_registries(names)
+
+
+@arguably.command
+def registries() -> None:
+    """List theme registries and which one provides each theme."""
+    list_registries()
+
+
+@arguably.command
+def bundle(output: str = "motheme-themes.tar.gz") -> None:
+    """
+    Pack installed themes into an archive for offline updates.
+
+    Args:
+        output: Path of the .tar.gz/.tgz or .zip archive to write
+
+    """
+    create_bundle(output)
 
 
 @arguably.command
@@ -35,6 +99,17 @@ def apply(
     recursive: bool = False,
     quiet: bool = False,
     git_ignore: bool = False,
+    alias: bool = False,
+    pin: bool = False,
+    head: bool = False,
+    shared: bool = False,
+    scope: str = "file",
+    shard: Optional[str] = None,
+    report: Optional[str] = None,
+    changed_since: Optional[str] = None,
+    staged: bool = False,
+    max_iops: Optional[float] = None,
+    max_bytes_per_sec: Optional[str] = None,
 ) -> None:
     """
     Apply a Marimo theme to specified notebook files.
@@ -47,16 +122,85 @@ def apply(
             Marimo notebooks
         quiet: [-q] If True, suppress output
         git_ignore: [-i] If True, ignore files that are git ignored
+        alias: [-a] If True, point notebooks at the project's
+            .motheme/active.css alias so `motheme switch` can retheme
+            them without rewriting any notebook
+        pin: [-p] If True, point notebooks at the theme's immutable
+            content in the theme store and record it in motheme.lock,
+            so `motheme update` cannot change how they look
+        head: If True, also point notebooks at a generated
+            html_head_file that preconnects to and preloads the theme's
+            web fonts, so they are fetched without waiting for the CSS
+        shared: [-s] If True, point notebooks at the theme's entry
+            stylesheet, which holds the theme's own declarations and
+            imports the base its theme family shares from public/
+        scope: Where to apply the theme: "file" edits each notebook,
+            "project" sets it in pyproject.toml [tool.marimo.display]
+            and "user" sets it in the user marimo.toml
+        shard: Only process shard INDEX/COUNT of the files (e.g. 2/16),
+            split by a stable hash of each path
+        report: Write a JSON summary of the run to this path
+        changed_since: Only consider files changed since this git
+            revision, taken from a single git diff instead of a tree walk
+        staged: Only consider files with staged git changes
+        max_iops: Limit notebook reads and writes to this many per
+            second, and process files directory by directory
+        max_bytes_per_sec: Limit notebook I/O to this many bytes per
+            second, e.g. 20M
 
     """
+    limits = parse_io_limits(max_iops, max_bytes_per_sec)
+    if not check_scope(scope) or limits is None:
+        return
+    if (pin or shared) and (alias or (pin and shared) or scope != "file"):
+        option = "--pin" if pin else "--shared"
+        print(f"Error: {option} can only be used to apply a theme to files.")
+        return
+    if head and scope != "file":
+        print("Error: --head can only be used to apply a theme to files.")
+        return
+    if scope != "file":
+        with quiet_mode(enabled=quiet):
+            apply_config_theme(theme_name, scope, alias=alias)
+        return
     if not check_files_provided("apply the theme", files):
         return
 
-    with quiet_mode(enabled=quiet):
+    run_report = Report("apply", shard) if report else None
+    with io_limits(**limits), quiet_mode(enabled=quiet):
+        selected = select_files(
+            files,
+            recursive=recursive,
+            git_ignore=git_ignore,
+            shard=shard,
+            changed_since=changed_since,
+            staged=staged,
+        )
+        if selected is None:
+            return
         apply_theme(
             theme_name,
-            expand_files(*files, recursive=recursive, git_ignore=git_ignore),
+            selected,
+            alias=alias,
+            pin=pin,
+            head=head,
+            shared=shared,
+            report=run_report,
         )
+    if run_report and report:
+        run_report.write(report)
+
+
+@arguably.command
+def switch(theme_name: str) -> None:
+    """
+    Switch the project's active theme alias to another theme.
+
+    Args:
+        theme_name: Name of the theme to activate
+
+    """
+    switch_theme(theme_name)
 
 
 @arguably.command
@@ -65,6 +209,13 @@ def clear(
     recursive: bool = False,
     quiet: bool = False,
     git_ignore: bool = False,
+    scope: str = "file",
+    shard: Optional[str] = None,
+    report: Optional[str] = None,
+    changed_since: Optional[str] = None,
+    staged: bool = False,
+    max_iops: Optional[float] = None,
+    max_bytes_per_sec: Optional[str] = None,
 ) -> None:
     """
     Remove theme settings from specified notebook files.
@@ -75,15 +226,44 @@ def clear(
             Marimo notebooks
         quiet: [-q] If True, suppress output
         git_ignore: [-i] If True, ignore files that are git ignored
+        scope: Where to clear the theme: "file", "project" or "user"
+        shard: Only process shard INDEX/COUNT of the files (e.g. 2/16),
+            split by a stable hash of each path
+        report: Write a JSON summary of the run to this path
+        changed_since: Only consider files changed since this git
+            revision, taken from a single git diff instead of a tree walk
+        staged: Only consider files with staged git changes
+        max_iops: Limit notebook reads and writes to this many per
+            second, and process files directory by directory
+        max_bytes_per_sec: Limit notebook I/O to this many bytes per
+            second, e.g. 20M
 
     """
+    limits = parse_io_limits(max_iops, max_bytes_per_sec)
+    if not check_scope(scope) or limits is None:
+        return
+    if scope != "file":
+        with quiet_mode(enabled=quiet):
+            clear_config_theme(scope)
+        return
     if not check_files_provided("clear themes from", files):
         return
 
-    with quiet_mode(enabled=quiet):
-        clear_theme(
-            expand_files(*files, recursive=recursive, git_ignore=git_ignore)
+    run_report = Report("clear", shard) if report else None
+    with io_limits(**limits), quiet_mode(enabled=quiet):
+        selected = select_files(
+            files,
+            recursive=recursive,
+            git_ignore=git_ignore,
+            shard=shard,
+            changed_since=changed_since,
+            staged=staged,
         )
+        if selected is None:
+            return
+        clear_theme(selected, report=run_report)
+    if run_report and report:
+        run_report.write(report)
 
 
 @arguably.command
@@ -92,6 +272,12 @@ def current(
     recursive: bool = False,
     quiet: bool = False,
     git_ignore: bool = False,
+    shard: Optional[str] = None,
+    report: Optional[str] = None,
+    changed_since: Optional[str] = None,
+    staged: bool = False,
+    max_iops: Optional[float] = None,
+    max_bytes_per_sec: Optional[str] = None,
 ) -> None:
     """
     Show currently applied themes for specified notebook files.
@@ -102,31 +288,442 @@ def current(
             Marimo notebooks
         quiet: [-q] If True, suppress output
         git_ignore: [-i] If True, ignore files that are git ignored
+        shard: Only process shard INDEX/COUNT of the files (e.g. 2/16),
+            split by a stable hash of each path
+        report: Write a JSON summary of the run to this path
+        changed_since: Only consider files changed since this git
+            revision, taken from a single git diff instead of a tree walk
+        staged: Only consider files with staged git changes
+        max_iops: Limit notebook reads and writes to this many per
+            second, and process files directory by directory
+        max_bytes_per_sec: Limit notebook I/O to this many bytes per
+            second, e.g. 20M
+
+    """
+    limits = parse_io_limits(max_iops, max_bytes_per_sec)
+    if not check_files_provided("check themes for", files) or limits is None:
+        return
+
+    run_report = Report("current", shard) if report else None
+    with io_limits(**limits), quiet_mode(enabled=quiet):
+        selected = select_files(
+            files,
+            recursive=recursive,
+            git_ignore=git_ignore,
+            shard=shard,
+            changed_since=changed_since,
+            staged=staged,
+        )
+        if selected is None:
+            return
+        current_theme(selected, report=run_report)
+    if run_report and report:
+        run_report.write(report)
+
+
+@arguably.command
+def export(
+    *files: str,
+    theme: Optional[str] = None,
+    output_dir: str = "exports",
+    jobs: Optional[int] = None,
+    recursive: bool = False,
+    quiet: bool = False,
+    git_ignore: bool = False,
+    shard: Optional[str] = None,
+    report: Optional[str] = None,
+    changed_since: Optional[str] = None,
+    staged: bool = False,
+    max_iops: Optional[float] = None,
+    max_bytes_per_sec: Optional[str] = None,
+) -> None:
+    """
+    Export notebooks to HTML with a theme, without modifying them.
+
+    Args:
+        files: Tuple of file/directory paths
+        theme: [-t] Name of the theme to export with
+        output_dir: [-o] Directory to write HTML files to, in a
+            subdirectory per theme
+        jobs: [-j] Maximum number of concurrent exports (defaults to
+            the number of CPUs)
+        recursive: [-r] If True, recursively search directories for
+            Marimo notebooks
+        quiet: [-q] If True, suppress output
+        git_ignore: [-i] If True, ignore files that are git ignored
+        shard: Only process shard INDEX/COUNT of the files (e.g. 2/16),
+            split by a stable hash of each path
+        report: Write a JSON summary of the run to this path
+        changed_since: Only consider files changed since this git
+            revision, taken from a single git diff instead of a tree walk
+        staged: Only consider files with staged git changes
+        max_iops: Limit notebook reads and writes to this many per
+            second, and process files directory by directory
+        max_bytes_per_sec: Limit notebook I/O to this many bytes per
+            second, e.g. 20M
 
     """
-    if not check_files_provided("check themes for", files):
+    if not theme:
+        print("Error: Please specify a theme to export with using --theme.")
+        return
+    limits = parse_io_limits(max_iops, max_bytes_per_sec)
+    if limits is None or not check_files_provided("export", files):
         return
 
-    with quiet_mode(enabled=quiet):
-        current_theme(
-            expand_files(*files, recursive=recursive, git_ignore=git_ignore)
+    run_report = Report("export", shard) if report else None
+    with io_limits(**limits), quiet_mode(enabled=quiet):
+        selected = select_files(
+            files,
+            recursive=recursive,
+            git_ignore=git_ignore,
+            shard=shard,
+            changed_since=changed_since,
+            staged=staged,
+        )
+        if selected is None:
+            return
+        export_theme(
+            theme,
+            selected,
+            output_dir=output_dir,
+            jobs=jobs,
+            report=run_report,
         )
+    if run_report and report:
+        run_report.write(report)
 
 
 @arguably.command
-def remove(*theme_names: str) -> None:
+def preview(
+    notebook: str = "sample.py",
+    *,
+    output_dir: str = "gallery",
+    theme: Optional[str] = None,
+    jobs: Optional[int] = None,
+    max_iops: Optional[float] = None,
+    max_bytes_per_sec: Optional[str] = None,
+) -> None:
+    """
+    Export a notebook once per theme into a static HTML gallery.
+
+    Args:
+        notebook: Marimo notebook to preview the themes with
+        output_dir: [-o] Directory to write the gallery to
+        theme: [-t] Comma-separated themes to include, all by default
+        jobs: [-j] Maximum number of concurrent exports
+        max_iops: Limit notebook and page reads and writes to this many
+            per second, shared by all exports
+        max_bytes_per_sec: Limit notebook and page I/O to this many
+            bytes per second, e.g. 20M
+
+    """
+    limits = parse_io_limits(max_iops, max_bytes_per_sec)
+    if limits is None:
+        return
+    themes = [t.strip() for t in theme.split(",")] if theme else None
+    with io_limits(**limits):
+        build_gallery(notebook, output_dir, themes=themes, jobs=jobs)
+
+
+@arguably.command
+def merge_reports(*reports: str, output: Optional[str] = None) -> None:
+    """
+    Combine the JSON reports of sharded runs into one summary.
+
+    Args:
+        reports: Paths of the shard reports to merge
+        output: [-o] Write the merged report to this path
+
+    """
+    if not reports:
+        print("Error: Please specify at least one report to merge.")
+        return
+
+    combine_reports(list(reports), output)
+
+
+@arguably.command
+def lock(
+    *files: str,
+    recursive: bool = False,
+    git_ignore: bool = False,
+    shard: Optional[str] = None,
+    changed_since: Optional[str] = None,
+    staged: bool = False,
+) -> None:
+    """
+    Record the hash of each theme used by notebooks in motheme.lock.
+
+    Args:
+        files: Tuple of file/directory paths
+        recursive: [-r] If True, recursively search directories for
+            Marimo notebooks
+        git_ignore: [-i] If True, ignore files that are git ignored
+        shard: Only process shard INDEX/COUNT of the files (e.g. 2/16),
+            split by a stable hash of each path
+        changed_since: Only consider files changed since this git
+            revision, taken from a single git diff instead of a tree walk
+        staged: Only consider files with staged git changes
+
+    """
+    if not check_files_provided("lock themes", files):
+        return
+
+    selected = select_files(
+        files,
+        recursive=recursive,
+        git_ignore=git_ignore,
+        shard=shard,
+        changed_since=changed_since,
+        staged=staged,
+    )
+    if selected is None:
+        return
+    lock_themes(selected)
+
+
+@arguably.command
+def verify() -> None:
+    """Check installed themes against the project's motheme.lock."""
+    if not verify_lock():
+        raise SystemExit(1)
+
+
+@arguably.command
+def usage(
+    *files: str,
+    recursive: bool = False,
+    git_ignore: bool = False,
+    shard: Optional[str] = None,
+    report: Optional[str] = None,
+    changed_since: Optional[str] = None,
+    staged: bool = False,
+) -> None:
+    """
+    Show how many notebooks use each theme, per theme and directory.
+
+    Args:
+        files: Tuple of file/directory paths
+        recursive: [-r] If True, recursively search directories for
+            Marimo notebooks
+        git_ignore: [-i] If True, ignore files that are git ignored
+        shard: Only process shard INDEX/COUNT of the files (e.g. 2/16),
+            split by a stable hash of each path
+        report: Write a JSON summary of the run to this path
+        changed_since: Only consider files changed since this git
+            revision, taken from a single git diff instead of a tree walk
+        staged: Only consider files with staged git changes
+
+    """
+    if not check_files_provided("scan", files):
+        return
+
+    selected = select_files(
+        files,
+        recursive=recursive,
+        git_ignore=git_ignore,
+        shard=shard,
+        changed_since=changed_since,
+        staged=staged,
+    )
+    if selected is None:
+        return
+
+    run_report = Report("usage", shard) if report else None
+    theme_usage(selected, report=run_report)
+    if run_report and report:
+        run_report.write(report)
+
+
+@arguably.command
+def gc(
+    *files: str,
+    recursive: bool = False,
+    git_ignore: bool = False,
+    yes: bool = False,
+    dry_run: bool = False,
+) -> None:
+    """
+    Remove installed themes that no scanned notebook uses.
+
+    Every notebook given must be scanned, so gc takes no --shard,
+    --changed-since or --staged: a partial scan would count themes used
+    only by the other notebooks as unused.
+
+    Args:
+        files: Tuple of file/directory paths whose notebooks' themes
+            must be kept
+        recursive: [-r] If True, recursively search directories for
+            Marimo notebooks
+        git_ignore: [-i] If True, ignore files that are git ignored
+        yes: [-y] If True, remove without asking for confirmation
+        dry_run: [-n] If True, only list the themes that would be removed
+
+    """
+    if not check_files_provided("scan", files):
+        return
+
+    selected = select_files(
+        files, recursive=recursive, git_ignore=git_ignore, shard=None
+    )
+    if selected is None:
+        return
+    collect_garbage(selected, yes=yes, dry_run=dry_run)
+
+
+@arguably.command
+def doctor(
+    *files: str,
+    recursive: bool = False,
+    git_ignore: bool = False,
+    shard: Optional[str] = None,
+    report: Optional[str] = None,
+    changed_since: Optional[str] = None,
+    staged: bool = False,
+) -> None:
+    """
+    Find notebooks whose css_file does not exist on this machine.
+
+    Args:
+        files: Tuple of file/directory paths
+        recursive: [-r] If True, recursively search directories for
+            Marimo notebooks
+        git_ignore: [-i] If True, ignore files that are git ignored
+        shard: Only process shard INDEX/COUNT of the files (e.g. 2/16),
+            split by a stable hash of each path
+        report: Write a JSON summary of the run to this path
+        changed_since: Only consider files changed since this git
+            revision, taken from a single git diff instead of a tree walk
+        staged: Only consider files with staged git changes
+
+    """
+    if not check_files_provided("check", files):
+        return
+
+    selected = select_files(
+        files,
+        recursive=recursive,
+        git_ignore=git_ignore,
+        shard=shard,
+        changed_since=changed_since,
+        staged=staged,
+    )
+    if selected is None:
+        return
+
+    run_report = Report("doctor", shard) if report else None
+    ok = check_references(selected, report=run_report)
+    if run_report and report:
+        run_report.write(report)
+    if not ok:
+        raise SystemExit(1)
+
+
+@arguably.command
+def relocate(
+    *files: str,
+    recursive: bool = False,
+    git_ignore: bool = False,
+    relative: bool = False,
+    prefix: Optional[str] = None,
+    dry_run: bool = False,
+    shard: Optional[str] = None,
+    changed_since: Optional[str] = None,
+    staged: bool = False,
+) -> None:
+    """
+    Point stale css_file paths at the matching theme on this machine.
+
+    Args:
+        files: Tuple of file/directory paths
+        recursive: [-r] If True, recursively search directories for
+            Marimo notebooks
+        git_ignore: [-i] If True, ignore files that are git ignored
+        relative: If True, reference themes relative to each notebook
+            instead of by absolute path
+        prefix: Only rewrite css_file paths starting with this prefix,
+            e.g. /home/alice/.local/share/mtheme
+        dry_run: [-n] If True, only show what would be rewritten
+        shard: Only process shard INDEX/COUNT of the files (e.g. 2/16),
+            split by a stable hash of each path
+        changed_since: Only consider files changed since this git
+            revision, taken from a single git diff instead of a tree walk
+        staged: Only consider files with staged git changes
+
+    """
+    if not check_files_provided("relocate themes in", files):
+        return
+
+    selected = select_files(
+        files,
+        recursive=recursive,
+        git_ignore=git_ignore,
+        shard=shard,
+        changed_since=changed_since,
+        staged=staged,
+    )
+    if selected is None:
+        return
+    relocate_themes(
+        selected,
+        relative=relative,
+        old_prefix=prefix,
+        dry_run=dry_run,
+    )
+
+
+@arguably.command
+def fleet(
+    manifest: str,
+    *,
+    jobs: int = DEFAULT_JOBS,
+    dry_run: bool = False,
+    report: Optional[str] = None,
+    max_iops: Optional[float] = None,
+    max_bytes_per_sec: Optional[str] = None,
+) -> None:
+    """
+    Apply themes across the repositories listed in a TOML manifest.
+
+    Args:
+        manifest: Manifest with a [[repo]] table (path, theme and
+            optional roots) per repository checkout
+        jobs: [-j] Maximum number of repositories processed at once
+        dry_run: [-n] Only report which notebooks would be themed
+        report: Write a JSON summary of every file to this path
+        max_iops: Limit notebook reads and writes to this many per
+            second, shared by all workers
+        max_bytes_per_sec: Limit notebook I/O to this many bytes per
+            second, e.g. 20M, shared by all workers
+
+    """
+    limits = parse_io_limits(max_iops, max_bytes_per_sec)
+    if limits is None:
+        raise SystemExit(1)
+    run_report = Report("fleet") if report else None
+    with io_limits(**limits):
+        ok = run_fleet(manifest, jobs=jobs, dry_run=dry_run, report=run_report)
+    if run_report and report:
+        run_report.write(report)
+    if not ok:
+        raise SystemExit(1)
+
+
+@arguably.command
+def remove(*theme_names: str, yes: bool = False) -> None:
     """
     Remove specified theme files from themes directory.
 
     Args:
         theme_names: Names of themes to remove
+        yes: [-y] If True, remove without asking for confirmation
 
     """
     if not theme_names:
         print("Error: Please specify at least one theme name to remove.")
         return
 
-    remove_theme_files(list(theme_names))
+    remove_theme_files(list(theme_names), yes=yes)
 
 
 @arguably.command
@@ -142,6 +739,162 @@ def create(ref_theme_name: str, theme_name: str) -> None:
     create_theme(ref_theme_name, theme_name)
 
 
+@arguably.command
+def edit(
+    theme_name: str,
+    *,
+    notebook: Optional[str] = None,
+    draft: Optional[str] = None,
+) -> None:
+    """
+    Edit a theme live, publishing every valid save to running notebooks.
+
+    Args:
+        theme_name: Name of the theme to edit
+        notebook: [-n] Apply the theme to this notebook before watching,
+            so a running `marimo edit` session shows each revision
+        draft: [-d] CSS file to edit (default: a copy of the theme in the
+            motheme drafts directory)
+
+    """
+    edit_theme(theme_name, notebook=notebook, draft=draft)
+
+
+@arguably.command
+def vendor_fonts(
+    theme_name: str,
+    *,
+    subsets: str = "latin",
+    text: Optional[str] = None,
+    name: Optional[str] = None,
+) -> None:
+    """
+    Embed a theme's Google Fonts so notebooks load them offline.
+
+    Args:
+        theme_name: Name of the theme whose fonts to vendor
+        subsets: Comma-separated scripts to keep, e.g. latin,latin-ext
+        text: Only keep fonts (and, with fontTools, glyphs) for these
+            characters
+        name: Save the vendored theme under this name instead of
+            shadowing the original
+
+    """
+    vendor_theme_fonts(
+        theme_name,
+        subsets=tuple(s.strip() for s in subsets.split(",")),
+        text=text,
+        output_name=name,
+    )
+
+
+@arguably.command
+def history(*roots: str, revs: Optional[str] = None) -> None:
+    """
+    Show when notebook themes changed across git revisions.
+
+    Args:
+        roots: Directories or notebooks to audit (default: the current
+            directory)
+        revs: Revision range such as v1.0..main, or comma-separated
+            revisions such as v1.0,v2.0 (default: all of HEAD's history)
+
+    """
+    if not show_history(roots, revs):
+        raise SystemExit(1)
+
+
+@arguably.command
+def build_base(*theme_names: str) -> None:
+    """
+    Factor the declarations shared by themes into one cached base file.
+
+    Args:
+        theme_names: Themes to include (default: all installed themes)
+
+    """
+    build_shared_base(list(theme_names) or None)
+
+
+@arguably.command
+def generate(
+    spec: str, *, output_dir: Optional[str] = None, force: bool = False
+) -> None:
+    """
+    Generate a family of themes from a TOML palette spec.
+
+    Args:
+        spec: Palette spec with [palettes], [roles] and [themes] tables
+        output_dir: [-o] Write themes here instead of the themes directory
+        force: [-f] Rewrite themes even if their spec has not changed
+
+    """
+    generate_themes(spec, output_dir=output_dir, force=force)
+
+
+def select_files(
+    files: tuple[str, ...],
+    *,
+    recursive: bool,
+    git_ignore: bool,
+    shard: Optional[str],
+    changed_since: Optional[str] = None,
+    staged: bool = False,
+) -> Optional[list[str]]:
+    """
+    Expand the files given to a command, restricted to one shard and,
+    optionally, to files changed in git.
+
+    Returns:
+        List of selected notebook files, or None if the shard is invalid
+
+    """
+    try:
+        shard_range = parse_shard(shard) if shard else None
+    except ValueError as e:
+        print(f"Error: {e}")
+        return None
+    return expand_files(
+        *files,
+        recursive=recursive,
+        git_ignore=git_ignore,
+        shard=shard_range,
+        changed_since=changed_since,
+        staged=staged,
+    )
+
+
+def parse_io_limits(
+    max_iops: Optional[float], max_bytes_per_sec: Optional[str]
+) -> Optional[dict[str, Optional[float]]]:
+    """
+    Parse the I/O limit options into ``io_limits`` arguments.
+
+    Returns:
+        The limits, or None (after printing an error) if invalid
+
+    """
+    if max_iops is not None and max_iops <= 0:
+        print("Error: --max-iops must be positive.")
+        return None
+    try:
+        max_bytes = (
+            parse_size(max_bytes_per_sec) if max_bytes_per_sec else None
+        )
+    except ValueError as e:
+        print(f"Error: {e}")
+        return None
+    return {"max_iops": max_iops, "max_bytes_per_sec": max_bytes}
+
+
+def check_scope(scope: str) -> bool:
+    """Check the scope option and print an error message if invalid."""
+    if scope not in SCOPES:
+        print(f"Error: Scope must be one of {', '.join(SCOPES)}.")
+        return False
+    return True
+
+
 def main() -> None:
     """CLI entry point."""
     arguably.run()
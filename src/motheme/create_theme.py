@@ -1,8 +1,13 @@
 """Create a new theme by duplicating an existing theme."""
 
-from shutil import copyfile
-
-from motheme.util import get_themes_dir, validate_theme_exists
+from motheme.util import (
+    atomic_write,
+    get_themes_dir,
+    invalidate_theme_index,
+    is_valid_theme_name,
+    themes_lock,
+    validate_theme_exists,
+)
 
 
 def create_theme(ref_theme_name: str, theme_name: str) -> None:
@@ -14,6 +19,10 @@ def create_theme(ref_theme_name: str, theme_name: str) -> None:
         theme_name: Name for the new theme
 
     """
+    if not is_valid_theme_name(theme_name):
+        print(f"Error: Invalid theme name {theme_name!r}.")
+        return
+
     themes_dir = get_themes_dir()
 
     # Validate reference theme exists
@@ -22,11 +31,13 @@ def create_theme(ref_theme_name: str, theme_name: str) -> None:
     # Create new theme path
     new_theme_path = themes_dir / f"{theme_name}.css"
 
-    # Check if new theme already exists
-    if new_theme_path.exists():
-        print(f"Error: Theme '{theme_name}' already exists.")
-        return
+    with themes_lock(themes_dir):
+        # Check if new theme already exists
+        if new_theme_path.exists():
+            print(f"Error: Theme '{theme_name}' already exists.")
+            return
 
-    # Copy the reference theme to create new theme
-    copyfile(ref_theme_path, new_theme_path)
+        # Copy the reference theme to create new theme
+        atomic_write(new_theme_path, ref_theme_path.read_bytes())
+    invalidate_theme_index()
     print(f"Created new theme: {new_theme_path}")
@@ -2,65 +2,74 @@
 
 from __future__ import annotations
 
-import re
-from functools import lru_cache
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-from .app_parser import find_app_block
+from .api import read_files
+from .marimo_config import get_default_theme
+from .switch_theme import is_active_theme_path, resolve_active_theme
+from .theme_store import describe_stored
+from .util import theme_name_for
 
+if TYPE_CHECKING:
+    from .report import Report
 
-@lru_cache(maxsize=128)
-def extract_theme_name(line: str) -> str | None:
-    """
-    Extract theme name from marimo.App line.
-
-    Args:
-        line: The line containing marimo.App() call
 
-    Returns:
-        Theme name if found, None otherwise
+def describe_theme(file_name: str, css_path: str | None) -> str | None:
+    """
+    Describe the theme applied by a notebook's css_file.
 
+    Notebooks pointing at an active theme alias are reported with the
+    theme the alias currently resolves to, and pinned notebooks as
+    ``name@digest``.
     """
-    # Look for css_file parameter
-    match = re.search(r'css_file=["\'](.*?)["\']', line)
-    if not match:
+    if css_path is None:
         return None
+    if stored := describe_stored(Path(css_path)):
+        return stored
+    if not is_active_theme_path(Path(css_path)):
+        return theme_name_for(css_path)
 
-    # Extract theme name from path
-    css_path = Path(match.group(1))
-    return css_path.stem
+    alias_path = Path(file_name).parent / css_path
+    active_theme = resolve_active_theme(alias_path)
+    if active_theme is None:
+        return f"missing alias {css_path}"
+    return f"{active_theme} (via {css_path})"
 
 
-def current_theme(files: list[str]) -> None:
+def current_theme(files: list[str], *, report: Report | None = None) -> None:
     """
     Show currently applied themes for specified notebook files.
 
     Args:
         files: List of Marimo notebook files to check
+        report: Optional report to record each file's theme in
 
     """
     found_themes = False
-    current_file = None
-    try:
-        for file_name in files:
-            current_file = file_name
-            with Path(file_name).open("r") as f:
-                content = f.readlines()
-
-            app_block = find_app_block(content)
-            if not app_block:
-                print(f"No marimo.App found in {file_name}")
-                continue
-
-            theme_name = extract_theme_name(app_block.content)
-            if theme_name:
-                found_themes = True
-                print(f"{file_name}: {theme_name}")
-            else:
-                print(f"{file_name}: No theme applied")
-
-    except OSError as e:
-        print(f"Error processing {current_file}: {e}")
+    for result in read_files(files):
+        file_name = result.path
+        if result.status == "error":
+            print(f"Error processing {file_name}: {result.error}")
+            status, theme_name = "error", None
+        elif result.status == "no_app":
+            print(f"No marimo.App found in {file_name}")
+            status, theme_name = "no_app", None
+        # A css_file in the notebook overrides configured defaults
+        elif theme_name := describe_theme(file_name, result.css_file):
+            print(f"{file_name}: {theme_name}")
+            status = "themed"
+        elif default_theme := get_default_theme(file_name):
+            theme_name, scope = default_theme
+            print(f"{file_name}: {theme_name} ({scope} default)")
+            status = f"{scope}_default"
+        else:
+            print(f"{file_name}: No theme applied")
+            status = "no_theme"
+
+        found_themes = found_themes or theme_name is not None
+        if report:
+            report.add(file_name, status, theme_name)
 
     if not found_themes:
         print("\nNo themes found in any files.")
@@ -0,0 +1,209 @@
+"""Find notebooks whose css_file is missing and point them at themes."""
+
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from .api import apply_to_source, read_notebook, write_notebook
+from .notebook_formats import format_for_path
+from .shared_base import get_entry_path
+from .switch_theme import is_active_theme_path
+from .theme_store import materialize_stored, stored_digest
+from .usage import scan_files
+from .util import ENTRY_SUFFIX, get_theme_index, theme_name_for
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+    from .report import Report
+
+
+@dataclass(frozen=True)
+class CssReference:
+    """A notebook's css_file and where it resolves on this machine."""
+
+    path: str
+    css_file: str
+    resolved: str
+    exists: bool
+
+
+def resolve_css_file(notebook: str, css_file: str) -> str:
+    """
+    Get the normalized path a css_file refers to.
+
+    Relative paths are resolved against the notebook's directory, like
+    marimo does.
+    """
+    css_path = Path(css_file).expanduser()
+    if not css_path.is_absolute():
+        css_path = Path(notebook).absolute().parent / css_path
+    return os.path.normpath(css_path)
+
+
+def scan_references(paths: Iterable[str]) -> Iterator[CssReference]:
+    """
+    Check that the css_file of each notebook exists.
+
+    Notebooks typically share a handful of theme files, so each distinct
+    resolved path is checked with a single stat however many notebooks
+    reference it.
+    """
+    exists: dict[str, bool] = {}
+    for result in scan_files(paths):
+        if result.css_file is None:
+            continue
+        resolved = resolve_css_file(result.path, result.css_file)
+        if resolved not in exists:
+            exists[resolved] = Path(resolved).is_file()
+        yield CssReference(
+            result.path, result.css_file, resolved, exists[resolved]
+        )
+
+
+def relocation_target(css_file: str) -> Path | None:
+    """
+    Find the file on this machine a stale css_file should point at.
+
+    Pinned store paths map to the project's copy of the same digest, and
+    theme files to the theme of the same name on the search path. Active
+    theme aliases cannot be relocated; they need ``motheme switch``.
+    """
+    css_path = Path(css_file)
+    digest = stored_digest(css_path)
+    if digest is not None:
+        return materialize_stored(digest)
+    if is_active_theme_path(css_path):
+        return None
+    theme = theme_name_for(css_path)
+    location = get_theme_index().get(theme)
+    if location is None:
+        return None
+    if css_path.name.endswith(ENTRY_SUFFIX):
+        entry_path = get_entry_path(theme)
+        return entry_path if entry_path.is_file() else None
+    return location.path
+
+
+def check_references(
+    files: list[str], *, report: Report | None = None
+) -> bool:
+    """
+    Report notebooks whose css_file does not exist on this machine.
+
+    Args:
+        files: List of Marimo notebook files to check
+        report: Optional report to record each themed file's status in
+
+    Returns:
+        bool: True if every css_file resolves
+
+    """
+    checked = 0
+    broken: dict[str, list[CssReference]] = {}
+    for ref in scan_references(files):
+        checked += 1
+        if not ref.exists:
+            broken.setdefault(ref.resolved, []).append(ref)
+        if report:
+            status = "ok" if ref.exists else "broken"
+            report.add(ref.path, status, theme_name_for(ref.css_file))
+
+    if not broken:
+        print(f"All {checked} themed notebook(s) have a valid css_file.")
+        return True
+
+    relocatable = 0
+    for resolved, refs in sorted(broken.items()):
+        target = relocation_target(refs[0].css_file)
+        if target is None:
+            hint = "no matching theme installed"
+        else:
+            hint = f"can be relocated to {target}"
+            relocatable += len(refs)
+        print(f"\nMissing {resolved} ({hint}):")
+        for ref in refs:
+            print(f"- {ref.path}")
+
+    total = sum(len(refs) for refs in broken.values())
+    print(
+        f"\n{total} of {checked} themed notebook(s) reference missing files; "
+        f"{relocatable} can be fixed with 'motheme relocate'."
+    )
+    return False
+
+
+def has_path_prefix(path: str, prefix: str) -> bool:
+    """
+    Check whether a path lies under a prefix, by whole path components.
+
+    Paths may come from another machine, so both separators are
+    accepted: ``/home/alice`` matches ``/home/alice/x.css`` but not
+    ``/home/alicexyz/x.css``.
+    """
+    path = path.replace("\\", "/")
+    prefix = prefix.replace("\\", "/").rstrip("/")
+    return path == prefix or path.startswith(f"{prefix}/")
+
+
+def relocate_themes(
+    files: list[str],
+    *,
+    relative: bool = False,
+    old_prefix: str | None = None,
+    dry_run: bool = False,
+) -> list[str]:
+    """
+    Rewrite stale css_file paths to the matching theme on this machine.
+
+    Without ``old_prefix``, only css_file paths that do not exist are
+    rewritten. Each notebook is read and written at most once.
+
+    Args:
+        files: List of Marimo notebook files to fix
+        relative: Reference the theme relative to each notebook instead
+            of by absolute path
+        old_prefix: Rewrite css_file values starting with this prefix,
+            e.g. another user's data directory, whether they exist or not
+        dry_run: Only print what would be rewritten
+
+    Returns:
+        The notebooks that were (or would be) rewritten
+
+    """
+    relocated = []
+    for ref in scan_references(files):
+        # A given prefix is stale by definition, even if it still exists
+        if old_prefix is not None:
+            if not has_path_prefix(ref.css_file, old_prefix):
+                continue
+        elif ref.exists:
+            continue
+        target = relocation_target(ref.css_file)
+        if target is None:
+            print(f"Skipping {ref.path}: no theme found for {ref.css_file}")
+            continue
+        if relative:
+            notebook_dir = Path(ref.path).absolute().parent
+            target = Path(os.path.relpath(target, notebook_dir))
+
+        print(f"{ref.path}: {ref.css_file} -> {target}")
+        relocated.append(ref.path)
+        if dry_run:
+            continue
+        try:
+            text = read_notebook(ref.path)
+            themed = apply_to_source(
+                text, target, notebook_format=format_for_path(ref.path)
+            )
+            write_notebook(ref.path, themed)
+        except (OSError, ValueError) as e:
+            print(f"Error processing {ref.path}: {e}")
+            relocated.pop()
+
+    verb = "Would relocate" if dry_run else "Relocated"
+    print(f"\n{verb} themes in {len(relocated)} file(s).")
+    return relocated
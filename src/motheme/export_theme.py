@@ -0,0 +1,268 @@
+"""Export marimo notebooks to HTML with a theme, leaving sources as-is."""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from shutil import copyfile
+from typing import TYPE_CHECKING
+
+import appdirs
+
+from .api import FileResult, apply_to_source, read_notebook
+from .io_limits import account_io
+from .notebook_formats import format_for_path
+from .util import (
+    get_themes_dir,
+    hash_file,
+    theme_name_for,
+    validate_theme_exists,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+    from .report import Report
+
+
+def get_export_cache_dir() -> Path:
+    """Get the directory caching exported HTML by content hash."""
+    cache_dir = Path(appdirs.user_cache_dir("mtheme", "marimo")) / "export"
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir
+
+
+def export_key(path: str, notebook: bytes, theme_digest: str) -> str:
+    """
+    Get the cache key of a (notebook, theme content) pair.
+
+    The notebook's path is part of the key, as marimo embeds the file
+    name in the export and the notebook may read files next to it.
+    """
+    notebook_digest = hashlib.sha256(notebook).hexdigest()
+    location = str(Path(path).absolute())
+    return hashlib.sha256(
+        f"{location}\0{notebook_digest}:{theme_digest}".encode()
+    ).hexdigest()
+
+
+def find_marimo() -> str:
+    """
+    Find the marimo command used for exports.
+
+    Raises:
+        FileNotFoundError: If the marimo command is not available.
+
+    """
+    marimo = shutil.which("marimo")
+    if marimo is None:
+        msg = "The marimo command was not found. Install it to export."
+        raise FileNotFoundError(msg)
+    return marimo
+
+
+def output_name(path: str) -> Path:
+    """
+    Get the HTML path of a notebook, relative to the output dir.
+
+    Notebooks below the current directory keep their relative path;
+    others keep their absolute path without its anchor, so notebooks
+    with the same name in different directories do not collide.
+    """
+    absolute = Path(path).absolute()
+    relative = Path(os.path.relpath(absolute))
+    if relative.parts[0] == os.pardir:
+        relative = Path(*absolute.parts[1:])
+    return relative.with_suffix(".html")
+
+
+def _run_export(
+    marimo: str, path: str, themed: str, output_path: Path
+) -> None:
+    """
+    Export themed notebook source to HTML with ``marimo export html``.
+
+    The themed source is written under the notebook's own name to a
+    temporary directory, so the export shows the real file name, and is
+    run from the notebook's directory with that directory importable,
+    so relative imports and data files still resolve.
+
+    Raises:
+        OSError: If the temporary files cannot be written.
+        subprocess.CalledProcessError: If the export fails.
+
+    """
+    notebook = Path(path).absolute()
+    tmp_output = output_path.absolute().with_name(
+        f".{output_path.name}.{os.getpid()}.{threading.get_ident()}"
+    )
+    python_path = os.environ.get("PYTHONPATH")
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join(
+            [str(notebook.parent), *([python_path] if python_path else [])]
+        ),
+    }
+    try:
+        with tempfile.TemporaryDirectory(prefix="motheme-export-") as tmp:
+            source = Path(tmp) / notebook.name
+            with source.open("w", encoding="utf-8", newline="") as f:
+                f.write(themed)
+            subprocess.run(  # noqa: S603
+                [marimo, "export", "html", str(source), "-o", str(tmp_output)],
+                check=True,
+                capture_output=True,
+                text=True,
+                cwd=notebook.parent,
+                env=env,
+            )
+        tmp_output.replace(output_path)
+    finally:
+        tmp_output.unlink(missing_ok=True)
+
+
+def export_file(
+    marimo: str,
+    path: str,
+    css_path: Path,
+    theme_digest: str,
+    output_path: Path,
+) -> FileResult:
+    """Export one notebook to a file, reusing a cached export if possible."""
+    theme = theme_name_for(css_path)
+    try:
+        text = read_notebook(path)
+        cached = get_export_cache_dir() / (
+            export_key(path, text.encode("utf-8"), theme_digest) + ".html"
+        )
+        status = "cached"
+        if not cached.exists():
+            try:
+                themed = apply_to_source(
+                    text, css_path, notebook_format=format_for_path(path)
+                )
+            except ValueError:
+                return FileResult(path, "failed")
+            _run_export(marimo, path, themed, cached)
+            status = "exported"
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        account_io(cached.stat().st_size)
+        copyfile(cached, output_path)
+        return FileResult(
+            path, status, theme, str(css_path), output=str(output_path)
+        )
+    except subprocess.CalledProcessError as e:
+        stderr = (e.stderr or "").strip().splitlines()
+        error = stderr[-1] if stderr else f"marimo exited with {e.returncode}"
+        return FileResult(path, "error", error=error)
+    except OSError as e:
+        return FileResult(path, "error", error=str(e))
+
+
+def export_files(
+    paths: Iterable[str],
+    css_path: str | Path,
+    output_dir: str | Path,
+    *,
+    jobs: int | None = None,
+) -> Iterator[FileResult]:
+    """
+    Export notebooks to HTML with a theme, yielding a result per file.
+
+    Exports run in parallel and are cached by the notebook's path and
+    the content hashes of the notebook and the theme, so unchanged pairs
+    are not exported again. Notebook sources are never modified.
+
+    Args:
+        paths: Notebook file paths
+        css_path: Theme CSS file to inject
+        output_dir: Directory to write ``<notebook>.html`` files to,
+            mirroring the notebooks' paths relative to the current
+            directory
+        jobs: Maximum number of concurrent exports
+
+    Raises:
+        FileNotFoundError: If the marimo command is not available.
+
+    """
+    marimo = find_marimo()
+    css_path = Path(css_path).absolute()
+    theme_digest = hash_file(css_path)
+    output_dir = Path(output_dir)
+    # Notebooks that differ only in suffix, e.g. nb.py and nb.md, would
+    # overwrite each other's export, so only the first one is exported
+    paths = list(paths)
+    owners: dict[Path, str] = {}
+    for path in paths:
+        owners.setdefault(output_dir / output_name(path), path)
+
+    def export(path: str) -> FileResult:
+        output_path = output_dir / output_name(path)
+        owner = owners[output_path]
+        if owner != path:
+            error = f"{output_path} is already the export of {owner}"
+            return FileResult(path, "error", error=error)
+        return export_file(marimo, path, css_path, theme_digest, output_path)
+
+    workers = None if jobs is None else max(jobs, 1)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(export, paths)
+
+
+def export_theme(
+    theme_name: str,
+    files: list[str],
+    *,
+    output_dir: str = "exports",
+    jobs: int | None = None,
+    report: Report | None = None,
+) -> None:
+    """
+    Export notebook files to HTML with a Marimo theme applied.
+
+    Args:
+        theme_name: Name of the theme to export with
+        files: List of Marimo notebook files to export
+        output_dir: Directory to write the HTML files to, in a
+            subdirectory per theme
+        jobs: Maximum number of concurrent exports
+        report: Optional report to record each file's outcome in
+
+    """
+    try:
+        css_path = validate_theme_exists(theme_name, get_themes_dir())
+    except FileNotFoundError:
+        return
+
+    exported = 0
+    try:
+        for result in export_files(
+            files, css_path, Path(output_dir) / theme_name, jobs=jobs
+        ):
+            if result.status in ("exported", "cached"):
+                exported += 1
+                cached = " (cached)" if result.status == "cached" else ""
+                print(f"Exported {result.path} to {result.output}{cached}")
+            elif result.status == "error":
+                print(f"Error exporting {result.path}: {result.error}")
+            else:
+                print(f"No marimo.App found in {result.path}")
+            if report:
+                report.add(result.path, result.status, result.theme)
+    except FileNotFoundError as e:
+        print(f"Error: {e}")
+        return
+
+    if exported:
+        print(
+            f"\nExported {exported} file(s) with the {theme_name} theme "
+            f"to {Path(output_dir) / theme_name}."
+        )
+    else:
+        print("No files were exported.")
@@ -0,0 +1,235 @@
+"""Apply themes across many repositories listed in a manifest."""
+
+from __future__ import annotations
+
+import subprocess
+import sys
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from .api import FileResult, apply_files
+from .io_limits import locality_order
+from .notebook_formats import classify_notebook, notebook_suffixes
+from .util import get_theme_index
+
+if TYPE_CHECKING:
+    from .report import Report
+
+if sys.version_info >= (3, 11):
+    import tomllib
+else:
+    import tomli as tomllib
+
+DEFAULT_JOBS = 4
+
+
+@dataclass(frozen=True)
+class FleetRepo:
+    """A repository checkout and the theme its notebooks should use."""
+
+    path: Path
+    theme: str
+    roots: tuple[str, ...] = (".",)
+
+
+@dataclass
+class RepoResult:
+    """Outcome of theming one repository."""
+
+    repo: FleetRepo
+    results: list[FileResult] = field(default_factory=list)
+    error: str | None = None
+
+    @property
+    def counts(self) -> Counter[str]:
+        """Count the files of each status."""
+        return Counter(result.status for result in self.results)
+
+    @property
+    def ok(self) -> bool:
+        """Check that the repository and all its notebooks succeeded."""
+        return self.error is None and not self.counts["error"]
+
+
+def load_manifest(manifest_path: Path) -> list[FleetRepo]:
+    """
+    Load the repositories of a fleet manifest.
+
+    The manifest is a TOML file with a ``[[repo]]`` table per checkout,
+    giving its ``path``, ``theme`` and optionally the ``roots`` to search
+    for notebooks. A top-level ``theme`` is the default for all repos.
+    Relative paths are relative to the manifest.
+
+    Raises:
+        ValueError: If the manifest cannot be read or is invalid.
+
+    """
+    try:
+        with manifest_path.open("rb") as f:
+            data = tomllib.load(f)
+    except (OSError, tomllib.TOMLDecodeError) as e:
+        msg = f"Could not read manifest {manifest_path}: {e}"
+        raise ValueError(msg) from e
+
+    repos = []
+    for i, entry in enumerate(data.get("repo", []), 1):
+        theme = entry.get("theme", data.get("theme"))
+        if "path" not in entry or not theme:
+            msg = f"Repository {i} in {manifest_path} needs a path and theme"
+            raise ValueError(msg)
+        path = Path(entry["path"]).expanduser()
+        repos.append(
+            FleetRepo(
+                path=manifest_path.parent / path,
+                theme=theme,
+                roots=tuple(entry.get("roots", ["."])),
+            )
+        )
+    if not repos:
+        msg = f"Manifest {manifest_path} lists no [[repo]]"
+        raise ValueError(msg)
+    return repos
+
+
+def list_repo_notebooks(repo: FleetRepo) -> list[str]:
+    """
+    List the notebooks under a repository's roots with one git call.
+
+    Tracked and untracked files that are not ignored are listed by a
+    single ``git ls-files``, and only files with a notebook suffix are
+    classified.
+
+    Raises:
+        OSError: If git cannot be run.
+        subprocess.CalledProcessError: If the path is not a git checkout.
+
+    """
+    output = subprocess.run(  # noqa: S603
+        [  # noqa: S607
+            "git",
+            "ls-files",
+            "-z",
+            "--cached",
+            "--others",
+            "--exclude-standard",
+            "--",
+            *repo.roots,
+        ],
+        cwd=repo.path,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    suffixes = tuple(notebook_suffixes())
+    candidates = dict.fromkeys(
+        p for p in output.split("\0") if p.lower().endswith(suffixes)
+    )
+    # Classify files directory by directory, in on-disk order
+    return [
+        path
+        for path in locality_order(str(repo.path / p) for p in candidates)
+        if classify_notebook(path)
+    ]
+
+
+def process_repo(
+    repo: FleetRepo, css_path: Path | None, *, dry_run: bool = False
+) -> RepoResult:
+    """Apply a repository's theme to its notebooks, capturing failures."""
+    if css_path is None:
+        return RepoResult(repo, error=f"Theme {repo.theme} does not exist")
+    try:
+        notebooks = list_repo_notebooks(repo)
+        results = list(apply_files(notebooks, css_path, write=not dry_run))
+    except subprocess.CalledProcessError as e:
+        error = (e.stderr or "").strip().splitlines()
+        return RepoResult(repo, error=error[-1] if error else str(e))
+    except OSError as e:
+        return RepoResult(repo, error=str(e))
+    return RepoResult(repo, results)
+
+
+def _print_repo(result: RepoResult) -> None:
+    """Print the summary of one repository."""
+    if result.error is not None:
+        print(f"{result.repo.path}: error: {result.error}")
+        return
+    counts = ", ".join(
+        f"{count} {status}" for status, count in sorted(result.counts.items())
+    )
+    print(
+        f"{result.repo.path} ({result.repo.theme}): {counts or 'no notebooks'}"
+    )
+    for file_result in result.results:
+        if file_result.status == "error":
+            print(
+                f"  Error processing {file_result.path}: {file_result.error}"
+            )
+
+
+def run_fleet(
+    manifest: str,
+    *,
+    jobs: int = DEFAULT_JOBS,
+    dry_run: bool = False,
+    report: Report | None = None,
+) -> bool:
+    """
+    Apply themes to the notebooks of every repository in a manifest.
+
+    Repositories are processed concurrently by a bounded pool, and a
+    failing repository is reported without stopping the others.
+
+    Args:
+        manifest: TOML manifest of repositories
+        jobs: Maximum number of repositories processed at once
+        dry_run: Only report which notebooks would be themed
+        report: Optional report to record each file's outcome in
+
+    Returns:
+        bool: True if every repository succeeded
+
+    """
+    try:
+        repos = load_manifest(Path(manifest))
+    except ValueError as e:
+        print(f"Error: {e}")
+        return False
+
+    index = get_theme_index()
+    css_paths = {
+        repo.theme: index[repo.theme].path if repo.theme in index else None
+        for repo in repos
+    }
+    results = []
+    with ThreadPoolExecutor(max_workers=max(jobs, 1)) as pool:
+        # Results are printed in manifest order as repositories finish
+        for result in pool.map(
+            lambda repo: process_repo(
+                repo, css_paths[repo.theme], dry_run=dry_run
+            ),
+            repos,
+        ):
+            _print_repo(result)
+            results.append(result)
+
+    if report:
+        for result in results:
+            if result.error is not None:
+                report.add(str(result.repo.path), "error", result.repo.theme)
+            for file_result in result.results:
+                report.add(
+                    file_result.path, file_result.status, file_result.theme
+                )
+
+    failed = [result for result in results if not result.ok]
+    notebooks = sum(len(result.results) for result in results)
+    verb = "Would theme" if dry_run else "Themed"
+    print(
+        f"\n{verb} {notebooks} notebook(s) in {len(results)} repositories; "
+        f"{len(failed)} repositories had errors."
+    )
+    return not failed
@@ -0,0 +1,367 @@
+"""Vendor a theme's web fonts into the theme as subset @font-face rules."""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import re
+from importlib.util import find_spec
+from io import BytesIO
+from pathlib import Path
+from urllib.parse import parse_qs, urlencode, urlparse
+
+import appdirs
+import requests
+
+from .html_head import (
+    GOOGLE_FONTS_CSS_HOST,
+    import_families,
+    parse_font_families,
+)
+from .util import (
+    atomic_write,
+    get_themes_dir,
+    invalidate_theme_index,
+    is_valid_theme_name,
+    themes_lock,
+    validate_theme_exists,
+)
+
+TIMEOUT = 10
+DEFAULT_SUBSETS = ("latin",)
+# Regular and bold text, plus any weights the theme sets itself
+DEFAULT_WEIGHTS = frozenset({400, 700})
+# Google Fonts serves woff2 with per-script unicode-range subsets to
+# browsers it recognizes, and a single large TTF to anything else
+FONT_USER_AGENT = (
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+)
+
+_IMPORT_STATEMENT = re.compile(
+    r"""@import\s+(?:url\(\s*)?["']?([^"')\s;]+)["']?\s*\)?[^;]*;"""
+)
+_FONT_WEIGHT = re.compile(r"font-weight\s*:\s*(\d{3}|bold|normal)")
+_FACE = re.compile(r"/\*\s*([^*]+?)\s*\*/\s*(@font-face\s*\{[^}]*\})")
+_FACE_URL = re.compile(r"url\((https://[^)]+)\)\s*format\(['\"]?(\w+)")
+_UNICODE_RANGE = re.compile(r"unicode-range\s*:\s*([^;}]+)")
+_FACE_WEIGHT = re.compile(r"font-weight\s*:\s*(\d+)")
+_FACE_STYLE = re.compile(r"font-style\s*:\s*(\w+)")
+
+
+def get_font_cache_dir() -> Path:
+    """Get the directory caching downloaded font stylesheets and files."""
+    cache_dir = Path(appdirs.user_cache_dir("mtheme", "marimo")) / "fonts"
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir
+
+
+def fetch_cached(url: str) -> bytes:
+    """
+    Download a URL once, serving later requests from the font cache.
+
+    Google Fonts stylesheet and font URLs are versioned, so cached
+    responses do not go stale.
+
+    Raises:
+        requests.RequestException: If the download fails.
+
+    """
+    cached = get_font_cache_dir() / hashlib.sha256(url.encode()).hexdigest()
+    if cached.exists():
+        return cached.read_bytes()
+    response = requests.get(
+        url, headers={"User-Agent": FONT_USER_AGENT}, timeout=TIMEOUT
+    )
+    response.raise_for_status()
+    atomic_write(cached, response.content)
+    return response.content
+
+
+def parse_font_weights(css: str) -> set[int]:
+    """Get the font weights a theme uses, including regular and bold."""
+    named = {"normal": 400, "bold": 700}
+    weights = set(DEFAULT_WEIGHTS)
+    for match in _FONT_WEIGHT.finditer(css):
+        value = match.group(1)
+        weights.add(named.get(value) or int(value))
+    return weights
+
+
+def _axis_key(value: str) -> tuple[float, ...]:
+    return tuple(float(v) for v in value.split(","))
+
+
+def _used_tuples(value: str, weight_axis: int, weights: set[int]) -> set[str]:
+    """Expand one axis tuple of a family spec to the weights in use."""
+    parts = value.split(",")
+    low, _, high = parts[weight_axis].partition("..")
+    available = range(int(low), int(high or low) + 1)
+    used = set()
+    for weight in weights & set(available):
+        parts[weight_axis] = str(weight)
+        used.add(",".join(parts))
+    return used
+
+
+def _family_spec(spec: str, weights: set[int]) -> str:
+    """
+    Narrow a Google Fonts family spec to the weights in use.
+
+    Handles weight lists and ranges (``wght@400;600..900``) and tuples
+    of several axes (``ital,wght@0,400;1,700``), keeping the other axis
+    values of each tuple as requested.
+
+    Raises:
+        ValueError: If the spec cannot be parsed.
+
+    """
+    name, _, axes = spec.partition(":")
+    if not axes:
+        return name
+    axis_names, _, values = axes.partition("@")
+    tags = axis_names.split(",")
+    if "wght" not in tags:
+        # Italic and other axes are kept as requested
+        return spec
+    weight_axis = tags.index("wght")
+    tuples = values.split(";")
+    msg = f"Invalid font family spec {spec!r}"
+    if any(len(value.split(",")) != len(tags) for value in tuples):
+        raise ValueError(msg)
+    try:
+        used = set().union(
+            *(_used_tuples(value, weight_axis, weights) for value in tuples)
+        )
+        ordered = sorted(used, key=_axis_key)
+    except ValueError:
+        raise ValueError(msg) from None
+    return f"{name}:{axis_names}@{';'.join(ordered)}" if ordered else name
+
+
+def subset_url(url: str, families: set[str], weights: set[int]) -> str | None:
+    """
+    Rewrite a Google Fonts stylesheet URL to the families and weights used.
+
+    Returns None if the stylesheet provides none of the families.
+    """
+    parsed = urlparse(url)
+    query = parse_qs(parsed.query)
+    specs = [
+        _family_spec(spec, weights)
+        for spec in query.get("family", [])
+        if spec.split(":")[0] in families
+    ]
+    if not specs:
+        return None
+    query["family"] = specs
+    return parsed._replace(
+        query=urlencode(query, doseq=True, safe=":@;.,")
+    ).geturl()
+
+
+def _parse_unicode_range(value: str) -> list[tuple[int, int]]:
+    """Parse a CSS unicode-range into inclusive codepoint ranges."""
+    ranges = []
+    for part in value.split(","):
+        part = part.strip().upper().removeprefix("U+")  # noqa: PLW2901
+        low, _, high = part.partition("-")
+        if "?" in low:
+            low, high = low.replace("?", "0"), low.replace("?", "F")
+        ranges.append((int(low, 16), int(high or low, 16)))
+    return ranges
+
+
+def _covers(face: str, codepoints: set[int]) -> bool:
+    """Check whether an @font-face covers any of the codepoints."""
+    match = _UNICODE_RANGE.search(face)
+    if match is None:
+        return True
+    ranges = _parse_unicode_range(match.group(1))
+    return any(low <= c <= high for c in codepoints for low, high in ranges)
+
+
+def subset_font(data: bytes, text: str) -> bytes:
+    """
+    Drop the glyphs of a font that are not needed for some text.
+
+    Raises:
+        ImportError: If fontTools is not installed.
+
+    """
+    from fontTools import subset  # noqa: PLC0415
+    from fontTools.ttLib import TTFont  # noqa: PLC0415
+
+    font = TTFont(BytesIO(data))
+    options = subset.Options()
+    options.flavor = font.flavor
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(text=text)
+    subsetter.subset(font)
+    output = BytesIO()
+    font.save(output)
+    return output.getvalue()
+
+
+def _merge_weights(faces: list[str]) -> str:
+    """Merge faces sharing one font file into a face for their weights."""
+    weights = [int(w) for f in faces for w in _FACE_WEIGHT.findall(f)]
+    if len(faces) == 1 or not weights:
+        return faces[0]
+    low, high = min(weights), max(weights)
+    value = str(low) if low == high else f"{low} {high}"
+    return _FACE_WEIGHT.sub(f"font-weight: {value}", faces[0], count=1)
+
+
+def vendor_faces(
+    css_url: str, subsets: tuple[str, ...], text: str | None = None
+) -> list[str]:
+    """
+    Download a stylesheet's fonts and inline them as data URIs.
+
+    Google Fonts serves a variable font as one file per script, listed
+    once per requested weight, so faces sharing a font file and style
+    are merged into one face covering their weight range, and each file
+    is embedded once.
+
+    Args:
+        css_url: Google Fonts stylesheet URL
+        subsets: Scripts to keep, e.g. ``latin`` or ``latin-ext``
+        text: If given, keep the faces covering these characters instead
+            of ``subsets``, and subset each font to them when fontTools
+            is installed
+
+    Returns:
+        The ``@font-face`` rules with their fonts embedded
+
+    Raises:
+        requests.RequestException: If a download fails.
+
+    """
+    stylesheet = fetch_cached(css_url).decode("utf-8")
+    codepoints = {ord(c) for c in text} if text else None
+    shared: dict[tuple[str, str, str], list[str]] = {}
+    for subset_name, face in _FACE.findall(stylesheet):
+        if codepoints is None and subset_name not in subsets:
+            continue
+        if codepoints is not None and not _covers(face, codepoints):
+            continue
+        url_match = _FACE_URL.search(face)
+        if url_match is None:
+            continue
+        style_match = _FACE_STYLE.search(face)
+        style = style_match.group(1) if style_match else "normal"
+        shared.setdefault((*url_match.groups(), style), []).append(face)
+
+    faces = []
+    for (font_url, font_format, _), group in shared.items():
+        face = _merge_weights(group)
+        data = fetch_cached(font_url)
+        if text and find_spec("fontTools"):
+            data = subset_font(data, text)
+        encoded = base64.b64encode(data).decode("ascii")
+        faces.append(
+            face.replace(
+                f"url({font_url})",
+                f"url(data:font/{font_format};base64,{encoded})",
+            )
+        )
+    return faces
+
+
+def vendor_css(
+    css: str,
+    subsets: tuple[str, ...] = DEFAULT_SUBSETS,
+    text: str | None = None,
+) -> tuple[str, int]:
+    """
+    Replace a theme's Google Fonts imports with embedded @font-face rules.
+
+    Only the families the theme's font variables use are kept, at the
+    weights it uses. Other imports are left as they are.
+
+    Returns:
+        The vendored CSS and the number of imports replaced
+
+    Raises:
+        requests.RequestException: If a download fails.
+        ValueError: If a Google Fonts family spec cannot be parsed.
+
+    """
+    families = parse_font_families(css)
+    weights = parse_font_weights(css)
+    replaced = 0
+
+    def vendor_import(match: re.Match[str]) -> str:
+        nonlocal replaced
+        url = match.group(1)
+        if import_families(url) is None:
+            return match.group(0)
+        replaced += 1
+        narrowed = subset_url(url, families, weights)
+        faces = vendor_faces(narrowed, subsets, text) if narrowed else []
+        return "\n".join([f"/* Vendored from {url} */", *faces])
+
+    return _IMPORT_STATEMENT.sub(vendor_import, css), replaced
+
+
+def vendor_theme_fonts(
+    theme_name: str,
+    *,
+    subsets: tuple[str, ...] = DEFAULT_SUBSETS,
+    text: str | None = None,
+    output_name: str | None = None,
+) -> Path | None:
+    """
+    Embed a theme's web fonts so notebooks load them without Google Fonts.
+
+    Fonts are downloaded once into the cache, narrowed to the families,
+    weights and scripts the theme uses, and inlined into the theme as
+    ``@font-face`` data URIs. The result is written to the user themes
+    directory, shadowing the original theme unless ``output_name`` is
+    given.
+
+    Args:
+        theme_name: Name of the theme to vendor
+        subsets: Scripts to keep, e.g. ``latin`` or ``latin-ext``
+        text: Keep only the fonts, and with fontTools only the glyphs,
+            needed for these characters
+        output_name: Name to save the vendored theme as
+
+    Returns:
+        The vendored theme file, or None on error
+
+    """
+    if output_name is not None and not is_valid_theme_name(output_name):
+        print(f"Error: Invalid theme name {output_name!r}.")
+        return None
+    try:
+        css_path = validate_theme_exists(theme_name, get_themes_dir())
+    except FileNotFoundError:
+        return None
+
+    css = css_path.read_text(encoding="utf-8")
+    if f"{GOOGLE_FONTS_CSS_HOST}/" not in css:
+        print(f"Theme {theme_name} does not import any Google Fonts.")
+        return None
+    try:
+        vendored, replaced = vendor_css(css, subsets, text)
+    except requests.RequestException as e:
+        print(f"Error: Could not download fonts: {e}")
+        return None
+    except ValueError as e:
+        print(f"Error: Could not vendor the fonts of {theme_name}: {e}")
+        return None
+    if text and not find_spec("fontTools"):
+        print("Note: Install fontTools to also subset the font glyphs.")
+
+    output_path = get_themes_dir() / f"{output_name or theme_name}.css"
+    with themes_lock():
+        atomic_write(output_path, vendored)
+    invalidate_theme_index()
+    size = len(vendored.encode("utf-8")) // 1024
+    print(
+        f"Vendored the fonts of {replaced} import(s) into {output_path} "
+        f"({size} KB)."
+    )
+    return output_path
@@ -0,0 +1,457 @@
+"""Generate theme families from a palette specification."""
+
+from __future__ import annotations
+
+import colorsys
+import hashlib
+import json
+import re
+import sys
+from pathlib import Path
+from typing import TYPE_CHECKING, Union
+
+from .util import (
+    atomic_write,
+    get_themes_dir,
+    is_valid_theme_name,
+    staged_themes,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+if sys.version_info >= (3, 11):
+    import tomllib
+else:
+    import tomli as tomllib
+
+GENERATOR_VERSION = 1
+HEADER = "/* Generated by motheme from {spec}; spec sha256 {digest} */\n"
+MIN_CONTRAST = 4.5
+MODES = ("light", "dark")
+FONT_KEYS = ("monospace_font", "text_font", "heading_font", "radius")
+
+RGBA = tuple[float, float, float, float]
+Expr = Union[str, float, tuple]
+
+_MID_LUMINANCE = 0.18
+_SRGB_LINEAR_MAX = 0.04045
+_NUMBER = re.compile(r"-?\d+(?:\.\d+)?")
+_TOKEN = re.compile(r"\s*(#[0-9a-fA-F]+|-?\d+(?:\.\d+)?|[\w-]+|[(),])")
+_HSL = re.compile(
+    r"hsla?\(\s*(-?[\d.]+)(?:deg)?[\s,]+([\d.]+)%[\s,]+([\d.]+)%"
+    r"(?:\s*[/,]\s*([\d.]+)(%?))?\s*\)"
+)
+
+
+def parse_color(text: str) -> RGBA:
+    """
+    Parse a ``#rgb``, ``#rrggbb``, ``#rrggbbaa`` or ``hsl()`` color.
+
+    Raises:
+        ValueError: If the color cannot be parsed.
+
+    """
+    text = text.strip()
+    digits = text[1:]
+    if text.startswith("#") and len(digits) in (3, 4):
+        digits = "".join(c * 2 for c in digits)
+    if text.startswith("#") and len(digits) in (6, 8):
+        try:
+            r, g, b, a = (c / 255 for c in bytes.fromhex(digits.ljust(8, "f")))
+        except ValueError:
+            pass
+        else:
+            return r, g, b, a
+    elif match := _HSL.fullmatch(text):
+        h, s, lightness, alpha, percent = match.groups()
+        r, g, b = colorsys.hls_to_rgb(
+            float(h) % 360 / 360, float(lightness) / 100, float(s) / 100
+        )
+        a = 1.0 if alpha is None else float(alpha) / (100 if percent else 1)
+        return r, g, b, a
+    msg = f"Invalid color {text!r}"
+    raise ValueError(msg)
+
+
+def format_color(color: RGBA) -> str:
+    """Format a color as ``#rrggbb``, or ``#rrggbbaa`` if translucent."""
+    channels = [round(min(max(c, 0.0), 1.0) * 255) for c in color]
+    if color[3] >= 1:
+        channels.pop()
+    return "#" + "".join(f"{c:02x}" for c in channels)
+
+
+def relative_luminance(color: RGBA) -> float:
+    """Get the WCAG relative luminance of a color."""
+    linear = [
+        c / 12.92 if c <= _SRGB_LINEAR_MAX else ((c + 0.055) / 1.055) ** 2.4
+        for c in color[:3]
+    ]
+    return 0.2126 * linear[0] + 0.7152 * linear[1] + 0.0722 * linear[2]
+
+
+def contrast_ratio(a: RGBA, b: RGBA) -> float:
+    """Get the WCAG contrast ratio between two colors."""
+    la, lb = sorted((relative_luminance(a), relative_luminance(b)))
+    return (lb + 0.05) / (la + 0.05)
+
+
+def _shift_lightness(color: RGBA, amount: float) -> RGBA:
+    """Move a color's HSL lightness by ``amount`` percentage points."""
+    h, lightness, s = colorsys.rgb_to_hls(*color[:3])
+    lightness = min(max(lightness + amount / 100, 0.0), 1.0)
+    return (*colorsys.hls_to_rgb(h, lightness, s), color[3])
+
+
+def _mix(a: RGBA, b: RGBA, weight: float) -> RGBA:
+    """Mix ``weight`` percent of ``b`` into ``a``."""
+    t = weight / 100
+    r, g, bl, al = (x + (y - x) * t for x, y in zip(a, b))
+    return r, g, bl, al
+
+
+def _contrasting(background: RGBA, candidates: list[RGBA]) -> RGBA:
+    """
+    Pick the candidate that contrasts most with a background.
+
+    If even the best candidate is below the WCAG AA ratio, its lightness
+    is pushed away from the background until the ratio is met.
+    """
+    best = max(candidates, key=lambda c: contrast_ratio(background, c))
+    step = -2 if relative_luminance(background) > _MID_LUMINANCE else 2
+    for _ in range(50):
+        if contrast_ratio(background, best) >= MIN_CONTRAST:
+            break
+        best = _shift_lightness(best, step)
+    return best
+
+
+# Functions taking colors then one number: (number of colors, function)
+_FUNCTIONS = {
+    "lighten": (1, lambda c, n: _shift_lightness(c[0], n)),
+    "darken": (1, lambda c, n: _shift_lightness(c[0], -n)),
+    "mix": (2, lambda c, n: _mix(c[0], c[1], n)),
+    "alpha": (1, lambda c, n: (*c[0][:3], n / 100)),
+}
+
+
+def _parse_tokens(tokens: list[str], position: int) -> tuple[Expr, int]:
+    """Parse the expression starting at a token, and where it ends."""
+    token = tokens[position]
+    position += 1
+    if _NUMBER.fullmatch(token):
+        return float(token), position
+    if position == len(tokens) or tokens[position] != "(":
+        return token, position
+
+    args = []
+    position += 1
+    while tokens[position] != ")":
+        arg, position = _parse_tokens(tokens, position)
+        args.append(arg)
+        if tokens[position] == ",":
+            position += 1
+    return (token, *args), position + 1
+
+
+def parse_expression(text: str) -> Expr:
+    """
+    Parse a role expression into a tree.
+
+    Expressions are palette color names, role names, color literals and
+    calls such as ``lighten(mauve, 10)``, ``darken(base, 5)``,
+    ``mix(base, text, 20)``, ``alpha(surface1, 40)`` and
+    ``contrast(primary)`` or ``contrast(primary, text, crust)``.
+
+    Raises:
+        ValueError: If the expression is malformed.
+
+    """
+    if text.lstrip().startswith("hsl"):
+        return text.strip()
+    tokens = _TOKEN.findall(text)
+    if not tokens or "".join(tokens) != re.sub(r"\s+", "", text):
+        msg = f"Invalid expression {text!r}"
+        raise ValueError(msg)
+    try:
+        expr, position = _parse_tokens(tokens, 0)
+    except IndexError as e:
+        msg = f"Unbalanced parentheses in {text!r}"
+        raise ValueError(msg) from e
+    if position != len(tokens):
+        msg = f"Unexpected {tokens[position]!r} in {text!r}"
+        raise ValueError(msg)
+    return expr
+
+
+class _Evaluator:
+    """
+    Evaluate the roles of many themes in one batched pass.
+
+    Palettes and expressions are parsed once, and each distinct pair of
+    palette and role rules is resolved once no matter how many themes
+    and modes share it, so a family of variants costs little more than a
+    single theme.
+    """
+
+    def __init__(self, palettes: dict[str, dict[str, str]]) -> None:
+        self.palettes = {
+            name: {key: parse_color(value) for key, value in colors.items()}
+            for name, colors in palettes.items()
+        }
+        self.expressions: dict[str, Expr] = {}
+        self.resolved: dict[tuple, dict[str, RGBA]] = {}
+
+    def resolve(self, palette: str, roles: dict[str, str]) -> dict[str, RGBA]:
+        """Get the color of every role for a palette."""
+        key = (palette, tuple(roles.items()))
+        if key not in self.resolved:
+            colors: dict[str, RGBA] = {}
+            for role in roles:
+                self._role(palette, roles, role, colors, ())
+            self.resolved[key] = colors
+        return self.resolved[key]
+
+    def _role(
+        self,
+        palette: str,
+        roles: dict[str, str],
+        role: str,
+        colors: dict[str, RGBA],
+        seen: tuple[str, ...],
+    ) -> RGBA:
+        if role not in colors:
+            if role in seen:
+                msg = f"Role {role} refers to itself"
+                raise ValueError(msg)
+            rule = roles[role]
+            if rule not in self.expressions:
+                self.expressions[rule] = parse_expression(rule)
+            colors[role] = self._eval(
+                palette, roles, self.expressions[rule], colors, (*seen, role)
+            )
+        return colors[role]
+
+    def _eval(
+        self,
+        palette: str,
+        roles: dict[str, str],
+        expr: Expr,
+        colors: dict[str, RGBA],
+        seen: tuple[str, ...],
+    ) -> RGBA:
+        palette_colors = self.palettes[palette]
+        if isinstance(expr, tuple):
+            name, *args = expr
+            numbers = [a for a in args if isinstance(a, float)]
+            values = [
+                self._eval(palette, roles, a, colors, seen)
+                for a in args
+                if not isinstance(a, float)
+            ]
+            if name == "contrast" and values and not numbers:
+                return _contrasting(
+                    values[0],
+                    values[1:]
+                    or [
+                        min(palette_colors.values(), key=relative_luminance),
+                        max(palette_colors.values(), key=relative_luminance),
+                    ],
+                )
+            arity, function = _FUNCTIONS.get(name, (None, None))
+            if len(values) == arity and len(numbers) == 1:
+                return function(values, numbers[0])
+            msg = f"Invalid call {name}({', '.join(map(str, args))})"
+        elif isinstance(expr, str) and expr in palette_colors:
+            return palette_colors[expr]
+        elif isinstance(expr, str) and expr in roles:
+            return self._role(palette, roles, expr, colors, seen)
+        elif isinstance(expr, str):
+            return parse_color(expr)
+        else:
+            msg = f"Expected a color, got {expr}"
+        raise ValueError(msg)
+
+
+def load_spec(spec_path: Path) -> dict:
+    """
+    Load and validate a palette specification.
+
+    Raises:
+        ValueError: If the file is invalid, names a theme that cannot be
+            a file name, or refers to unknown palettes.
+
+    """
+    try:
+        with spec_path.open("rb") as f:
+            spec = tomllib.load(f)
+    except (OSError, tomllib.TOMLDecodeError) as e:
+        msg = f"Could not read palette spec {spec_path}: {e}"
+        raise ValueError(msg) from e
+
+    palettes = spec.get("palettes", {})
+    if not spec.get("themes"):
+        msg = f"Palette spec {spec_path} defines no [themes]"
+        raise ValueError(msg)
+    invalid = [
+        name for name in spec["themes"] if not is_valid_theme_name(name)
+    ]
+    if invalid:
+        msg = (
+            f"Palette spec {spec_path} has invalid theme name(s): "
+            f"{', '.join(map(repr, invalid))}"
+        )
+        raise ValueError(msg)
+    for name, theme in spec["themes"].items():
+        for mode in MODES:
+            if theme.get(mode) not in palettes:
+                msg = (
+                    f"Theme {name} uses unknown {mode} palette "
+                    f"{theme.get(mode)!r}"
+                )
+                raise ValueError(msg)
+    return spec
+
+
+def _mode_roles(roles: dict, mode: str) -> dict[str, str]:
+    """Select the expression of each role for one mode."""
+    return {
+        role: rule[mode] if isinstance(rule, dict) else rule
+        for role, rule in roles.items()
+    }
+
+
+def theme_digest(spec: dict, theme_name: str) -> str:
+    """
+    Hash everything that determines one generated theme.
+
+    Only the parts of the spec a theme depends on are hashed, so tweaking
+    one palette only changes the digests of the themes that use it.
+    """
+    theme = spec["themes"][theme_name]
+    family = spec.get("family", {})
+    relevant = {
+        "version": GENERATOR_VERSION,
+        "family": family,
+        "roles": {**spec.get("roles", {}), **theme.get("roles", {})},
+        "palettes": {mode: spec["palettes"][theme[mode]] for mode in MODES},
+    }
+    return hashlib.sha256(
+        json.dumps(relevant, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+
+
+def _format_family(family: dict) -> list[str]:
+    """Format the font import and font/radius variables."""
+    lines = []
+    if "fonts_import" in family:
+        lines.extend([f'@import url("{family["fonts_import"]}");', ""])
+    variables = [
+        f"    --{key.replace('_', '-')}: {family[key]};"
+        for key in FONT_KEYS
+        if key in family
+    ]
+    if variables:
+        lines.extend([":root {", *variables, "}", ""])
+    return lines
+
+
+def render_family(
+    spec: dict, spec_name: str, names: Iterable[str] | None = None
+) -> dict[str, str]:
+    """
+    Render the CSS of the themes of a palette spec.
+
+    Args:
+        spec: Palette spec, as returned by ``load_spec``
+        spec_name: Spec file name to mention in the header
+        names: Themes to render, all of them by default
+
+    Returns:
+        Mapping of theme name to CSS
+
+    """
+    evaluator = _Evaluator(spec.get("palettes", {}))
+    family_lines = _format_family(spec.get("family", {}))
+    rendered = {}
+    for name in spec["themes"] if names is None else names:
+        theme = spec["themes"][name]
+        roles = {**spec.get("roles", {}), **theme.get("roles", {})}
+        light, dark = (
+            evaluator.resolve(theme[mode], _mode_roles(roles, mode))
+            for mode in MODES
+        )
+        lines = [":root {"]
+        for role in roles:
+            pair = format_color(light[role]), format_color(dark[role])
+            value = pair[0] if pair[0] == pair[1] else "light-dark({}, {})"
+            lines.append(f"    --{role}: {value.format(*pair)};")
+        lines.append("}")
+
+        header = HEADER.format(spec=spec_name, digest=theme_digest(spec, name))
+        rendered[name] = header + "\n".join(family_lines + lines)
+    return rendered
+
+
+def _is_current(css_path: Path, digest: str) -> bool:
+    """Check whether a generated theme was made from the same spec."""
+    try:
+        with css_path.open(encoding="utf-8") as f:
+            first_line = f.readline()
+    except OSError:
+        return False
+    return first_line.rstrip().endswith(f"spec sha256 {digest} */")
+
+
+def generate_themes(
+    spec_file: str, *, output_dir: str | None = None, force: bool = False
+) -> list[Path] | None:
+    """
+    Generate a theme family from a palette spec.
+
+    Themes whose spec digest matches the existing file are skipped, so
+    regenerating after a palette tweak only rewrites the themes using it.
+
+    Args:
+        spec_file: TOML palette specification
+        output_dir: Directory to write ``<theme>.css`` files to instead of
+            the user themes directory
+        force: Rewrite themes even if they are up to date
+
+    Returns:
+        The theme files that were written, or None on error
+
+    """
+    spec_path = Path(spec_file)
+    target_dir = Path(output_dir) if output_dir else get_themes_dir()
+    try:
+        spec = load_spec(spec_path)
+        stale = [
+            name
+            for name in spec["themes"]
+            if force
+            or not _is_current(
+                target_dir / f"{name}.css", theme_digest(spec, name)
+            )
+        ]
+        rendered = render_family(spec, spec_path.name, stale)
+    except (ValueError, KeyError) as e:
+        print(f"Error: {e}")
+        return None
+
+    target_dir.mkdir(parents=True, exist_ok=True)
+    if output_dir:
+        for name, css in rendered.items():
+            atomic_write(target_dir / f"{name}.css", css + "\n")
+    elif rendered:
+        with staged_themes(target_dir) as staging_dir:
+            for name, css in rendered.items():
+                (staging_dir / f"{name}.css").write_text(
+                    css + "\n", encoding="utf-8"
+                )
+
+    for name in spec["themes"]:
+        state = "Generated" if name in rendered else "Up to date"
+        print(f"{state}: {target_dir / f'{name}.css'}")
+    return [target_dir / f"{name}.css" for name in rendered]
@@ -0,0 +1,337 @@
+"""Audit the themes of notebooks across git history without checkouts."""
+
+from __future__ import annotations
+
+import json
+import subprocess
+from contextlib import closing
+from dataclasses import dataclass
+from pathlib import Path, PurePosixPath
+from typing import TYPE_CHECKING
+
+import appdirs
+
+from .notebook_formats import classify_content, notebook_suffixes
+from .util import atomic_write, theme_name_for
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+HISTORY_CACHE_FILE = "history-cache.json"
+TREE_MODE = b"40000"
+
+
+@dataclass(frozen=True)
+class Revision:
+    """A commit in the audited history."""
+
+    sha: str
+    date: str
+    refs: str = ""
+
+    @property
+    def is_tagged(self) -> bool:
+        """Check whether a tag points at the commit."""
+        return "tag: " in self.refs
+
+
+class CatFile:
+    """
+    Read git objects through a single ``git cat-file --batch`` process.
+
+    Objects are requested and read one at a time over the process's
+    pipes, so a whole history is read without a process per object.
+    """
+
+    def __init__(self, cwd: str | Path = ".") -> None:
+        """Start the batch process in the repository at ``cwd``."""
+        self.process = subprocess.Popen(
+            ["git", "cat-file", "--batch"],  # noqa: S607
+            cwd=cwd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+
+    def read(self, name: str) -> tuple[str, bytes]:
+        """
+        Read an object's type and content.
+
+        Raises:
+            KeyError: If the object does not exist.
+
+        """
+        stdin, stdout = self.process.stdin, self.process.stdout
+        stdin.write(f"{name}\n".encode())
+        stdin.flush()
+        header = stdout.readline().split()
+        if len(header) != len(("sha", "type", "size")):
+            raise KeyError(name)
+        content = stdout.read(int(header[2]))
+        stdout.read(1)
+        return header[1].decode(), content
+
+    def close(self) -> None:
+        """Stop the batch process."""
+        if self.process.stdin:
+            self.process.stdin.close()
+        self.process.wait()
+        if self.process.stdout:
+            self.process.stdout.close()
+
+
+class HistoryReader:
+    """
+    Read the notebooks of many revisions, parsing each version once.
+
+    Trees are parsed once per tree SHA, so directories unchanged between
+    revisions cost nothing, and the css_file of each notebook blob is
+    cached by blob SHA across revisions and runs.
+    """
+
+    def __init__(
+        self, cat_file: CatFile, roots: list[str], cache: dict[str, list]
+    ) -> None:
+        """Read notebooks under the repository-relative ``roots``."""
+        self.cat_file = cat_file
+        self.roots = roots
+        self.cache = cache
+        self.suffixes = tuple(notebook_suffixes())
+        self.trees: dict[str, list[tuple[bytes, str, str]]] = {}
+        self.parsed = 0
+
+    def _tree_entries(self, sha: str) -> list[tuple[bytes, str, str]]:
+        """Parse a tree object into (mode, name, sha) entries."""
+        if sha not in self.trees:
+            _, data = self.cat_file.read(sha)
+            entries = []
+            position = 0
+            while position < len(data):
+                space = data.index(b" ", position)
+                nul = data.index(b"\0", space)
+                entries.append(
+                    (
+                        data[position:space],
+                        data[space + 1 : nul].decode(
+                            "utf-8", "surrogateescape"
+                        ),
+                        data[nul + 1 : nul + 21].hex(),
+                    )
+                )
+                position = nul + 21
+            self.trees[sha] = entries
+        return self.trees[sha]
+
+    def _in_roots(self, path: str, *, directory: bool) -> bool:
+        """Check a path is under a root, or for a directory, above one."""
+        for root in self.roots:
+            if not root or path == root or path.startswith(f"{root}/"):
+                return True
+            if directory and root.startswith(f"{path}/"):
+                return True
+        return False
+
+    def _walk(
+        self, tree_sha: str, prefix: str = ""
+    ) -> Iterator[tuple[str, str]]:
+        """Yield the path and blob SHA of each notebook candidate."""
+        for mode, name, sha in self._tree_entries(tree_sha):
+            path = f"{prefix}{name}"
+            if mode == TREE_MODE:
+                if self._in_roots(path, directory=True):
+                    yield from self._walk(sha, f"{path}/")
+            elif path.lower().endswith(self.suffixes) and self._in_roots(
+                path, directory=False
+            ):
+                yield path, sha
+
+    def _css_file(self, path: str, blob_sha: str) -> list:
+        """Get the status and css_file of a notebook blob."""
+        key = f"{blob_sha}{PurePosixPath(path).suffix.lower()}"
+        if key not in self.cache:
+            _, data = self.cat_file.read(blob_sha)
+            self.parsed += 1
+            notebook_format = classify_content(path, data)
+            if notebook_format is None:
+                self.cache[key] = ["not_notebook", None]
+            else:
+                text = data.decode("utf-8", "replace")
+                span = notebook_format.locate_config(text)
+                css_file = (
+                    notebook_format.get_option(span.content, "css_file")
+                    if span
+                    else None
+                )
+                if span is None:
+                    status = "no_app"
+                else:
+                    status = "themed" if css_file else "no_theme"
+                self.cache[key] = [status, css_file]
+        return self.cache[key]
+
+    def read_revision(self, sha: str) -> dict[str, str | None]:
+        """
+        Get the css_file of every notebook in a revision.
+
+        Returns:
+            The css_file of each notebook path, None if it has none
+
+        """
+        _, commit = self.cat_file.read(sha)
+        tree_sha = commit.split(b"\n", 1)[0].removeprefix(b"tree ").decode()
+        notebooks = {}
+        for path, blob_sha in self._walk(tree_sha):
+            status, css_file = self._css_file(path, blob_sha)
+            if status != "not_notebook":
+                notebooks[path] = css_file
+        return notebooks
+
+
+def get_history_cache_path() -> Path:
+    """Get the file caching the css_file of notebook blobs."""
+    cache_dir = Path(appdirs.user_cache_dir("mtheme", "marimo"))
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir / HISTORY_CACHE_FILE
+
+
+def _load_history_cache(cache_path: Path) -> dict[str, list]:
+    """Load cached results keyed by blob SHA and suffix."""
+    try:
+        return json.loads(cache_path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def _git(*args: str) -> str:
+    return subprocess.run(  # noqa: S603
+        ["git", *args],  # noqa: S607
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+
+
+def list_revisions(revs: str | None = None) -> list[Revision]:
+    """
+    List the revisions to audit, oldest first.
+
+    Args:
+        revs: A range such as ``v1.0..main``, or comma-separated
+            revisions such as ``v1.0,v2.0``; all ancestors of HEAD by
+            default
+
+    Raises:
+        subprocess.CalledProcessError: If git cannot resolve them.
+
+    """
+    log_format = "--format=%H%x1f%cs%x1f%D"
+    if revs is None or ".." in revs:
+        output = _git("log", "--reverse", log_format, revs or "HEAD", "--")
+    else:
+        refs = [rev.strip() for rev in revs.split(",") if rev.strip()]
+        output = _git("log", "--no-walk=unsorted", log_format, *refs, "--")
+    return [
+        Revision(*line.split("\x1f")) for line in output.splitlines() if line
+    ]
+
+
+def _repo_roots(roots: tuple[str, ...], top_level: Path) -> list[str]:
+    """
+    Convert roots to paths relative to the repository top level.
+
+    Raises:
+        ValueError: If a root is outside the repository.
+
+    """
+    repo_roots = []
+    for root in roots or (".",):
+        relative = Path(root).resolve().relative_to(top_level).as_posix()
+        repo_roots.append("" if relative == "." else relative)
+    return repo_roots
+
+
+def theme_history(
+    roots: tuple[str, ...], revs: str | None = None
+) -> Iterator[tuple[Revision, dict[str, str | None]]]:
+    """
+    Read the css_file of every notebook at each revision.
+
+    All objects are streamed through one ``git cat-file --batch`` process
+    and parsed in memory, and notebook versions are cached by blob SHA.
+
+    Args:
+        roots: Directories or files to audit, relative to the current
+            directory
+        revs: Revision range or comma-separated revisions, all
+            ancestors of HEAD by default
+
+    Yields:
+        Each revision, oldest first, with the css_file of each notebook
+        (by repository-relative path), None if it has no theme
+
+    Raises:
+        subprocess.CalledProcessError: If a git command fails.
+        ValueError: If a root is outside the repository.
+
+    """
+    revisions = list_revisions(revs)
+    top_level = Path(_git("rev-parse", "--show-toplevel").strip()).resolve()
+    repo_roots = _repo_roots(roots, top_level)
+    cache_path = get_history_cache_path()
+    cache = _load_history_cache(cache_path)
+    with closing(CatFile(top_level)) as cat_file:
+        reader = HistoryReader(cat_file, repo_roots, cache)
+        for revision in revisions:
+            yield revision, reader.read_revision(revision.sha)
+    if reader.parsed:
+        atomic_write(cache_path, json.dumps(cache))
+
+
+def _theme_name(css_file: str | None) -> str:
+    return theme_name_for(css_file) if css_file else "no theme"
+
+
+def show_history(roots: tuple[str, ...], revs: str | None = None) -> bool:
+    """
+    Print when each notebook's theme changed over a range of revisions.
+
+    The first revision and every tagged revision list the theme of all
+    notebooks; other revisions list only the notebooks that changed.
+
+    Returns:
+        bool: True if the history could be read
+
+    """
+    previous: dict[str, str | None] | None = None
+    try:
+        for revision, notebooks in theme_history(roots, revs):
+            lines = []
+            for path, css_file in sorted(notebooks.items()):
+                if previous is None or revision.is_tagged:
+                    lines.append(f"  {path}: {_theme_name(css_file)}")
+                elif path not in previous:
+                    lines.append(f"  {path}: {_theme_name(css_file)} (new)")
+                elif previous[path] != css_file:
+                    lines.append(
+                        f"  {path}: {_theme_name(previous[path])} -> "
+                        f"{_theme_name(css_file)}"
+                    )
+            lines.extend(
+                f"  {path}: deleted"
+                for path in sorted(previous or {})
+                if path not in notebooks
+            )
+            if lines or previous is None:
+                refs = f" ({revision.refs})" if revision.refs else ""
+                print(f"{revision.sha[:10]} {revision.date}{refs}")
+                print("\n".join(lines or ["  No notebooks found"]))
+            previous = notebooks
+    except subprocess.CalledProcessError as e:
+        error = (e.stderr or "").strip().splitlines()
+        print(f"Error: {error[-1] if error else e}")
+        return False
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Error: {e}")
+        return False
+    if previous is None:
+        print("No revisions found.")
+    return True
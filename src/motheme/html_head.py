@@ -0,0 +1,159 @@
+"""Generate html_head_file font hints from a theme's CSS."""
+
+from __future__ import annotations
+
+import html
+import re
+from typing import TYPE_CHECKING
+from urllib.parse import parse_qs, urlparse
+
+from .util import atomic_write, get_themes_dir
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+HEAD_SUFFIX = ".head.html"
+HEAD_MARKER = "<!-- motheme font hints: "
+GOOGLE_FONTS_CSS_HOST = "fonts.googleapis.com"
+GOOGLE_FONTS_FILES = "https://fonts.gstatic.com"
+GENERIC_FAMILIES = frozenset(
+    {
+        "serif",
+        "sans-serif",
+        "monospace",
+        "cursive",
+        "fantasy",
+        "system-ui",
+        "ui-serif",
+        "ui-sans-serif",
+        "ui-monospace",
+        "ui-rounded",
+        "emoji",
+        "math",
+        "inherit",
+        "initial",
+        "unset",
+    }
+)
+
+_IMPORT = re.compile(r"""@import\s+(?:url\(\s*)?["']?([^"')\s;]+)""")
+_FONT_VARIABLE = re.compile(r"--[\w-]*font[\w-]*\s*:\s*([^;}]+)")
+
+
+def parse_imports(css: str) -> list[str]:
+    """Get the remote stylesheet URLs a theme loads with ``@import``."""
+    urls = (m.group(1) for m in _IMPORT.finditer(css))
+    return list(dict.fromkeys(u for u in urls if u.startswith("https://")))
+
+
+def parse_font_families(css: str) -> set[str]:
+    """Get the font families named by a theme's ``--*font*`` variables."""
+    families = set()
+    for match in _FONT_VARIABLE.finditer(css):
+        for family in match.group(1).split(","):
+            name = family.strip().strip("\"'")
+            if name and name not in GENERIC_FAMILIES and "(" not in name:
+                families.add(name)
+    return families
+
+
+def import_families(url: str) -> set[str] | None:
+    """
+    Get the families a Google Fonts stylesheet URL provides.
+
+    Returns None for other stylesheets, whose contents are unknown.
+    """
+    parsed = urlparse(url)
+    if parsed.hostname != GOOGLE_FONTS_CSS_HOST:
+        return None
+    return {
+        family.split(":")[0]
+        for family in parse_qs(parsed.query).get("family", [])
+    }
+
+
+def build_head(css: str, theme_name: str) -> str:
+    """
+    Build ``<link>`` tags that start loading a theme's fonts early.
+
+    Stylesheets pulled in with ``@import`` are only discovered once the
+    theme CSS has been downloaded and parsed. Preconnecting to their
+    origins and preloading them from the page head lets the browser
+    fetch them in parallel with the theme instead. Google Fonts imports
+    that provide none of the families the theme's font variables use
+    are skipped.
+    """
+    families = parse_font_families(css)
+    urls = [
+        url
+        for url in parse_imports(css)
+        if (provided := import_families(url)) is None or provided & families
+    ]
+
+    lines = [f"{HEAD_MARKER}{theme_name} -->"]
+    for origin in dict.fromkeys(
+        f"{urlparse(url).scheme}://{urlparse(url).netloc}" for url in urls
+    ):
+        lines.append(f'<link rel="preconnect" href="{origin}">')
+        if urlparse(origin).hostname == GOOGLE_FONTS_CSS_HOST:
+            # The font files themselves are served from a second origin
+            lines.append(
+                f'<link rel="preconnect" href="{GOOGLE_FONTS_FILES}" '
+                "crossorigin>"
+            )
+    lines.extend(
+        f'<link rel="preload" as="style" href="{html.escape(url)}">'
+        for url in urls
+    )
+    return "\n".join(lines) + "\n"
+
+
+def get_head_dir() -> Path:
+    """Get the directory for generated html_head_file files."""
+    head_dir = get_themes_dir().parent / "head"
+    head_dir.mkdir(parents=True, exist_ok=True)
+    return head_dir
+
+
+def is_head_path(head_path: str) -> bool:
+    """Check whether an html_head_file was generated by motheme."""
+    return head_path.endswith(HEAD_SUFFIX)
+
+
+def write_head_file(
+    theme_name: str,
+    css_path: Path,
+    head_path: Path | None = None,
+    *,
+    always: bool = False,
+) -> Path | None:
+    """
+    Write the font hints for a theme to an html_head_file.
+
+    The file is only rewritten when its content changes, so browsers
+    and marimo can keep serving the cached copy.
+
+    Args:
+        theme_name: Name of the theme
+        css_path: Theme CSS file to derive the hints from
+        head_path: File to write, by default ``<theme>.head.html`` in
+            the user data directory
+        always: Write the file even if the theme loads no web fonts
+
+    Returns:
+        Path: The written file, or None if the theme has no font hints
+
+    """
+    head = build_head(css_path.read_text(encoding="utf-8"), theme_name)
+    if not always and head.count("\n") == 1:
+        return None
+
+    head_path = head_path or get_head_dir() / f"{theme_name}{HEAD_SUFFIX}"
+    try:
+        unchanged = head_path.read_text(encoding="utf-8") == head
+    except OSError:
+        unchanged = False
+    if not unchanged:
+        head_path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write(head_path, head)
+    return head_path
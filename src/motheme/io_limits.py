@@ -0,0 +1,134 @@
+"""Pace notebook file I/O so large runs do not saturate shared filers."""
+
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Generator, Iterable
+
+_SIZE_UNITS = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3}
+
+
+class IoLimiter:
+    """
+    Limit the rate of file operations and bytes across threads.
+
+    Each operation reserves the next free slot on a shared schedule and
+    sleeps until it, so the limits hold however many workers share the
+    limiter.
+    """
+
+    def __init__(
+        self,
+        max_iops: float | None = None,
+        max_bytes_per_sec: float | None = None,
+    ) -> None:
+        """Create a limiter; a limit of None is not enforced."""
+        self.max_iops = max_iops
+        self.max_bytes_per_sec = max_bytes_per_sec
+        self._lock = threading.Lock()
+        self._next_op = 0.0
+        self._next_byte = 0.0
+
+    def acquire(self, nbytes: int = 0) -> None:
+        """Wait until one more operation of ``nbytes`` is allowed."""
+        with self._lock:
+            now = time.monotonic()
+            start = now
+            if self.max_iops:
+                start = max(start, self._next_op)
+                self._next_op = start + 1 / self.max_iops
+            if self.max_bytes_per_sec and nbytes:
+                byte_start = max(now, self._next_byte)
+                self._next_byte = byte_start + nbytes / self.max_bytes_per_sec
+                start = max(start, byte_start)
+        if start > now:
+            time.sleep(start - now)
+
+
+_limiter: IoLimiter | None = None
+
+
+@contextmanager
+def io_limits(
+    *,
+    max_iops: float | None = None,
+    max_bytes_per_sec: float | None = None,
+) -> Generator[None, None, None]:
+    """Limit the notebook I/O of every thread while the context is open."""
+    global _limiter  # noqa: PLW0603
+    previous = _limiter
+    if max_iops or max_bytes_per_sec:
+        _limiter = IoLimiter(max_iops, max_bytes_per_sec)
+    try:
+        yield
+    finally:
+        _limiter = previous
+
+
+def is_io_limited() -> bool:
+    """Check whether notebook I/O is currently being limited."""
+    return _limiter is not None
+
+
+def account_io(nbytes: int = 0) -> None:
+    """Count one file operation of ``nbytes``, waiting if over the limits."""
+    if _limiter is not None:
+        _limiter.acquire(nbytes)
+
+
+def parse_size(value: str) -> int:
+    """
+    Parse a byte count with an optional K, M or G suffix, e.g. ``20M``.
+
+    Raises:
+        ValueError: If the value is not a positive size.
+
+    """
+    text = value.strip().upper().removesuffix("B")
+    unit = text[-1:] if text[-1:] in _SIZE_UNITS else ""
+    try:
+        size = int(float(text.removesuffix(unit)) * _SIZE_UNITS[unit])
+    except ValueError:
+        size = 0
+    if size <= 0:
+        msg = f"Invalid size {value!r}; expected e.g. 512K or 20M"
+        raise ValueError(msg)
+    return size
+
+
+def locality_order(paths: Iterable[str]) -> list[str]:
+    """
+    Order files by directory, and by inode within each directory.
+
+    Files in one directory are then read together, and in roughly the
+    order they are laid out on disk. Inodes come from a single directory
+    listing per directory; where listings do not include them (Windows),
+    files are ordered by name.
+    """
+    by_dir: dict[str, list[str]] = {}
+    for path in paths:
+        by_dir.setdefault(str(Path(path).parent), []).append(path)
+
+    ordered = []
+    for directory in sorted(by_dir):
+        files = sorted(by_dir[directory])
+        inodes: dict[str, int] = {}
+        if sys.platform != "win32":
+            account_io()
+            try:
+                with os.scandir(directory) as entries:
+                    inodes = {entry.name: entry.inode() for entry in entries}
+            except OSError:
+                pass
+        ordered.extend(
+            sorted(files, key=lambda p: inodes.get(Path(p).name, 0))
+        )
+    return ordered
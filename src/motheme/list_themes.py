@@ -1,15 +1,16 @@
 """List available themes."""
 
-from .util import get_themes_dir
+from .util import get_theme_index
 
 
 def list_themes() -> None:
-    """List available themes."""
-    themes_dir = get_themes_dir()
-    if themes_dir.exists():
-        themes = [theme.stem for theme in themes_dir.glob("*.css")]
+    """List available themes from every layer of the search path."""
+    themes = get_theme_index()
+    if themes:
         print("Available Themes:")
-        for theme in themes:
-            print(f"- {theme}")
+        for theme, location in themes.items():
+            layer = location.layer.name
+            suffix = "" if layer == "user" else f" ({layer})"
+            print(f"- {theme}{suffix}")
     else:
         print("No themes downloaded. Run 'mtheme update' to download themes.")
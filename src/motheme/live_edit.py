@@ -0,0 +1,249 @@
+"""Edit a theme live, publishing each valid save to running notebooks."""
+
+from __future__ import annotations
+
+import re
+import shutil
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from .api import apply_files
+from .util import (
+    atomic_write,
+    get_themes_dir,
+    invalidate_theme_index,
+    themes_lock,
+    validate_theme_exists,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+POLL_INTERVAL = 0.25
+
+# Only the tokens that affect structure: comments and strings, which may
+# contain anything, plus brackets and declaration separators
+_TOKEN = re.compile(
+    r"""/\*.*?(?:\*/|\Z)"""
+    r"""|"(?:\\.|[^"\\\n])*(?:"|$)"""
+    r"""|'(?:\\.|[^'\\\n])*(?:'|$)"""
+    r"""|[{}();]""",
+    re.DOTALL | re.MULTILINE,
+)
+_COMMENT = re.compile(r"/\*.*?\*/", re.DOTALL)
+
+
+def _location(css: str, position: int) -> str:
+    line = css.count("\n", 0, position) + 1
+    column = position - css.rfind("\n", 0, position)
+    return f"line {line}, column {column}"
+
+
+def _check_segment(css: str, start: int, end: int, *, in_block: bool) -> None:
+    """Check the text before a ``;`` or ``}`` is a valid statement."""
+    segment = _COMMENT.sub("", css[start:end]).strip()
+    if not segment:
+        return
+    if in_block and not segment.startswith("@") and ":" not in segment:
+        msg = f"{_location(css, end)}: Expected ':' in '{segment}'"
+        raise ValueError(msg)
+    if not in_block and not segment.startswith("@"):
+        msg = f"{_location(css, end)}: Unexpected '{segment}'"
+        raise ValueError(msg)
+
+
+def _check_literal(css: str, text: str, position: int) -> None:
+    """Check a comment or string token is terminated."""
+    if text.startswith("/*"):
+        if not text.endswith("*/") or len(text) < len("/**/"):
+            msg = f"{_location(css, position)}: Unterminated comment"
+            raise ValueError(msg)
+    elif len(text) < len('""') or text[-1] != text[0]:
+        msg = f"{_location(css, position)}: Unterminated string"
+        raise ValueError(msg)
+
+
+def _check_paren(
+    css: str, parens: list[int], text: str, position: int
+) -> None:
+    """Track parentheses; braces are not allowed inside them."""
+    if text == "(":
+        parens.append(position)
+    elif text == ")":
+        if not parens:
+            msg = f"{_location(css, position)}: Unexpected ')'"
+            raise ValueError(msg)
+        parens.pop()
+    elif text in "{}":
+        msg = f"{_location(css, parens[-1])}: Unclosed '('"
+        raise ValueError(msg)
+
+
+def check_css(css: str) -> None:
+    """
+    Check a stylesheet for syntax errors that would break the theme.
+
+    A single regex pass finds comments, strings and brackets, so checking
+    is fast enough to run on every save. It catches unbalanced brackets,
+    unterminated comments and strings, and declarations without a value.
+
+    Raises:
+        ValueError: With the line and column of the first error.
+
+    """
+    braces: list[int] = []
+    parens: list[int] = []
+    segment_start = 0
+    for token in _TOKEN.finditer(css):
+        text, position = token.group(), token.start()
+        if text.startswith("/*") or text[0] in "\"'":
+            _check_literal(css, text, position)
+        elif parens or text in "()":
+            # Separators inside parentheses, e.g. in data URIs, are values
+            _check_paren(css, parens, text, position)
+        elif text == "{":
+            if not _COMMENT.sub("", css[segment_start:position]).strip():
+                msg = f"{_location(css, position)}: Missing selector"
+                raise ValueError(msg)
+            braces.append(position)
+            segment_start = position + 1
+        else:
+            if text == "}" and not braces:
+                msg = f"{_location(css, position)}: Unexpected '}}'"
+                raise ValueError(msg)
+            _check_segment(css, segment_start, position, in_block=bool(braces))
+            if text == "}":
+                braces.pop()
+            segment_start = position + 1
+    if parens:
+        msg = f"{_location(css, parens[-1])}: Unclosed '('"
+        raise ValueError(msg)
+    if braces:
+        msg = f"{_location(css, braces[-1])}: Unclosed '{{'"
+        raise ValueError(msg)
+    _check_segment(css, segment_start, len(css), in_block=False)
+
+
+def publish_revision(draft_path: Path, theme_path: Path) -> bool:
+    """
+    Publish a draft to its theme file if it is valid.
+
+    The theme is replaced with an atomic rename, so notebooks reading it
+    see either the previous or the new revision, never a partial file.
+
+    Returns:
+        bool: True if the draft was valid
+
+    """
+    try:
+        css = draft_path.read_text(encoding="utf-8")
+    except (OSError, UnicodeDecodeError) as e:
+        # An editor may be mid-save, having removed the file or written
+        # only part of it; the finished save changes the file again
+        print(f"Note: Could not read {draft_path} ({e}); waiting for a save.")
+        return False
+    try:
+        check_css(css)
+    except ValueError as e:
+        print(f"Error: {draft_path}: {e}; keeping the last valid revision.")
+        return False
+
+    if theme_path.exists() and theme_path.read_text(encoding="utf-8") == css:
+        return True
+    with themes_lock(theme_path.parent):
+        atomic_write(theme_path, css)
+    invalidate_theme_index()
+    print(f"Published {theme_path} ({time.strftime('%H:%M:%S')})")
+    return True
+
+
+def watch_file(
+    path: Path,
+    on_change: Callable[[], object],
+    *,
+    interval: float = POLL_INTERVAL,
+    should_stop: Callable[[], bool] = lambda: False,
+) -> None:
+    """
+    Call ``on_change`` whenever a file's modification time or size change.
+
+    Polling needs no platform-specific watcher and sees saves made by
+    editors that replace the file instead of writing it in place.
+    """
+    last = None
+    while not should_stop():
+        try:
+            stat = path.stat()
+            current = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            current = None
+        if current is not None and current != last:
+            last = current
+            on_change()
+        time.sleep(interval)
+
+
+def edit_theme(
+    theme_name: str,
+    *,
+    notebook: str | None = None,
+    draft: str | None = None,
+    interval: float = POLL_INTERVAL,
+    should_stop: Callable[[], bool] = lambda: False,
+) -> Path | None:
+    """
+    Watch a draft of a theme and publish every valid save.
+
+    The draft starts as a copy of the theme. Each save is checked and,
+    if valid, published to the theme in the user themes directory, where
+    a running ``marimo edit`` session picks it up. Invalid saves are
+    rejected with the line of the error.
+
+    Args:
+        theme_name: Name of the theme to edit
+        notebook: Notebook to apply the theme to before watching
+        draft: File to edit, by default in the motheme drafts directory
+        interval: Seconds between checks for changes
+        should_stop: Called before each check; watching stops when it
+            returns True, or on Ctrl+C
+
+    Returns:
+        The draft file, or None on error
+
+    """
+    try:
+        css_path = validate_theme_exists(theme_name, get_themes_dir())
+    except FileNotFoundError:
+        return None
+
+    if draft is None:
+        draft_path = get_themes_dir().parent / "drafts" / f"{theme_name}.css"
+    else:
+        draft_path = Path(draft)
+    if not draft_path.exists():
+        draft_path.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(css_path, draft_path)
+
+    # Publishing always goes to the user themes directory, shadowing a
+    # theme installed elsewhere on the search path
+    theme_path = get_themes_dir() / f"{theme_name}.css"
+    if notebook is not None:
+        if not theme_path.exists():
+            publish_revision(draft_path, theme_path)
+        for result in apply_files([notebook], theme_path):
+            if result.status == "error":
+                print(f"Error processing {result.path}: {result.error}")
+                return None
+
+    print(f"Editing {draft_path}; press Ctrl+C to stop.")
+    try:
+        watch_file(
+            draft_path,
+            lambda: publish_revision(draft_path, theme_path),
+            interval=interval,
+            should_stop=should_stop,
+        )
+    except KeyboardInterrupt:
+        print("\nStopped editing.")
+    return draft_path
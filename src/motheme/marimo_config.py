@@ -0,0 +1,322 @@
+"""Read and edit the custom CSS setting in marimo configuration files."""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import sys
+from functools import lru_cache
+from pathlib import Path
+
+from .switch_theme import (
+    get_active_theme_path,
+    is_active_theme_path,
+    resolve_active_theme,
+    switch_theme,
+)
+from .util import (
+    atomic_write,
+    get_theme_index,
+    get_themes_dir,
+    theme_name_for,
+    validate_theme_exists,
+)
+
+if sys.version_info >= (3, 11):
+    import tomllib
+else:
+    import tomli as tomllib
+
+SCOPES = ("file", "project", "user")
+PROJECT_TABLE = "tool.marimo.display"
+USER_TABLE = "display"
+CSS_KEY = "custom_css"
+
+_TABLE_HEADER = re.compile(r"^\s*\[([^\[\]]+)\]\s*(#.*)?$")
+_CSS_KEY_LINE = re.compile(rf"^\s*{CSS_KEY}\s*=")
+
+
+def get_user_config_path() -> Path:
+    """
+    Get the user-level marimo configuration file.
+
+    Uses ``~/.marimo.toml`` if it exists, otherwise the XDG location
+    (``$XDG_CONFIG_HOME/marimo/marimo.toml``) that marimo creates.
+    """
+    home_config = Path.home() / ".marimo.toml"
+    if home_config.is_file():
+        return home_config
+    config_home = os.environ.get("XDG_CONFIG_HOME") or Path.home() / ".config"
+    return Path(config_home) / "marimo" / "marimo.toml"
+
+
+@lru_cache(maxsize=256)
+def find_pyproject(directory: Path) -> Path | None:
+    """Find the nearest pyproject.toml at or above a directory."""
+    for parent in (directory, *directory.parents):
+        pyproject = parent / "pyproject.toml"
+        if pyproject.is_file():
+            return pyproject
+    return None
+
+
+def get_config_target(scope: str) -> tuple[Path, str]:
+    """
+    Get the configuration file and table to edit for a scope.
+
+    Raises:
+        ValueError: If the scope is not ``project`` or ``user``.
+
+    """
+    if scope == "project":
+        cwd = Path.cwd().resolve()
+        return find_pyproject(cwd) or cwd / "pyproject.toml", PROJECT_TABLE
+    if scope == "user":
+        return get_user_config_path(), USER_TABLE
+    msg = f"Unknown scope {scope!r}, expected 'project' or 'user'"
+    raise ValueError(msg)
+
+
+@lru_cache(maxsize=64)
+def read_custom_css(config_path: Path, table: str) -> tuple[str, ...]:
+    """
+    Read the custom CSS list from a table of a TOML file.
+
+    Returns an empty tuple if the file, table or key does not exist.
+    """
+    try:
+        with config_path.open("rb") as f:
+            data = tomllib.load(f)
+    except (OSError, tomllib.TOMLDecodeError):
+        return ()
+    for key in table.split("."):
+        data = data.get(key, {})
+        if not isinstance(data, dict):
+            return ()
+    custom_css = data.get(CSS_KEY, [])
+    if isinstance(custom_css, str):
+        return (custom_css,)
+    return tuple(p for p in custom_css if isinstance(p, str))
+
+
+def _format_css_line(css_paths: list[str]) -> str:
+    """Format the custom_css assignment line."""
+    values = ", ".join(json.dumps(p) for p in css_paths)
+    return f"{CSS_KEY} = [{values}]\n"
+
+
+def _edit_table(
+    lines: list[str], table: str, css_paths: list[str] | None
+) -> list[str]:
+    """
+    Set or remove the custom CSS key inside a table, preserving the rest.
+
+    A missing table is appended at the end of the file.
+    """
+    start = next(
+        (
+            i
+            for i, line in enumerate(lines)
+            if (match := _TABLE_HEADER.match(line))
+            and match.group(1).strip() == table
+        ),
+        None,
+    )
+    if start is None:
+        if css_paths is None:
+            return lines
+        if lines and not lines[-1].endswith("\n"):
+            lines = [*lines[:-1], lines[-1] + "\n"]
+        prefix = ["\n"] if lines else []
+        return [*lines, *prefix, f"[{table}]\n", _format_css_line(css_paths)]
+
+    end = next(
+        (
+            i
+            for i in range(start + 1, len(lines))
+            if lines[i].lstrip().startswith("[")
+            and _TABLE_HEADER.match(lines[i])
+        ),
+        len(lines),
+    )
+    for i in range(start + 1, end):
+        if not _CSS_KEY_LINE.match(lines[i]):
+            continue
+        # The value may be an array spanning several lines
+        key_end = i
+        depth = lines[i].count("[") - lines[i].count("]")
+        while depth > 0 and key_end + 1 < end:
+            key_end += 1
+            depth += lines[key_end].count("[") - lines[key_end].count("]")
+        new_lines = [] if css_paths is None else [_format_css_line(css_paths)]
+        return [*lines[:i], *new_lines, *lines[key_end + 1 :]]
+
+    if css_paths is None:
+        return lines
+    return [
+        *lines[: start + 1],
+        _format_css_line(css_paths),
+        *lines[start + 1 :],
+    ]
+
+
+def write_custom_css(
+    config_path: Path, table: str, css_paths: list[str] | None
+) -> None:
+    """
+    Set (or remove, if None) the custom CSS list in a TOML file.
+
+    Only the affected lines are rewritten, so comments and formatting
+    elsewhere in the file are preserved.
+
+    Raises:
+        ValueError: If the key is defined in a way the line editor cannot
+            safely change, e.g. as an inline table or dotted key.
+
+    """
+    try:
+        text = config_path.read_text(encoding="utf-8")
+    except FileNotFoundError:
+        text = ""
+    new_text = "".join(
+        _edit_table(text.splitlines(keepends=True), table, css_paths)
+    )
+    try:
+        data = tomllib.loads(new_text)
+    except tomllib.TOMLDecodeError as e:
+        msg = f"Could not update {config_path}: {e}"
+        raise ValueError(msg) from e
+    for key in table.split("."):
+        data = data.get(key, {})
+    if data.get(CSS_KEY) != css_paths:
+        msg = (
+            f"Could not update {CSS_KEY} in {config_path}; "
+            f"please edit the [{table}] table manually."
+        )
+        raise ValueError(msg)
+
+    config_path.parent.mkdir(parents=True, exist_ok=True)
+    atomic_write(config_path, new_text)
+    read_custom_css.cache_clear()
+
+
+def is_theme_css(css_path: str) -> bool:
+    """Check whether a custom CSS entry was set by motheme."""
+    path = Path(css_path)
+    return is_active_theme_path(path) or (
+        path.suffix == ".css" and theme_name_for(path) in get_theme_index()
+    )
+
+
+def find_config_theme(config_path: Path, table: str) -> str | None:
+    """Get the name of the motheme theme set in a configuration file."""
+    for css_path in read_custom_css(config_path, table):
+        if not is_theme_css(css_path):
+            continue
+        path = config_path.parent / Path(css_path).expanduser()
+        if is_active_theme_path(path):
+            return resolve_active_theme(path)
+        return theme_name_for(path)
+    return None
+
+
+def apply_config_theme(
+    theme_name: str, scope: str, *, alias: bool = False
+) -> Path | None:
+    """
+    Set a theme in the project or user marimo configuration.
+
+    Other custom CSS entries are kept; a previously applied theme is
+    replaced.
+
+    Args:
+        theme_name: Name of the theme to apply
+        scope: ``project`` (pyproject.toml) or ``user`` (marimo.toml)
+        alias: Reference the project's active theme alias instead of the
+            theme file
+
+    Returns:
+        Path: The edited configuration file, or None on error
+
+    """
+    config_path, table = get_config_target(scope)
+    if alias:
+        if switch_theme(theme_name) is None:
+            return None
+        css_file_path = get_active_theme_path()
+        if scope == "project":
+            css_file_path = Path(
+                os.path.relpath(css_file_path, config_path.parent)
+            )
+    else:
+        try:
+            css_file_path = validate_theme_exists(theme_name, get_themes_dir())
+        except FileNotFoundError:
+            return None
+
+    css_paths = [
+        str(css_file_path),
+        *(
+            p
+            for p in read_custom_css(config_path, table)
+            if not is_theme_css(p)
+        ),
+    ]
+    try:
+        write_custom_css(config_path, table, css_paths)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return None
+
+    print(f"Applied {theme_name} theme to {scope} config {config_path}")
+    return config_path
+
+
+def clear_config_theme(scope: str) -> Path | None:
+    """
+    Remove motheme themes from the project or user marimo configuration.
+
+    Args:
+        scope: ``project`` (pyproject.toml) or ``user`` (marimo.toml)
+
+    Returns:
+        Path: The edited configuration file, or None if nothing changed
+
+    """
+    config_path, table = get_config_target(scope)
+    custom_css = read_custom_css(config_path, table)
+    kept = [p for p in custom_css if not is_theme_css(p)]
+    if len(kept) == len(custom_css):
+        print(f"No theme found in {scope} config {config_path}")
+        return None
+
+    try:
+        write_custom_css(config_path, table, kept or None)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return None
+
+    print(f"Cleared theme from {scope} config {config_path}")
+    return config_path
+
+
+def get_default_theme(file_name: str) -> tuple[str, str] | None:
+    """
+    Get the theme a notebook inherits from marimo configuration.
+
+    The nearest pyproject.toml takes precedence over the user config.
+
+    Returns:
+        Tuple of (theme_name, scope), or None if no theme is configured
+
+    """
+    pyproject = find_pyproject(Path(file_name).resolve().parent)
+    if pyproject is not None:
+        theme = find_config_theme(pyproject, PROJECT_TABLE)
+        if theme:
+            return theme, "project"
+    theme = find_config_theme(get_user_config_path(), USER_TABLE)
+    if theme:
+        return theme, "user"
+    return None
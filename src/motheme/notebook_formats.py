@@ -0,0 +1,216 @@
+"""
+Registry of notebook file formats motheme can theme.
+
+Each format declares the file suffixes it uses, byte signatures that
+identify its notebooks, and an editor for its App configuration. Files
+are classified from a bounded prefix, so files of other formats are
+skipped after a single small read, and files with an unknown suffix are
+skipped without being opened.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from .app_parser import (
+    AppSpan,
+    extract_app_kwarg,
+    find_app_span,
+    remove_app_kwarg,
+    set_app_kwarg,
+)
+from .io_limits import account_io
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+# Signatures must appear within this many bytes from the start of a file
+PREFIX_SIZE = 32 * 1024
+
+
+@dataclass(frozen=True)
+class NotebookFormat:
+    """
+    A notebook file format and how to edit its App configuration.
+
+    ``locate_config`` finds the App configuration in the notebook text;
+    ``get_option``, ``set_option`` and ``remove_option`` read and edit a
+    string option such as ``css_file`` in that configuration.
+    """
+
+    name: str
+    suffixes: tuple[str, ...]
+    signatures: tuple[re.Pattern[bytes], ...]
+    locate_config: Callable[[str], AppSpan | None]
+    get_option: Callable[[str, str], str | None]
+    set_option: Callable[[str, str, str], str]
+    remove_option: Callable[[str, str], str]
+
+    def matches(self, prefix: bytes) -> bool:
+        """Check whether a file prefix has all of the format's signatures."""
+        return all(signature.search(prefix) for signature in self.signatures)
+
+
+PYTHON_FORMAT = NotebookFormat(
+    name="python",
+    suffixes=(".py",),
+    signatures=(
+        re.compile(
+            rb"^(?:import marimo\b|from marimo import\b)", re.MULTILINE
+        ),
+        # The App call may go through an alias: import marimo as mo
+        re.compile(
+            rb"marimo\.App\(|^import marimo as (\w+)\b[\s\S]*\b\1\.App\(",
+            re.MULTILINE,
+        ),
+        re.compile(rb"@app\.cell"),
+    ),
+    locate_config=find_app_span,
+    get_option=extract_app_kwarg,
+    set_option=set_app_kwarg,
+    remove_option=remove_app_kwarg,
+)
+
+_FRONT_MATTER = re.compile(
+    r"\A\ufeff?---[ \t]*\r?\n(.*?)^---[ \t]*$", re.DOTALL | re.MULTILINE
+)
+# Plain YAML scalars cannot contain these, so such values are quoted
+_NEEDS_QUOTES = re.compile(r"""^[\s\-?:,\[\]{}#&*!|>'"%@`]|: | #|\s$""")
+
+
+def find_front_matter(text: str) -> AppSpan | None:
+    """Locate the YAML front matter holding a Markdown notebook's config."""
+    match = _FRONT_MATTER.match(text)
+    if match is None:
+        return None
+    start, end = match.span(1)
+    return AppSpan(
+        start_line=text.count("\n", 0, start),
+        end_line=text.count("\n", 0, end),
+        content=match.group(1),
+        start_offset=start,
+        end_offset=end,
+    )
+
+
+def _option_pattern(key: str) -> re.Pattern[str]:
+    return re.compile(
+        rf"^{re.escape(key)}:[ \t]*(.*?)[ \t]*(\r?\n|\Z)", re.MULTILINE
+    )
+
+
+def get_front_matter_option(content: str, key: str) -> str | None:
+    """Get a string option from YAML front matter."""
+    match = _option_pattern(key).search(content)
+    if match is None:
+        return None
+    value = match.group(1)
+    if value.startswith('"'):
+        return json.loads(value)
+    if value.startswith("'"):
+        return value[1:-1].replace("''", "'")
+    return value
+
+
+def set_front_matter_option(content: str, key: str, value: str) -> str:
+    """Set a string option in YAML front matter."""
+    if _NEEDS_QUOTES.search(value):
+        value = json.dumps(value)
+    pattern = _option_pattern(key)
+    if pattern.search(content):
+        return pattern.sub(
+            lambda m: f"{key}: {value}{m.group(2)}", content, count=1
+        )
+    newline = "\r\n" if "\r\n" in content else "\n"
+    if content and not content.endswith("\n"):
+        content += newline
+    return f"{content}{key}: {value}{newline}"
+
+
+def remove_front_matter_option(content: str, key: str) -> str:
+    """Remove an option from YAML front matter."""
+    return _option_pattern(key).sub("", content, count=1)
+
+
+MARKDOWN_FORMAT = NotebookFormat(
+    name="markdown",
+    suffixes=(".md", ".qmd"),
+    signatures=(
+        re.compile(rb"\A(?:\xef\xbb\xbf)?---[ \t]*\r?\n"),
+        re.compile(rb"^marimo-version:|\{\.marimo\b", re.MULTILINE),
+    ),
+    locate_config=find_front_matter,
+    get_option=get_front_matter_option,
+    set_option=set_front_matter_option,
+    remove_option=remove_front_matter_option,
+)
+
+_FORMATS: list[NotebookFormat] = [PYTHON_FORMAT, MARKDOWN_FORMAT]
+
+
+def register_format(notebook_format: NotebookFormat) -> None:
+    """Add a notebook format, replacing any format of the same name."""
+    _FORMATS[:] = [f for f in _FORMATS if f.name != notebook_format.name]
+    _FORMATS.append(notebook_format)
+
+
+def get_formats() -> list[NotebookFormat]:
+    """Get the registered notebook formats."""
+    return list(_FORMATS)
+
+
+def notebook_suffixes() -> list[str]:
+    """Get the file suffixes used by any registered format."""
+    return sorted({suffix for f in _FORMATS for suffix in f.suffixes})
+
+
+def format_for_path(path: str | Path) -> NotebookFormat:
+    """
+    Get the format to edit a notebook with, from its suffix.
+
+    Files with a suffix no format claims are edited as Python notebooks.
+    """
+    suffix = Path(path).suffix.lower()
+    for notebook_format in _FORMATS:
+        if suffix in notebook_format.suffixes:
+            return notebook_format
+    return PYTHON_FORMAT
+
+
+def classify_content(path: str | Path, data: bytes) -> NotebookFormat | None:
+    """
+    Get the format of notebook content, or None if it is not a notebook.
+
+    Only formats claiming the path's suffix are considered, and only the
+    first ``PREFIX_SIZE`` bytes are checked. Content matching no format,
+    or several, is not a notebook.
+    """
+    suffix = Path(path).suffix.lower()
+    prefix = data[:PREFIX_SIZE]
+    matches = [
+        f for f in _FORMATS if suffix in f.suffixes and f.matches(prefix)
+    ]
+    return matches[0] if len(matches) == 1 else None
+
+
+def classify_notebook(path: str | Path) -> NotebookFormat | None:
+    """
+    Get the format of a notebook file, or None if it is not a notebook.
+
+    Files with a suffix no format claims are not read, and of the others
+    only the first ``PREFIX_SIZE`` bytes are read.
+    """
+    suffix = Path(path).suffix.lower()
+    if not any(suffix in f.suffixes for f in _FORMATS):
+        return None
+    try:
+        with Path(path).open("rb") as f:
+            prefix = f.read(PREFIX_SIZE)
+    except OSError:
+        return None
+    account_io(len(prefix))
+    return classify_content(path, prefix)
@@ -0,0 +1,153 @@
+"""Build a static HTML gallery of a notebook in every installed theme."""
+
+from __future__ import annotations
+
+import html
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from .api import FileResult
+from .export_theme import export_file, find_marimo
+from .util import atomic_write, get_theme_index, hash_file
+
+if TYPE_CHECKING:
+    from .util import ThemeLocation
+
+GALLERY_INDEX = "index.html"
+GALLERY_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>motheme preview: {notebook}</title>
+<style>
+body {{ font-family: system-ui, sans-serif; margin: 2rem; }}
+main {{
+  display: grid;
+  gap: 1.5rem;
+  grid-template-columns: repeat(auto-fill, minmax(28rem, 1fr));
+}}
+figure {{ margin: 0; }}
+iframe {{ border: 1px solid #ccc; height: 20rem; width: 100%; }}
+figcaption {{ padding: 0.5rem 0; }}
+small {{ color: #666; }}
+</style>
+</head>
+<body>
+<h1>{notebook} in {count} themes</h1>
+<main>
+{cards}
+</main>
+</body>
+</html>
+"""
+CARD_TEMPLATE = """<figure>
+<iframe src="{page}" loading="lazy" title="{theme}"></iframe>
+<figcaption><a href="{page}">{theme}</a> <small>{layer}</small></figcaption>
+</figure>"""
+
+
+def render_gallery(notebook: str, pages: dict[str, ThemeLocation]) -> str:
+    """Render the gallery index linking to each theme's page."""
+    cards = [
+        CARD_TEMPLATE.format(
+            page=html.escape(f"{theme}.html"),
+            theme=html.escape(theme),
+            layer=html.escape(location.layer.name),
+        )
+        for theme, location in pages.items()
+    ]
+    return GALLERY_TEMPLATE.format(
+        notebook=html.escape(Path(notebook).name),
+        count=len(cards),
+        cards="\n".join(cards),
+    )
+
+
+def _export_page(
+    marimo: str, notebook: str, theme: str, css_path: Path, output_dir: Path
+) -> FileResult:
+    """Export a notebook with one theme to ``<theme>.html``."""
+    try:
+        theme_digest = hash_file(css_path)
+    except OSError as e:
+        return FileResult(notebook, "error", theme, error=str(e))
+    return export_file(
+        marimo, notebook, css_path, theme_digest, output_dir / f"{theme}.html"
+    )
+
+
+def build_gallery(
+    notebook: str = "sample.py",
+    output_dir: str = "gallery",
+    *,
+    themes: list[str] | None = None,
+    jobs: int | None = None,
+) -> Path | None:
+    """
+    Export a notebook once per theme and write a gallery linking them.
+
+    Exports run in parallel and share the export cache keyed by notebook
+    and theme content, so after adding or editing one theme only that
+    theme's page is exported again.
+
+    Args:
+        notebook: Marimo notebook to preview the themes with
+        output_dir: Directory to write ``<theme>.html`` pages and the
+            ``index.html`` gallery to
+        themes: Themes to include, all themes on the search path by
+            default
+        jobs: Maximum number of concurrent exports
+
+    Returns:
+        The gallery index, or None on error
+
+    """
+    if not Path(notebook).is_file():
+        print(f"Error: Notebook {notebook} does not exist.")
+        return None
+    index = get_theme_index()
+    unknown = [name for name in themes or [] if name not in index]
+    if unknown:
+        print(f"Error: Unknown theme(s): {', '.join(unknown)}")
+        return None
+    try:
+        marimo = find_marimo()
+    except FileNotFoundError as e:
+        print(f"Error: {e}")
+        return None
+
+    selected = {name: index[name] for name in themes or index}
+    gallery_dir = Path(output_dir)
+    gallery_dir.mkdir(parents=True, exist_ok=True)
+    workers = None if jobs is None else max(jobs, 1)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(
+            pool.map(
+                lambda item: _export_page(
+                    marimo, notebook, item[0], item[1].path, gallery_dir
+                ),
+                selected.items(),
+            )
+        )
+
+    pages = {}
+    for (theme, location), result in zip(selected.items(), results):
+        if result.status in ("exported", "cached"):
+            pages[theme] = location
+            cached = " (cached)" if result.status == "cached" else ""
+            print(f"Rendered {theme}{cached}")
+        elif result.status == "error":
+            print(f"Error rendering {theme}: {result.error}")
+        else:
+            print(f"No marimo.App found in {notebook}")
+            return None
+
+    gallery = gallery_dir / GALLERY_INDEX
+    atomic_write(gallery, render_gallery(notebook, pages))
+    exported = sum(r.status == "exported" for r in results)
+    print(
+        f"\nWrote a gallery of {len(pages)} theme(s) to {gallery} "
+        f"({exported} rendered, {len(pages) - exported} cached)."
+    )
+    return gallery
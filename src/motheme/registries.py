@@ -0,0 +1,424 @@
+"""Resolve themes across several prioritized theme registries."""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from urllib.parse import urljoin, urlparse
+
+import appdirs
+import requests
+
+from .theme_bundle import member_theme_name, resolve_source
+from .theme_downloader import DEFAULT_REPO_URL, _get_api_url
+from .util import (
+    PROJECT_DIR_NAME,
+    find_project_root,
+    get_themes_dir,
+    is_valid_theme_name,
+    staged_themes,
+)
+
+if sys.version_info >= (3, 11):
+    import tomllib
+else:
+    import tomli as tomllib
+
+REGISTRIES_FILE = "registries.toml"
+INDEX_FILE = "index.json"
+DEFAULT_REGISTRY_NAME = "community"
+TIMEOUT = 10
+
+
+@dataclass(frozen=True)
+class Registry:
+    """A source of themes: a GitHub repository, HTTP index or directory."""
+
+    name: str
+    url: str
+    priority: int = 0
+
+    @property
+    def kind(self) -> str:
+        """Get how the registry is accessed: github, http or local."""
+        parsed = urlparse(self.url)
+        if parsed.hostname == "github.com":
+            return "github"
+        if parsed.scheme in ("http", "https"):
+            return "http"
+        return "local"
+
+
+@dataclass(frozen=True)
+class CatalogEntry:
+    """Where a registry serves one theme from."""
+
+    name: str
+    registry: Registry
+    location: str
+    sha256: str | None = None
+
+
+@dataclass
+class Catalog:
+    """Themes resolved across registries, one winning entry per name."""
+
+    themes: dict[str, CatalogEntry]
+    shadowed: dict[str, list[CatalogEntry]]
+    conflicts: list[str]
+    errors: dict[str, str]
+
+
+DEFAULT_REGISTRY = Registry(DEFAULT_REGISTRY_NAME, DEFAULT_REPO_URL)
+
+
+def get_registry_config_paths() -> list[Path]:
+    """Get the user and project registry configuration files."""
+    return [
+        Path(appdirs.user_config_dir("mtheme", "marimo")) / REGISTRIES_FILE,
+        find_project_root() / PROJECT_DIR_NAME / REGISTRIES_FILE,
+    ]
+
+
+def _read_registry_config(config_path: Path) -> list[Registry]:
+    """
+    Read the ``[[registry]]`` tables of a configuration file.
+
+    Local paths are resolved relative to the configuration file.
+
+    Raises:
+        ValueError: If the file is not valid TOML or a table is invalid.
+
+    """
+    try:
+        with config_path.open("rb") as f:
+            data = tomllib.load(f)
+    except FileNotFoundError:
+        return []
+    except tomllib.TOMLDecodeError as e:
+        msg = f"Invalid registry configuration {config_path}: {e}"
+        raise ValueError(msg) from e
+
+    registries = []
+    for table in data.get("registry", []):
+        try:
+            name, url = str(table["name"]), str(table["url"])
+            priority = int(table.get("priority", 0))
+        except (KeyError, TypeError, ValueError) as e:
+            msg = f"Invalid registry in {config_path}: {table!r}"
+            raise ValueError(msg) from e
+        registry = Registry(name, url, priority)
+        if registry.kind == "local" and not url.startswith("file:"):
+            url = str(config_path.parent / Path(url).expanduser())
+            registry = Registry(name, url, priority)
+        registries.append(registry)
+    return registries
+
+
+def load_registries() -> list[Registry]:
+    """
+    Get the configured registries.
+
+    Project registries replace user registries with the same name. The
+    community registry is used when none are configured.
+
+    Raises:
+        ValueError: If a configuration file is invalid.
+
+    """
+    registries: dict[str, Registry] = {}
+    for config_path in get_registry_config_paths():
+        for registry in _read_registry_config(config_path):
+            registries[registry.name] = registry
+    return list(registries.values()) or [DEFAULT_REGISTRY]
+
+
+def _github_index(registry: Registry) -> list[CatalogEntry]:
+    """List the themes of a GitHub repository with the contents API."""
+    api_base_url = _get_api_url(registry.url.rstrip("/"))
+    response = requests.get(f"{api_base_url}/contents/themes", timeout=TIMEOUT)
+    response.raise_for_status()
+    items = response.json()
+    if not isinstance(items, list) or not all(
+        isinstance(item, dict) for item in items
+    ):
+        msg = f"Invalid contents listing for registry {registry.name}"
+        raise ValueError(msg)
+    return [
+        CatalogEntry(
+            name,
+            registry,
+            f"{api_base_url}/contents/themes/{name}/{name}.css",
+        )
+        for item in items
+        if item.get("type") == "dir" and (name := item.get("name"))
+    ]
+
+
+def _parse_index(
+    registry: Registry, index: object, base: str
+) -> list[CatalogEntry]:
+    """
+    Parse an ``index.json`` document.
+
+    The index maps theme names to objects with a ``path`` (relative to
+    the index, or absolute) and an optional ``sha256`` of the CSS.
+
+    Raises:
+        ValueError: If the index is not shaped like
+            ``{"themes": {name: {"path": ..., "sha256": ...}}}``.
+
+    """
+    themes = index.get("themes", {}) if isinstance(index, dict) else None
+    if not isinstance(themes, dict) or not all(
+        isinstance(info, dict)
+        and isinstance(info.get("path", ""), str)
+        and isinstance(info.get("sha256", ""), str)
+        for info in themes.values()
+    ):
+        msg = (
+            f"Invalid index for registry {registry.name}: expected "
+            '{"themes": {name: {"path": ..., "sha256": ...}}}'
+        )
+        raise ValueError(msg)
+    entries = []
+    for name, info in themes.items():
+        path = info.get("path", f"{name}.css")
+        location = (
+            urljoin(base, path)
+            if registry.kind == "http"
+            else str(Path(base) / path)
+        )
+        entries.append(
+            CatalogEntry(name, registry, location, info.get("sha256"))
+        )
+    return entries
+
+
+def _http_index(registry: Registry) -> list[CatalogEntry]:
+    """Read the index of a registry served over HTTP."""
+    index_url = registry.url
+    if not index_url.endswith(".json"):
+        index_url = urljoin(index_url.rstrip("/") + "/", INDEX_FILE)
+    response = requests.get(index_url, timeout=TIMEOUT)
+    response.raise_for_status()
+    return _parse_index(registry, response.json(), index_url)
+
+
+def _local_index(registry: Registry) -> list[CatalogEntry]:
+    """Read the index of, or scan, a registry in a local directory."""
+    root = resolve_source(registry.url)
+    index_path = root / INDEX_FILE
+    if index_path.is_file():
+        index = json.loads(index_path.read_text(encoding="utf-8"))
+        return _parse_index(registry, index, str(root))
+    if not root.is_dir():
+        msg = f"Registry directory {root} does not exist"
+        raise FileNotFoundError(msg)
+    if (root / "themes").is_dir():
+        root = root / "themes"
+    return [
+        CatalogEntry(name, registry, str(path))
+        for path in sorted(root.glob("*.css")) + sorted(root.glob("*/*.css"))
+        if (name := member_theme_name(path.relative_to(root).as_posix()))
+    ]
+
+
+def fetch_index(registry: Registry) -> list[CatalogEntry]:
+    """
+    Fetch the list of themes a registry provides, without their CSS.
+
+    Raises:
+        requests.RequestException: If an HTTP request fails.
+        OSError: If a local registry cannot be read.
+        ValueError: If the index is not valid JSON or is malformed.
+
+    """
+    if registry.kind == "github":
+        return _github_index(registry)
+    if registry.kind == "http":
+        return _http_index(registry)
+    return _local_index(registry)
+
+
+def _try_fetch_index(registry: Registry) -> list[CatalogEntry] | str:
+    """Fetch a registry index, returning the error message on failure."""
+    try:
+        return fetch_index(registry)
+    except (requests.RequestException, OSError, ValueError) as e:
+        return str(e)
+
+
+def resolve_catalog(registries: list[Registry]) -> Catalog:
+    """
+    Fetch all registry indexes concurrently and merge them.
+
+    Duplicate names are resolved by priority: the registry with the
+    highest priority wins, and the others are kept as shadowed. When
+    registries with the same priority provide different content for a
+    name, the one configured first wins and a conflict is recorded.
+    Registries that cannot be reached are skipped and reported.
+    """
+    with ThreadPoolExecutor(max_workers=max(len(registries), 1)) as pool:
+        indexes = list(pool.map(_try_fetch_index, registries))
+
+    errors: dict[str, str] = {}
+    ranked: list[tuple[int, int, list[CatalogEntry]]] = []
+    for order, (registry, index) in enumerate(zip(registries, indexes)):
+        if isinstance(index, str):
+            errors[registry.name] = index
+        else:
+            ranked.append((-registry.priority, order, index))
+
+    themes: dict[str, CatalogEntry] = {}
+    shadowed: dict[str, list[CatalogEntry]] = {}
+    conflicts = []
+    for _, _, entries in sorted(ranked, key=lambda r: r[:2]):
+        for entry in entries:
+            winner = themes.setdefault(entry.name, entry)
+            if winner is entry:
+                continue
+            shadowed.setdefault(entry.name, []).append(entry)
+            same_content = entry.sha256 and entry.sha256 == winner.sha256
+            if (
+                entry.registry.priority == winner.registry.priority
+                and not same_content
+            ):
+                conflicts.append(
+                    f"{entry.name} is provided by {winner.registry.name} and "
+                    f"{entry.registry.name} with equal priority; "
+                    f"using {winner.registry.name}"
+                )
+    return Catalog(themes, shadowed, conflicts, errors)
+
+
+def fetch_theme_css(entry: CatalogEntry) -> bytes:
+    """
+    Fetch the CSS of a catalogue entry from its registry.
+
+    Raises:
+        requests.RequestException: If an HTTP request fails.
+        OSError: If a local registry cannot be read.
+        ValueError: If the content does not match the indexed sha256.
+
+    """
+    kind = entry.registry.kind
+    if kind == "local":
+        content = Path(entry.location).read_bytes()
+    else:
+        response = requests.get(entry.location, timeout=TIMEOUT)
+        response.raise_for_status()
+        content = response.content
+        if kind == "github":
+            content = base64.b64decode(response.json()["content"])
+
+    if entry.sha256:
+        digest = hashlib.sha256(content).hexdigest()
+        if digest != entry.sha256.lower():
+            msg = (
+                f"Checksum mismatch for {entry.name} from "
+                f"{entry.registry.name}: expected {entry.sha256}, got {digest}"
+            )
+            raise ValueError(msg)
+    return content
+
+
+def _print_catalog_problems(catalog: Catalog) -> None:
+    """Print registries that failed and unresolved name conflicts."""
+    for name, error in catalog.errors.items():
+        print(f"Warning: Could not read registry {name}: {error}")
+    for conflict in catalog.conflicts:
+        print(f"Warning: {conflict}")
+
+
+def update_from_registries(
+    theme_names: list[str] | None = None,
+) -> Path | None:
+    """
+    Install themes from the configured registries.
+
+    Only the indexes are fetched up front; CSS is then downloaded
+    concurrently, and only from the registry that wins each name.
+
+    Args:
+        theme_names: Themes to install, or None for every theme in the
+            resolved catalogue
+
+    Returns:
+        Path: Local directory where themes are stored, or None on error
+
+    """
+    try:
+        registries = load_registries()
+    except ValueError as e:
+        print(f"Error: {e}")
+        return None
+
+    catalog = resolve_catalog(registries)
+    _print_catalog_problems(catalog)
+    if len(catalog.errors) == len(registries):
+        print("Error: No theme registry could be read.")
+        return None
+
+    names = sorted(catalog.themes) if theme_names is None else theme_names
+    missing = [name for name in names if name not in catalog.themes]
+    for name in missing:
+        print(f"Error: Theme {name} is not provided by any registry.")
+    entries = [catalog.themes[name] for name in names if name not in missing]
+
+    themes_dir = get_themes_dir()
+
+    def stage(entry: CatalogEntry, staging_dir: Path) -> str:
+        if not is_valid_theme_name(entry.name):
+            return (
+                f"Error: Invalid theme name {entry.name!r} "
+                f"from {entry.registry.name}"
+            )
+        try:
+            content = fetch_theme_css(entry)
+        except (requests.RequestException, OSError, ValueError) as e:
+            return f"Error downloading {entry.name}: {e}"
+        (staging_dir / f"{entry.name}.css").write_bytes(content)
+        css_path = themes_dir / f"{entry.name}.css"
+        return f"Downloaded: {css_path} (from {entry.registry.name})"
+
+    # Themes are published together once all downloads have finished
+    with (
+        staged_themes(themes_dir) as staging_dir,
+        ThreadPoolExecutor(max_workers=8) as pool,
+    ):
+        messages = list(pool.map(lambda e: stage(e, staging_dir), entries))
+    for message in messages:
+        print(message)
+
+    return None if missing else themes_dir
+
+
+def list_registries() -> None:
+    """Print the resolved catalogue and which registry serves each theme."""
+    try:
+        registries = load_registries()
+    except ValueError as e:
+        print(f"Error: {e}")
+        return
+
+    print("Registries:")
+    for registry in sorted(registries, key=lambda r: -r.priority):
+        print(
+            f"- {registry.name} ({registry.url}, priority {registry.priority})"
+        )
+
+    catalog = resolve_catalog(registries)
+    _print_catalog_problems(catalog)
+    print("\nThemes:")
+    for name, entry in sorted(catalog.themes.items()):
+        shadowed = ", ".join(
+            e.registry.name for e in catalog.shadowed.get(name, [])
+        )
+        suffix = f" (shadows {shadowed})" if shadowed else ""
+        print(f"- {name}: {entry.registry.name}{suffix}")
@@ -1,14 +1,15 @@
 """Remove theme files."""
 
-from .util import get_themes_dir
+from .util import get_themes_dir, invalidate_theme_index, themes_lock
 
 
-def remove_theme_files(theme_names: list[str]) -> None:
+def remove_theme_files(theme_names: list[str], *, yes: bool = False) -> None:
     """
     Remove theme files from themes directory.
 
     Args:
         theme_names: List of theme names to remove
+        yes: Remove without asking for confirmation
 
     """
     themes_dir = get_themes_dir()
@@ -35,14 +36,20 @@ def remove_theme_files(theme_names: list[str]) -> None:
 
     # Confirm removal
     print(f"Will remove themes: {', '.join(existing_themes)}")
-    response = input("Continue? (y/n): ").lower().strip()
-
-    if response != "y":
-        print("Operation cancelled")
-        return
+    if not yes:
+        try:
+            response = input("Continue? (y/n): ").lower().strip()
+        except EOFError:
+            # No terminal to answer the prompt; never remove silently
+            response = ""
+        if response != "y":
+            print("Operation cancelled")
+            return
 
     # Remove the files
-    for theme in existing_themes:
-        theme_path = themes_dir / f"{theme}.css"
-        theme_path.unlink()
-        print(f"Removed theme: {theme}")
+    with themes_lock(themes_dir):
+        for theme in existing_themes:
+            theme_path = themes_dir / f"{theme}.css"
+            theme_path.unlink(missing_ok=True)
+            print(f"Removed theme: {theme}")
+    invalidate_theme_index()
@@ -0,0 +1,112 @@
+"""Structured per-run summaries and merging of sharded runs."""
+
+from __future__ import annotations
+
+import json
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .util import atomic_write, parse_shard
+
+
+@dataclass
+class Report:
+    """Structured summary of one command run over notebook files."""
+
+    command: str
+    shard: str | None = None
+    entries: list[dict[str, str | None]] = field(default_factory=list)
+
+    def add(self, file: str, status: str, theme: str | None = None) -> None:
+        """Record the outcome for a single file."""
+        self.entries.append({"file": file, "status": status, "theme": theme})
+
+    def to_dict(self) -> dict:
+        """Convert the report to a JSON-serializable dictionary."""
+        return {
+            "command": self.command,
+            "shards": [self.shard] if self.shard else [],
+            "counts": dict(Counter(e["status"] for e in self.entries)),
+            "files": sorted(self.entries, key=lambda e: e["file"] or ""),
+        }
+
+    def write(self, path: str) -> None:
+        """Write the report as JSON."""
+        atomic_write(Path(path), json.dumps(self.to_dict(), indent=2) + "\n")
+
+
+def _missing_shards(shards: list[str]) -> list[str]:
+    """Get the shards of a split that no report covers."""
+    if not shards:
+        return []
+    counts = {parse_shard(s)[1] for s in shards}
+    if len(counts) != 1:
+        msg = f"Reports come from different shard splits: {shards}"
+        raise ValueError(msg)
+    count = counts.pop()
+    seen = {parse_shard(s)[0] for s in shards}
+    return [f"{i}/{count}" for i in range(1, count + 1) if i not in seen]
+
+
+def combine_reports(
+    report_paths: list[str], output: str | None = None
+) -> dict | None:
+    """
+    Merge the reports written by sharded runs of a command.
+
+    Args:
+        report_paths: Paths of the JSON reports to merge
+        output: Optional path to write the merged report to
+
+    Returns:
+        dict: The merged report, or None on error
+
+    """
+    try:
+        reports = [
+            json.loads(Path(p).read_text(encoding="utf-8"))
+            for p in report_paths
+        ]
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Error reading report: {e}")
+        return None
+
+    commands = {r["command"] for r in reports}
+    if len(commands) != 1:
+        print(f"Error: Reports are from different commands: {commands}")
+        return None
+
+    shards = [s for r in reports for s in r.get("shards", [])]
+    try:
+        missing = _missing_shards(shards)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return None
+
+    files = sorted(
+        (e for r in reports for e in r["files"]), key=lambda e: e["file"]
+    )
+    merged = {
+        "command": commands.pop(),
+        "shards": sorted(shards, key=lambda s: parse_shard(s)[0]),
+        "counts": dict(Counter(e["status"] for e in files)),
+        "files": files,
+    }
+    if output:
+        atomic_write(Path(output), json.dumps(merged, indent=2) + "\n")
+
+    print(
+        f"Merged {len(reports)} report(s) covering {len(files)} file(s) "
+        f"for '{merged['command']}'."
+    )
+    for status, count in sorted(merged["counts"].items()):
+        print(f"- {status}: {count}")
+    if missing:
+        print(f"Warning: Missing shards: {', '.join(missing)}")
+    duplicates = [
+        f for f, n in Counter(e["file"] for e in files).items() if n > 1
+    ]
+    if duplicates:
+        print(f"Warning: {len(duplicates)} file(s) appear in several reports")
+    return merged
@@ -0,0 +1,404 @@
+"""
+Split themes into one shared base stylesheet and per-theme entries.
+
+Declarations every theme repeats (fonts, radius, shared structural
+rules) are factored into an immutable, content-addressed base file.
+Each theme's entry stylesheet holds only the theme's own declarations
+and imports the base from the notebook's ``public/`` directory, which
+marimo serves next to the page, so every notebook there shares one
+cached copy of the base.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+import shutil
+from collections import Counter
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from .util import (
+    ENTRY_SUFFIX,
+    atomic_write,
+    get_theme_index,
+    get_themes_dir,
+    hash_file,
+)
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+BASE_PREFIX = "base-"
+# marimo serves a notebook's public/ directory under public/ of the page
+PUBLIC_DIR = "public"
+BASE_IMPORT = '@import url("{public}/{base}");'
+ENTRY_HEADER = (
+    "/* motheme shared base entry: {theme} sha256 {digest} base {base} */\n"
+)
+# Context of top-level statements such as @import
+STATEMENT = "@statement"
+
+_COMMENT = re.compile(r"/\*.*?\*/", re.DOTALL)
+_ENTRY_HEADER = re.compile(
+    r"/\* motheme shared base entry: (\S+) sha256 ([0-9a-f]+) "
+    r"base (base-[0-9a-f]+\.css) \*/"
+)
+
+
+@dataclass(frozen=True)
+class CssUnit:
+    """
+    One factorable piece of a stylesheet.
+
+    A declaration has the selector it appears under as ``context`` and a
+    ``prop``. Statements and at-rule blocks are kept whole: their
+    ``prop`` is None and ``value`` holds their text, verbatim for
+    at-rule blocks.
+    """
+
+    context: str
+    prop: str | None
+    value: str
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split())
+
+
+def _find_top_level(css: str, start: int, stops: str) -> int:
+    """Find the first stop character outside quotes and parentheses."""
+    depth = 0
+    quote = None
+    for i in range(start, len(css)):
+        char = css[i]
+        if quote:
+            quote = None if char == quote else quote
+        elif char in "\"'":
+            quote = char
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif depth == 0 and char in stops:
+            return i
+    return len(css)
+
+
+def _find_block_end(css: str, start: int) -> int:
+    """Find the brace closing the block opened just before ``start``."""
+    depth = 1
+    position = start
+    while depth:
+        position = _find_top_level(css, position, "{}")
+        if position == len(css):
+            return position
+        depth += 1 if css[position] == "{" else -1
+        position += 1
+    return position - 1
+
+
+def parse_css_units(css: str) -> list[CssUnit]:
+    """Split a stylesheet into statements, declarations and at-rules."""
+    css = _COMMENT.sub("", css)
+    units = []
+    position = 0
+    while css[position:].strip():
+        stop = _find_top_level(css, position, ";{")
+        prelude = _normalize(css[position:stop])
+        if stop == len(css) or css[stop] == ";":
+            units.append(CssUnit(STATEMENT, None, f"{prelude};"))
+            position = stop + 1
+            continue
+
+        end = _find_block_end(css, stop + 1)
+        body = css[stop + 1 : end]
+        position = end + 1
+        if prelude.startswith("@"):
+            units.append(CssUnit(prelude, None, body.strip()))
+            continue
+        for declaration in _split_declarations(body):
+            prop, _, value = declaration.partition(":")
+            units.append(CssUnit(prelude, prop.strip(), _normalize(value)))
+    return units
+
+
+def _split_declarations(body: str) -> list[str]:
+    """Split a rule body at semicolons outside quotes and parentheses."""
+    declarations = []
+    position = 0
+    while position < len(body):
+        stop = _find_top_level(body, position, ";")
+        declaration = body[position:stop].strip()
+        if ":" in declaration:
+            declarations.append(declaration)
+        position = stop + 1
+    return declarations
+
+
+def _common_prefix(themes: list[list[CssUnit]]) -> int:
+    """Count the leading units that are identical in every theme."""
+    length = 0
+    for units in zip(*themes):
+        if any(unit != units[0] for unit in units):
+            break
+        length += 1
+    return length
+
+
+def _factorable(units: list[CssUnit], prefix: int) -> set[CssUnit]:
+    """
+    Get the units of a theme that can move to an earlier base file.
+
+    A declaration can only move if its property is set once under its
+    selector and not under another selector before it, so moving it
+    ahead of the rest of the theme cannot change the cascade. At-rule
+    blocks can set any property, so they only move from the first
+    ``prefix`` units, which every theme shares, and only if everything
+    before them moves too; nothing moves past an at-rule that stays.
+    """
+    counts = Counter((u.context, u.prop) for u in units if u.prop)
+    contexts: dict[str, set[str]] = {}
+    factorable = set()
+    left_behind = blocked = False
+    for index, unit in enumerate(units):
+        if unit.context == STATEMENT:
+            factorable.add(unit)
+        elif unit.prop is None:
+            if index < prefix and not left_behind:
+                factorable.add(unit)
+            else:
+                blocked = True
+        else:
+            seen = contexts.setdefault(unit.prop, set())
+            if (
+                not blocked
+                and counts[unit.context, unit.prop] == 1
+                and seen <= {unit.context}
+            ):
+                factorable.add(unit)
+            seen.add(unit.context)
+        left_behind = left_behind or unit not in factorable
+    return factorable
+
+
+def factor_themes(
+    themes: dict[str, list[CssUnit]],
+) -> tuple[list[CssUnit], dict[str, list[CssUnit]]]:
+    """
+    Factor the units shared by all themes into a base.
+
+    Returns:
+        The base units and the remaining units of each theme
+
+    """
+    prefix = _common_prefix(list(themes.values()))
+    common: set[CssUnit] | None = None
+    for units in themes.values():
+        eligible = _factorable(units, prefix)
+        common = eligible if common is None else common & eligible
+    common = common or set()
+
+    first = next(iter(themes.values()), [])
+    base = list(dict.fromkeys(u for u in first if u in common))
+    deltas = {
+        name: [u for u in units if u not in common]
+        for name, units in themes.items()
+    }
+    return base, deltas
+
+
+def format_units(units: list[CssUnit]) -> str:
+    """Format units as CSS, statements first and declarations grouped."""
+    lines = [u.value for u in units if u.context == STATEMENT]
+    context = None
+    for unit in units:
+        if unit.context == STATEMENT:
+            continue
+        if unit.prop is None or unit.context != context:
+            if context is not None:
+                lines.append("}")
+            context = None
+        if unit.prop is None:
+            lines.append(f"{unit.context} {{ {unit.value} }}")
+            continue
+        if context is None:
+            lines.append(f"{unit.context} {{")
+            context = unit.context
+        lines.append(f"    {unit.prop}: {unit.value};")
+    if context is not None:
+        lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def get_shared_dir() -> Path:
+    """Get the directory holding the shared base and theme entries."""
+    shared_dir = get_themes_dir().parent / "shared"
+    shared_dir.mkdir(parents=True, exist_ok=True)
+    return shared_dir
+
+
+def get_entry_path(theme_name: str) -> Path:
+    """Get the entry stylesheet of a theme."""
+    return get_shared_dir() / f"{theme_name}{ENTRY_SUFFIX}"
+
+
+def _read_entry_header(entry: Path) -> re.Match[str] | None:
+    try:
+        with entry.open(encoding="utf-8") as f:
+            return _ENTRY_HEADER.match(f.readline())
+    except OSError:
+        return None
+
+
+def _entry_base(entry: Path) -> str | None:
+    """Get the name of the base file an entry was built from."""
+    header = _read_entry_header(entry)
+    return header.group(3) if header else None
+
+
+def entry_family(theme_name: str) -> list[str]:
+    """List the themes whose entries share the same base as a theme's."""
+    entry = get_entry_path(theme_name)
+    if not entry.exists():
+        return [theme_name]
+    base = _entry_base(entry)
+    return sorted(
+        path.name.removesuffix(ENTRY_SUFFIX)
+        for path in get_shared_dir().glob(f"*{ENTRY_SUFFIX}")
+        if _entry_base(path) == base
+    )
+
+
+def is_entry_current(theme_name: str, css_path: Path) -> bool:
+    """Check that a theme's entry was built from its current content."""
+    header = _read_entry_header(get_entry_path(theme_name))
+    return header is not None and header.group(1, 2) == (
+        theme_name,
+        hash_file(css_path),
+    )
+
+
+def _write_if_changed(path: Path, content: str) -> bool:
+    try:
+        if path.read_text(encoding="utf-8") == content:
+            return False
+    except OSError:
+        pass
+    atomic_write(path, content)
+    return True
+
+
+def get_entry_base(theme_name: str) -> Path | None:
+    """Get the base file a theme's entry imports, if it imports one."""
+    base = _entry_base(get_entry_path(theme_name))
+    if base is None:
+        return None
+    base_path = get_shared_dir() / base
+    return base_path if base_path.exists() else None
+
+
+def publish_base(theme_name: str, notebook_dir: Path) -> Path | None:
+    """
+    Copy the base a theme's entry imports into a notebook's public dir.
+
+    Base files are named by content, so an existing copy is never
+    rewritten and browsers can keep it cached.
+
+    Returns:
+        The published copy, or None if the entry imports no base
+
+    """
+    base_path = get_entry_base(theme_name)
+    if base_path is None or not base_path.read_text(encoding="utf-8").strip():
+        return None
+    target = notebook_dir / PUBLIC_DIR / base_path.name
+    if not target.exists():
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(f".{target.name}.tmp")
+        shutil.copyfile(base_path, tmp)
+        tmp.replace(target)
+    return target
+
+
+def _remove_unused_bases(shared_dir: Path) -> None:
+    """Remove base files that no entry was built from any more."""
+    used = {
+        _entry_base(entry) for entry in shared_dir.glob(f"*{ENTRY_SUFFIX}")
+    }
+    for base in shared_dir.glob(f"{BASE_PREFIX}*.css"):
+        if base.name not in used:
+            base.unlink(missing_ok=True)
+
+
+def build_shared_base(theme_names: list[str] | None = None) -> Path | None:
+    """
+    Factor the declarations common to themes into a shared base file.
+
+    Writes ``base-<hash>.css`` and a ``<theme>.entry.css`` per theme
+    holding an ``@import`` of the base followed by only the theme's own
+    declarations. Base files are named by content, so they never change
+    once written; ``publish_base`` copies them next to notebooks.
+
+    Args:
+        theme_names: Themes to include, all themes on the search path by
+            default
+
+    Returns:
+        The base file, or None on error
+
+    """
+    index = get_theme_index()
+    names = theme_names or list(index)
+    unknown = [name for name in names if name not in index]
+    if unknown:
+        print(f"Error: Unknown theme(s): {', '.join(unknown)}")
+        return None
+    if not names:
+        print("Error: No themes installed.")
+        return None
+
+    sources = {
+        name: index[name].path.read_text(encoding="utf-8") for name in names
+    }
+    base, deltas = factor_themes(
+        {name: parse_css_units(css) for name, css in sources.items()}
+    )
+    if not base:
+        print("Note: The themes share no declarations; try fewer themes.")
+    base_css = format_units(base)
+    digest = hashlib.sha256(base_css.encode("utf-8")).hexdigest()
+    shared_dir = get_shared_dir()
+    base_path = shared_dir / f"{BASE_PREFIX}{digest[:16]}.css"
+    if not base_path.exists():
+        atomic_write(base_path, base_css)
+    imports = (
+        [
+            CssUnit(
+                STATEMENT,
+                None,
+                BASE_IMPORT.format(public=PUBLIC_DIR, base=base_path.name),
+            )
+        ]
+        if base
+        else []
+    )
+
+    written = 0
+    for name, delta in deltas.items():
+        header = ENTRY_HEADER.format(
+            theme=name,
+            digest=hash_file(index[name].path),
+            base=base_path.name,
+        )
+        # marimo inlines the css_file into the page, so the import
+        # resolves against the page URL, where public/ is served
+        entry = header + format_units(imports + delta)
+        written += _write_if_changed(get_entry_path(name), entry)
+    _remove_unused_bases(shared_dir)
+
+    print(
+        f"Built {base_path} with {len(base)} rule(s) shared by "
+        f"{len(names)} theme(s); updated {written} entry file(s)."
+    )
+    return base_path
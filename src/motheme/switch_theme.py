@@ -0,0 +1,121 @@
+"""Switch the project-wide active theme alias."""
+
+from __future__ import annotations
+
+import os
+from typing import TYPE_CHECKING
+
+from .html_head import HEAD_SUFFIX, write_head_file
+from .util import (
+    PROJECT_DIR_NAME,
+    atomic_write,
+    find_project_root,
+    get_themes_dir,
+    hash_file,
+    validate_theme_exists,
+)
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+ACTIVE_THEME_FILE = "active.css"
+ACTIVE_THEME_MARKER = "/* motheme active theme: "
+ACTIVE_HEAD_FILE = f"active{HEAD_SUFFIX}"
+
+
+def get_active_theme_path(project_root: Path | None = None) -> Path:
+    """Get the path of the project's active theme alias."""
+    root = project_root or find_project_root()
+    return root / PROJECT_DIR_NAME / ACTIVE_THEME_FILE
+
+
+def get_active_head_path(project_root: Path | None = None) -> Path:
+    """Get the path of the html_head_file that follows the active theme."""
+    return get_active_theme_path(project_root).with_name(ACTIVE_HEAD_FILE)
+
+
+def is_active_theme_path(css_path: Path) -> bool:
+    """Check whether a css_file path points at an active theme alias."""
+    return (
+        css_path.name == ACTIVE_THEME_FILE
+        and css_path.parent.name == PROJECT_DIR_NAME
+    )
+
+
+def resolve_active_theme(alias_path: Path) -> str | None:
+    """
+    Get the theme name an active theme alias currently points at.
+
+    Returns None if the alias does not exist.
+    """
+    if alias_path.is_symlink():
+        return alias_path.readlink().stem
+    try:
+        with alias_path.open("r", encoding="utf-8") as f:
+            first_line = f.readline()
+    except OSError:
+        return None
+    if first_line.startswith(ACTIVE_THEME_MARKER):
+        return first_line[len(ACTIVE_THEME_MARKER) :].split()[0]
+    return alias_path.stem
+
+
+def _copy_alias(alias_path: Path, theme_name: str, css: Path) -> None:
+    """Write the alias as a copy of a theme, headed by its name and digest."""
+    content = css.read_text(encoding="utf-8")
+    header = f"{ACTIVE_THEME_MARKER}{theme_name} sha256 {hash_file(css)} */"
+    atomic_write(alias_path, f"{header}\n{content}")
+
+
+def _retarget_alias(alias_path: Path, theme_name: str, css: Path) -> None:
+    """
+    Atomically point the alias at a theme.
+
+    Themes inside the project are linked relatively, so the link keeps
+    working wherever the project is checked out. Other themes live in
+    one user's or machine's directories, so the alias is a copy of them
+    instead; ``switch`` again to pick up changes to the theme.
+    """
+    project_dir = alias_path.parent.resolve()
+    if not css.is_relative_to(project_dir):
+        _copy_alias(alias_path, theme_name, css)
+        return
+    tmp_link = alias_path.with_name(f".{alias_path.name}.{os.getpid()}")
+    try:
+        tmp_link.unlink(missing_ok=True)
+        tmp_link.symlink_to(os.path.relpath(css, project_dir))
+        tmp_link.replace(alias_path)
+    except OSError:
+        # Symlinks need extra privileges on Windows; fall back to a copy
+        tmp_link.unlink(missing_ok=True)
+        _copy_alias(alias_path, theme_name, css)
+
+
+def switch_theme(theme_name: str) -> Path | None:
+    """
+    Point the project's active theme alias at a theme.
+
+    Notebooks themed with ``apply --alias`` reference the alias instead
+    of a theme file, so switching them all is a single file operation.
+
+    Args:
+        theme_name: Name of the theme to activate
+
+    Returns:
+        Path: The active theme alias, or None if the theme does not exist
+
+    """
+    try:
+        css_file_path = validate_theme_exists(theme_name, get_themes_dir())
+    except FileNotFoundError:
+        return None
+
+    alias_path = get_active_theme_path()
+    alias_path.parent.mkdir(parents=True, exist_ok=True)
+    _retarget_alias(alias_path, theme_name, css_file_path.resolve())
+    head_path = get_active_head_path()
+    if head_path.exists():
+        write_head_file(theme_name, css_file_path, head_path, always=True)
+
+    print(f"Active theme is now {theme_name} ({alias_path})")
+    return alias_path
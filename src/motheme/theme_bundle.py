@@ -0,0 +1,332 @@
+"""Install themes from offline sources and pack them into bundles."""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import io
+import tarfile
+import tempfile
+import zipfile
+from pathlib import Path, PurePosixPath
+from shutil import copyfile
+from typing import TYPE_CHECKING, BinaryIO
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+
+from .util import get_themes_dir, hash_file, staged_themes
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+CHUNK_SIZE = 64 * 1024
+CHECKSUM_FILE = "SHA256SUMS"
+TAR_SUFFIXES = (".tar.gz", ".tgz")
+ZIP_SUFFIXES = (".zip",)
+
+
+class _HashingReader(io.RawIOBase):
+    """File wrapper that hashes every byte read through it."""
+
+    def __init__(self, raw: BinaryIO) -> None:
+        self.raw = raw
+        self.digest = hashlib.sha256()
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: bytearray | memoryview) -> int:
+        data = self.raw.read(len(buffer))
+        self.digest.update(data)
+        buffer[: len(data)] = data
+        return len(data)
+
+    def drain(self) -> str:
+        """Read whatever is left and return the final hex digest."""
+        while self.raw.read(CHUNK_SIZE):
+            pass
+        return self.digest.hexdigest()
+
+
+def member_theme_name(member: str) -> str | None:
+    """
+    Return the theme name for an archive or directory member.
+
+    Accepts flat ``name.css`` files and the repository layout
+    ``[prefix/]themes/name/name.css``; anything else is ignored.
+    """
+    path = PurePosixPath(member)
+    if path.suffix != ".css":
+        return None
+    parent = path.parent.name
+    if parent in ("", "themes") or parent == path.stem:
+        return path.stem
+    return None
+
+
+def _parse_checksums(text: str) -> dict[str, str]:
+    """Parse ``sha256sum`` output into a theme name -> digest mapping."""
+    checksums = {}
+    for line in text.splitlines():
+        digest, _, member = line.strip().partition("  ")
+        name = member_theme_name(member)
+        if name:
+            checksums[name] = digest.lower()
+    return checksums
+
+
+def resolve_source(source: str) -> Path:
+    """Turn a local path or ``file://`` URL into a filesystem path."""
+    parsed = urlparse(source)
+    if parsed.scheme == "file":
+        return Path(url2pathname(parsed.path))
+    return Path(source).expanduser()
+
+
+def _iter_dir(source: Path) -> Iterator[tuple[str, str, bytes]]:
+    """Yield ``(member, theme_name, content)`` for themes in a directory."""
+    if (source / "themes").is_dir():
+        source = source / "themes"
+    for path in sorted(source.glob("*.css")) + sorted(source.glob("*/*.css")):
+        member = path.relative_to(source).as_posix()
+        name = member_theme_name(member)
+        if name:
+            yield member, name, path.read_bytes()
+    checksum_path = source / CHECKSUM_FILE
+    if checksum_path.exists():
+        yield CHECKSUM_FILE, "", checksum_path.read_bytes()
+
+
+def _iter_tar(archive: BinaryIO) -> Iterator[tuple[str, str, bytes]]:
+    """Yield theme members from a tar stream without seeking."""
+    with tarfile.open(fileobj=archive, mode="r|*") as tar:
+        for member in tar:
+            if not member.isfile():
+                continue
+            is_checksum = PurePosixPath(member.name).name == CHECKSUM_FILE
+            name = member_theme_name(member.name)
+            if name or is_checksum:
+                f = tar.extractfile(member)
+                if f is not None:
+                    yield member.name, name or "", f.read()
+
+
+def _iter_zip(archive: Path) -> Iterator[tuple[str, str, bytes]]:
+    """Yield theme members from a zip archive one at a time."""
+    with zipfile.ZipFile(archive) as zf:
+        for info in zf.infolist():
+            if info.is_dir():
+                continue
+            is_checksum = PurePosixPath(info.filename).name == CHECKSUM_FILE
+            name = member_theme_name(info.filename)
+            if name or is_checksum:
+                yield info.filename, name or "", zf.read(info)
+
+
+def _stage_members(
+    members: Iterator[tuple[str, str, bytes]], staging_dir: Path
+) -> tuple[dict[str, Path], dict[str, str] | None]:
+    """
+    Write theme members into the staging directory.
+
+    The checksums are None if the source has no checksum file.
+    """
+    staged = {}
+    checksums = None
+    for _, name, content in members:
+        if not name:
+            checksums = {
+                **(checksums or {}),
+                **_parse_checksums(content.decode("utf-8")),
+            }
+            continue
+        path = staging_dir / f"{name}.css"
+        path.write_bytes(content)
+        staged[name] = path
+    return staged, checksums
+
+
+def _verify_checksums(
+    staged: dict[str, Path], checksums: dict[str, str] | None
+) -> bool:
+    """
+    Check staged themes against the source's checksum file.
+
+    Once a source has a checksum file, every theme must be listed in it
+    with a matching digest. Problems are printed.
+
+    Returns:
+        bool: True if the themes can be installed
+
+    """
+    if checksums is None:
+        return True
+    problems = {
+        "Checksum mismatch for themes:": [
+            name
+            for name, path in staged.items()
+            if name in checksums and hash_file(path) != checksums[name]
+        ],
+        f"{CHECKSUM_FILE} does not list themes:": [
+            name for name in staged if name not in checksums
+        ],
+    }
+    for message, names in problems.items():
+        if names:
+            print(f"Error: {message}")
+            for name in names:
+                print(f"- {name}")
+    return not any(problems.values())
+
+
+def _stage_source(
+    source_path: Path, staging_dir: Path, sha256: str | None
+) -> tuple[dict[str, Path], dict[str, str] | None, str | None]:
+    """
+    Stage themes from a source and return them with the archive digest.
+
+    Raises:
+        ValueError: If the source is not a directory or supported archive.
+
+    """
+    if source_path.is_dir():
+        if sha256:
+            msg = "--sha256 can only be used with bundle archives."
+            raise ValueError(msg)
+        return (*_stage_members(_iter_dir(source_path), staging_dir), None)
+
+    if source_path.name.endswith(TAR_SUFFIXES):
+        with source_path.open("rb") as f:
+            reader = _HashingReader(f)
+            staged = _stage_members(
+                _iter_tar(io.BufferedReader(reader, CHUNK_SIZE)),
+                staging_dir,
+            )
+            return (*staged, reader.drain())
+
+    if source_path.name.endswith(ZIP_SUFFIXES):
+        # Zip needs random access, so hash before extracting anything
+        digest = hash_file(source_path)
+        if sha256 and digest != sha256.lower():
+            return {}, None, digest
+        return (*_stage_members(_iter_zip(source_path), staging_dir), digest)
+
+    msg = (
+        f"Unsupported theme source {source_path}. "
+        "Expected a directory, .tar.gz, .tgz or .zip file."
+    )
+    raise ValueError(msg)
+
+
+def install_themes(source: str, sha256: str | None = None) -> Path | None:
+    """
+    Install themes from a local directory, ``file://`` URL or bundle.
+
+    Args:
+        source: Directory, ``file://`` URL, ``.tar.gz``/``.tgz`` or
+            ``.zip`` bundle containing theme CSS files
+        sha256: Expected sha256 hex digest of the bundle archive
+
+    Returns:
+        Path: Local directory where themes are stored, or None on error
+
+    """
+    source_path = resolve_source(source)
+    if not source_path.exists():
+        print(f"Error: Theme source {source_path} does not exist.")
+        return None
+
+    themes_dir = get_themes_dir()
+    with tempfile.TemporaryDirectory(prefix="motheme-") as tmp:
+        try:
+            staged, checksums, digest = _stage_source(
+                source_path, Path(tmp), sha256
+            )
+        except ValueError as e:
+            print(f"Error: {e}")
+            return None
+        except (OSError, tarfile.TarError, zipfile.BadZipFile) as e:
+            print(f"Error reading theme source {source_path}: {e}")
+            return None
+
+        if sha256 and digest != sha256.lower():
+            print(
+                f"Error: Checksum mismatch for {source_path}: "
+                f"expected {sha256.lower()}, got {digest}."
+            )
+            return None
+
+        if not _verify_checksums(staged, checksums):
+            return None
+
+        with staged_themes(themes_dir) as staging_dir:
+            for name, path in staged.items():
+                copyfile(path, staging_dir / f"{name}.css")
+        for name in sorted(staged):
+            print(f"Installed: {themes_dir / f'{name}.css'}")
+
+    if not staged:
+        print(f"No themes found in {source_path}.")
+    return themes_dir
+
+
+def _bundle_members(themes_dir: Path) -> list[tuple[str, bytes]]:
+    """Collect bundle members in the repository layout, sorted by name."""
+    members = []
+    checksum_lines = []
+    for theme in sorted(themes_dir.glob("*.css")):
+        member = f"themes/{theme.stem}/{theme.name}"
+        content = theme.read_bytes()
+        members.append((member, content))
+        digest = hashlib.sha256(content).hexdigest()
+        checksum_lines.append(f"{digest}  {member}\n")
+    members.append((CHECKSUM_FILE, "".join(checksum_lines).encode("utf-8")))
+    return members
+
+
+def create_bundle(output: str = "motheme-themes.tar.gz") -> Path | None:
+    """
+    Pack the installed themes into an archive for offline installs.
+
+    The archive is reproducible: the same themes always produce the same
+    bytes, so its digest can be published alongside it.
+
+    Args:
+        output: Path of the ``.tar.gz``/``.tgz`` or ``.zip`` archive
+
+    Returns:
+        Path: The written archive, or None on error
+
+    """
+    output_path = Path(output)
+    members = _bundle_members(get_themes_dir())
+    if len(members) == 1:
+        print("No themes installed. Run 'motheme update' first.")
+        return None
+
+    if output_path.name.endswith(TAR_SUFFIXES):
+        with (
+            output_path.open("wb") as raw,
+            gzip.GzipFile(filename="", mode="wb", fileobj=raw, mtime=0) as gz,
+            tarfile.open(fileobj=gz, mode="w") as tar,
+        ):
+            for member, content in members:
+                info = tarfile.TarInfo(member)
+                info.size = len(content)
+                info.mode = 0o644
+                tar.addfile(info, io.BytesIO(content))
+    elif output_path.name.endswith(ZIP_SUFFIXES):
+        with zipfile.ZipFile(output_path, "w", zipfile.ZIP_DEFLATED) as zf:
+            for member, content in members:
+                zf.writestr(
+                    zipfile.ZipInfo(member),
+                    content,
+                    compress_type=zipfile.ZIP_DEFLATED,
+                )
+    else:
+        print("Error: Bundle name must end with .tar.gz, .tgz or .zip.")
+        return None
+
+    print(f"Bundled {len(members) - 1} theme(s) into {output_path}")
+    print(f"sha256: {hash_file(output_path)}")
+    return output_path
@@ -7,11 +7,14 @@ from typing import TYPE_CHECKING
 
 import requests
 
-from .util import get_themes_dir
+from .util import get_themes_dir, staged_themes
 
 if TYPE_CHECKING:
+    from collections.abc import Iterator
     from pathlib import Path
 
+DEFAULT_REPO_URL = "https://github.com/metaboulie/marimo-themes"
+
 
 def _get_api_url(repo_url: str) -> str:
     """Convert GitHub repo URL to API URL."""
@@ -20,11 +23,8 @@ def _get_api_url(repo_url: str) -> str:
     )
 
 
-def _download_theme(
-    api_base_url: str, theme_folder: dict, themes_dir: Path
-) -> None:
-    """Download a single theme CSS file."""
-    theme_name = theme_folder["name"]
+def _fetch_theme(api_base_url: str, theme_name: str) -> str:
+    """Fetch the CSS of a single theme."""
     css_file_url = (
         f"{api_base_url}/contents/themes/{theme_name}/{theme_name}.css"
     )
@@ -32,20 +32,66 @@ def _download_theme(
     css_response = requests.get(css_file_url, timeout=10)
     css_response.raise_for_status()
 
-    css_content = base64.b64decode(css_response.json()["content"]).decode(
-        "utf-8"
-    )
+    return base64.b64decode(css_response.json()["content"]).decode("utf-8")
+
+
+def fetch_themes(
+    repo_url: str = DEFAULT_REPO_URL,
+) -> Iterator[tuple[str, str]]:
+    """
+    Fetch theme CSS from a GitHub repository without writing anything.
+
+    Args:
+        repo_url: GitHub repository URL
+
+    Yields:
+        Tuples of (theme_name, css_content)
+
+    Raises:
+        requests.RequestException: If a request fails.
+
+    """
+    api_base_url = _get_api_url(repo_url)
+    response = requests.get(f"{api_base_url}/contents/themes", timeout=10)
+    response.raise_for_status()
+
+    for theme_folder in response.json():
+        if theme_folder["type"] == "dir":
+            theme_name = theme_folder["name"]
+            yield theme_name, _fetch_theme(api_base_url, theme_name)
+
 
+def _write_theme(themes_dir: Path, theme_name: str, css_content: str) -> Path:
+    """Write a theme's CSS into a (staging) themes directory."""
     css_path = themes_dir / f"{theme_name}.css"
-    with css_path.open("w") as f:
+    with css_path.open("w", encoding="utf-8") as f:
         f.write(css_content)
+    return css_path
 
-    print(f"Downloaded: {css_path}")
 
+def install_remote_themes(repo_url: str = DEFAULT_REPO_URL) -> list[Path]:
+    """
+    Download themes into the themes directory without printing.
+
+    Nothing is installed unless every theme downloads successfully.
+
+    Returns:
+        List of the written theme files
+
+    Raises:
+        requests.RequestException: If a request fails.
 
-def download_themes(
-    repo_url: str = "https://github.com/metaboulie/marimo-themes",
-) -> Path | None:
+    """
+    themes_dir = get_themes_dir()
+    with staged_themes(themes_dir) as staging_dir:
+        names = [
+            _write_theme(staging_dir, theme_name, css_content).name
+            for theme_name, css_content in fetch_themes(repo_url)
+        ]
+    return [themes_dir / name for name in names]
+
+
+def download_themes(repo_url: str = DEFAULT_REPO_URL) -> Path | None:
     """
     Download Marimo themes CSS files from GitHub repository.
 
@@ -57,20 +103,12 @@ def download_themes(
 
     """
     themes_dir = get_themes_dir()
-    api_base_url = _get_api_url(repo_url)
-    themes_api_url = f"{api_base_url}/contents/themes"
-
     try:
-        response = requests.get(themes_api_url, timeout=10)
-        response.raise_for_status()
-        theme_folders = response.json()
-
-        for theme_folder in theme_folders:
-            if theme_folder["type"] == "dir":
-                _download_theme(api_base_url, theme_folder, themes_dir)
-
+        css_paths = install_remote_themes(repo_url)
     except requests.RequestException as e:
         print(f"Error downloading themes: {e}")
         return None
 
+    for css_path in css_paths:
+        print(f"Downloaded: {css_path}")
     return themes_dir
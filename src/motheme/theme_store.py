@@ -0,0 +1,345 @@
+"""Content-addressed theme store and per-project theme lockfile."""
+
+from __future__ import annotations
+
+import json
+import re
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import appdirs
+
+from .api import read_files
+from .switch_theme import is_active_theme_path, resolve_active_theme
+from .util import (
+    PROJECT_DIR_NAME,
+    atomic_write,
+    find_project_root,
+    get_theme_index,
+    get_themes_dir,
+    hash_file,
+    theme_name_for,
+    validate_theme_exists,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+LOCK_FILE = "motheme.lock"
+LOCK_VERSION = 1
+REFS_FILE = "refs.json"
+
+_DIGEST = re.compile(r"[0-9a-f]{64}")
+
+
+def get_store_dir() -> Path:
+    """Get the directory holding theme CSS files named by their hash."""
+    store_dir = Path(appdirs.user_data_dir("mtheme", "marimo")) / "store"
+    store_dir.mkdir(parents=True, exist_ok=True)
+    return store_dir
+
+
+def get_project_store_dir(project_root: Path | None = None) -> Path:
+    """Get the project's copies of the stored themes its notebooks pin."""
+    root = project_root or find_project_root()
+    return root / PROJECT_DIR_NAME / "store"
+
+
+def materialize_stored(
+    digest: str, project_root: Path | None = None
+) -> Path | None:
+    """
+    Get the project's copy of stored content, copying it if needed.
+
+    Pinned notebooks reference the project copy relative to themselves,
+    so the reference holds in every checkout; a checkout without the
+    copy gets it from the user store.
+
+    Returns:
+        Path: The project copy, or None if no store has the digest
+
+    """
+    project_path = get_project_store_dir(project_root) / f"{digest}.css"
+    if project_path.exists():
+        return project_path
+    stored_path = get_store_dir() / f"{digest}.css"
+    if not stored_path.exists():
+        return None
+    project_path.parent.mkdir(parents=True, exist_ok=True)
+    atomic_write(project_path, stored_path.read_bytes())
+    project_path.chmod(0o444)
+    return project_path
+
+
+def read_refs() -> dict[str, str]:
+    """Read the theme name -> latest stored digest mapping."""
+    try:
+        return json.loads((get_store_dir() / REFS_FILE).read_text("utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def store_theme(theme_name: str, css_path: Path) -> Path:
+    """
+    Add a theme's current content to the store.
+
+    Stored files are immutable: content that is already stored is not
+    written again, so the same digest always maps to the same bytes.
+
+    Returns:
+        Path: The stored file, named ``<sha256>.css``
+
+    """
+    digest = hash_file(css_path)
+    stored_path = get_store_dir() / f"{digest}.css"
+    if not stored_path.exists():
+        atomic_write(stored_path, css_path.read_bytes())
+        stored_path.chmod(0o444)
+
+    refs = read_refs()
+    if refs.get(theme_name) != digest:
+        refs[theme_name] = digest
+        atomic_write(
+            get_store_dir() / REFS_FILE,
+            json.dumps(refs, indent=2, sort_keys=True) + "\n",
+        )
+    return stored_path
+
+
+def stored_digest(css_path: Path) -> str | None:
+    """Get the digest if a css_file path points into the store."""
+    if css_path.parent.name == "store" and _DIGEST.fullmatch(css_path.stem):
+        return css_path.stem
+    return None
+
+
+def _stored_name(digest: str) -> str | None:
+    """Get the theme a digest was stored for, from the refs or the lock."""
+    names = [name for name, ref in read_refs().items() if ref == digest]
+    if not names:
+        try:
+            locked = read_lock(get_lock_path())
+        except ValueError:
+            locked = {}
+        names = [name for name, ref in locked.items() if ref == digest]
+    return names[0] if names else None
+
+
+def describe_stored(css_path: Path) -> str | None:
+    """Describe a stored theme path as ``name@digest``, if it is one."""
+    digest = stored_digest(css_path)
+    if digest is None:
+        return None
+    return f"{_stored_name(digest) or 'unknown'}@{digest[:12]}"
+
+
+def get_lock_path(project_root: Path | None = None) -> Path:
+    """Get the project's lockfile path."""
+    return (project_root or find_project_root()) / LOCK_FILE
+
+
+def read_lock(lock_path: Path) -> dict[str, str]:
+    """
+    Read the theme name -> digest entries of a lockfile.
+
+    A missing lockfile has no entries.
+
+    Raises:
+        ValueError: If the lockfile is not valid JSON or not shaped like
+            ``{"themes": {name: {"sha256": digest}}}``.
+
+    """
+    try:
+        text = lock_path.read_text(encoding="utf-8")
+    except OSError:
+        return {}
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError as e:
+        msg = f"Invalid lockfile {lock_path}: {e}"
+        raise ValueError(msg) from None
+    themes = data.get("themes", {}) if isinstance(data, dict) else None
+    if not isinstance(themes, dict) or not all(
+        isinstance(entry, dict)
+        and isinstance(entry.get("sha256"), str)
+        and _DIGEST.fullmatch(entry["sha256"])
+        for entry in themes.values()
+    ):
+        msg = (
+            f"Invalid lockfile {lock_path}: expected "
+            '{"themes": {name: {"sha256": digest}}}'
+        )
+        raise ValueError(msg)
+    return {name: entry["sha256"] for name, entry in themes.items()}
+
+
+def write_lock(lock_path: Path, themes: dict[str, str]) -> None:
+    """Write a lockfile with sorted entries so diffs stay minimal."""
+    data = {
+        "version": LOCK_VERSION,
+        "themes": {
+            name: {"sha256": digest} for name, digest in sorted(themes.items())
+        },
+    }
+    atomic_write(lock_path, json.dumps(data, indent=2) + "\n")
+
+
+def update_lock(themes: dict[str, str]) -> Path:
+    """
+    Add or update entries in the project's lockfile.
+
+    Raises:
+        ValueError: If the existing lockfile is invalid.
+
+    """
+    lock_path = get_lock_path()
+    write_lock(lock_path, {**read_lock(lock_path), **themes})
+    return lock_path
+
+
+def pin_theme(theme_name: str) -> Path | None:
+    """
+    Get the immutable stored file a notebook should be pinned to.
+
+    A theme already recorded in motheme.lock is pinned to the locked
+    content, taken from a store or from the installed theme if it still
+    matches; a locked digest is never replaced. A theme not in the lock
+    is stored and recorded. Either way the notebook is pinned to the
+    project's copy of the content.
+
+    Returns:
+        Path: The project's stored theme file, or None if the theme is
+            unavailable, the locked content cannot be found or the
+            lockfile is invalid
+
+    """
+    try:
+        locked = read_lock(get_lock_path()).get(theme_name)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return None
+    if locked is not None and (stored := materialize_stored(locked)):
+        return stored
+    try:
+        css_path = validate_theme_exists(theme_name, get_themes_dir())
+    except FileNotFoundError:
+        return None
+    digest = hash_file(css_path)
+    if locked is not None and digest != locked:
+        print(
+            f"Error: motheme.lock pins {theme_name} @ {locked[:12]}, which "
+            "no store has, and the installed theme is "
+            f"{digest[:12]}. Install the locked version, or remove "
+            f"{theme_name} from motheme.lock to lock the installed one."
+        )
+        return None
+    store_theme(theme_name, css_path)
+    if locked is None:
+        update_lock({theme_name: digest})
+    return materialize_stored(digest)
+
+
+def resolve_theme_ref(file_name: str, css_file: str) -> tuple[str, str | None]:
+    """Get (theme_name, pinned_digest) for a notebook's css_file."""
+    css_path = Path(css_file)
+    digest = stored_digest(css_path)
+    if digest is not None:
+        return _stored_name(digest) or digest, digest
+    if is_active_theme_path(css_path):
+        alias_path = Path(file_name).parent / css_path
+        return (
+            resolve_active_theme(alias_path) or theme_name_for(css_path),
+            None,
+        )
+    return theme_name_for(css_path), None
+
+
+def lock_themes(files: Iterable[str]) -> Path | None:
+    """
+    Record the hash of every theme used by notebooks in motheme.lock.
+
+    Each distinct theme is hashed once, however many notebooks use it,
+    and its content is added to the store so it can be pinned later.
+
+    Args:
+        files: Marimo notebook files to scan
+
+    Returns:
+        Path: The lockfile, or None if no themed notebooks were found
+
+    """
+    used: dict[str, str | None] = {}
+    for result in read_files(files):
+        if result.css_file is not None:
+            name, digest = resolve_theme_ref(result.path, result.css_file)
+            if used.get(name) is None:
+                used[name] = digest
+
+    index = get_theme_index()
+    locked = {}
+    for name, pinned in sorted(used.items()):
+        if pinned is not None:
+            locked[name] = pinned
+            continue
+        location = index.get(name)
+        if location is None:
+            print(f"Warning: Theme {name} is not installed, skipping")
+            continue
+        locked[name] = store_theme(name, location.path).stem
+
+    if not locked:
+        print("No themed notebooks found.")
+        return None
+
+    try:
+        lock_path = update_lock(locked)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return None
+    for name, digest in locked.items():
+        print(f"Locked {name} @ {digest[:12]}")
+    print(f"\nWrote {lock_path}")
+    return lock_path
+
+
+def verify_lock() -> bool:
+    """
+    Check the project's lockfile against the installed themes.
+
+    Each locked theme costs one index lookup and one hash of the
+    installed file, independent of how many notebooks use it.
+
+    Returns:
+        bool: True if every locked theme matches the installed content
+
+    """
+    lock_path = get_lock_path()
+    try:
+        locked = read_lock(lock_path)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return False
+    if not locked:
+        print(f"No themes locked in {lock_path}.")
+        return True
+
+    index = get_theme_index()
+    store_dir = get_store_dir()
+    ok = True
+    for name, digest in locked.items():
+        location = index.get(name)
+        if location is not None and hash_file(location.path) == digest:
+            print(f"OK       {name} @ {digest[:12]}")
+            continue
+        ok = False
+        state = "MISSING " if location is None else "CHANGED "
+        stored = (store_dir / f"{digest}.css").exists()
+        hint = " (locked content is in the store)" if stored else ""
+        print(f"{state} {name} @ {digest[:12]}{hint}")
+
+    if not ok:
+        print(
+            "\nInstalled themes differ from motheme.lock. Use "
+            "'motheme apply --pin' to pin notebooks to the locked content."
+        )
+    return ok
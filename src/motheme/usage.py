@@ -0,0 +1,239 @@
+"""Report which themes notebooks use and remove the unused ones."""
+
+from __future__ import annotations
+
+import json
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import appdirs
+
+from .api import FileResult, read_files
+from .marimo_config import get_default_theme
+from .remove_theme import remove_theme_files
+from .switch_theme import get_active_theme_path, resolve_active_theme
+from .theme_store import get_lock_path, read_lock, resolve_theme_ref
+from .util import atomic_write, get_theme_index, theme_name_for
+
+if TYPE_CHECKING:
+    import os
+    from collections.abc import Iterable, Iterator
+
+    from .report import Report
+
+SCAN_CACHE_FILE = "usage-cache.json"
+
+
+@dataclass
+class ThemeUsage:
+    """Which notebooks use each theme, from one scan of the files."""
+
+    themes: dict[str, list[str]] = field(
+        default_factory=lambda: defaultdict(list)
+    )
+    unthemed: list[str] = field(default_factory=list)
+    errors: dict[str, str] = field(default_factory=dict)
+
+    @property
+    def scanned(self) -> int:
+        """Get the number of notebooks scanned."""
+        themed = sum(len(files) for files in self.themes.values())
+        return themed + len(self.unthemed) + len(self.errors)
+
+    def by_directory(self, theme_name: str) -> dict[str, int]:
+        """Count a theme's notebooks per directory, most used first."""
+        counts: dict[str, int] = defaultdict(int)
+        for file in self.themes.get(theme_name, []):
+            counts[str(Path(file).parent)] += 1
+        return dict(sorted(counts.items(), key=lambda c: (-c[1], c[0])))
+
+
+def get_scan_cache_path() -> Path:
+    """Get the file caching the css_file of scanned notebooks."""
+    cache_dir = Path(appdirs.user_cache_dir("mtheme", "marimo"))
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir / SCAN_CACHE_FILE
+
+
+def _load_scan_cache(cache_path: Path) -> dict[str, list]:
+    """Load cached scan results keyed by absolute notebook path."""
+    try:
+        return json.loads(cache_path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def scan_files(paths: Iterable[str]) -> Iterator[FileResult]:
+    """
+    Read the css_file of each notebook, reusing results for unchanged files.
+
+    Results are cached by path, modification time and size, so repeated
+    scans of a large tree only parse the notebooks that changed.
+    """
+    cache_path = get_scan_cache_path()
+    cache = _load_scan_cache(cache_path)
+    stale: dict[str, os.stat_result] = {}
+    for path in paths:
+        key = str(Path(path).absolute())
+        try:
+            stat = Path(path).stat()
+        except OSError as e:
+            yield FileResult(path, "error", error=str(e))
+            continue
+        cached = cache.get(key)
+        if cached and cached[:2] == [stat.st_mtime_ns, stat.st_size]:
+            status, css_file = cached[2:]
+            theme = theme_name_for(css_file) if css_file else None
+            yield FileResult(path, status, theme, css_file)
+        else:
+            stale[path] = stat
+
+    for result in read_files(stale):
+        if result.status != "error":
+            stat = stale[result.path]
+            cache[str(Path(result.path).absolute())] = [
+                stat.st_mtime_ns,
+                stat.st_size,
+                result.status,
+                result.css_file,
+            ]
+        yield result
+
+    if stale:
+        atomic_write(cache_path, json.dumps(cache))
+
+
+def scan_usage(files: Iterable[str]) -> ThemeUsage:
+    """
+    Find the theme each notebook uses, in a single pass over the files.
+
+    Notebooks without a css_file count towards the theme they inherit
+    from pyproject.toml or the user marimo configuration, if any.
+    """
+    usage = ThemeUsage()
+    for result in scan_files(files):
+        if result.status == "error":
+            usage.errors[result.path] = result.error or ""
+        elif result.css_file is not None:
+            name, _ = resolve_theme_ref(result.path, result.css_file)
+            usage.themes[name].append(result.path)
+        elif default_theme := get_default_theme(result.path):
+            usage.themes[default_theme[0]].append(result.path)
+        else:
+            usage.unthemed.append(result.path)
+    return usage
+
+
+def theme_usage(files: list[str], *, report: Report | None = None) -> None:
+    """
+    Print how many notebooks use each theme, rolled up per directory.
+
+    Args:
+        files: List of Marimo notebook files to scan
+        report: Optional report to record each file's theme in
+
+    """
+    usage = scan_usage(files)
+    print(f"Theme usage across {usage.scanned} notebook(s):")
+    for name, theme_files in sorted(
+        usage.themes.items(), key=lambda t: (-len(t[1]), t[0])
+    ):
+        print(f"\n{name}: {len(theme_files)}")
+        for directory, count in usage.by_directory(name).items():
+            print(f"  {directory}: {count}")
+
+    unused = [name for name in get_theme_index() if name not in usage.themes]
+    if unused:
+        print(f"\nUnused themes: {', '.join(unused)}")
+    if usage.unthemed:
+        print(f"\n{len(usage.unthemed)} notebook(s) have no theme.")
+    for path, error in usage.errors.items():
+        print(f"Error processing {path}: {error}")
+
+    if report:
+        _add_to_report(usage, report)
+
+
+def _add_to_report(usage: ThemeUsage, report: Report) -> None:
+    """Record the theme of every scanned notebook in a report."""
+    for name, theme_files in usage.themes.items():
+        for file in theme_files:
+            report.add(file, "themed", name)
+    for file in usage.unthemed:
+        report.add(file, "no_theme")
+    for file in usage.errors:
+        report.add(file, "error")
+
+
+def _protected_themes() -> set[str]:
+    """
+    Get themes kept regardless of notebook usage.
+
+    Raises:
+        ValueError: If the project's lockfile is invalid.
+
+    """
+    protected = set(read_lock(get_lock_path()))
+    alias_path = get_active_theme_path()
+    if alias_path.exists() and (active := resolve_active_theme(alias_path)):
+        protected.add(active)
+    return protected
+
+
+def collect_garbage(
+    files: list[str], *, yes: bool = False, dry_run: bool = False
+) -> list[str]:
+    """
+    Remove user-installed themes that no scanned notebook references.
+
+    Themes in motheme.lock and the project's active theme are kept, and
+    themes outside the user themes directory (bundled, site, project or
+    ``$MOTHEME_PATH`` themes) are never removed.
+
+    Args:
+        files: Marimo notebook files whose themes must be kept
+        yes: Remove without asking for confirmation
+        dry_run: Only print the themes that would be removed
+
+    Returns:
+        The names of the unused themes
+
+    """
+    usage = scan_usage(files)
+    if usage.errors:
+        for path, error in usage.errors.items():
+            print(f"Error processing {path}: {error}")
+        print("Not removing anything because some notebooks were unreadable.")
+        return []
+    if usage.scanned == 0:
+        print(
+            "Not removing anything because no notebooks were scanned; "
+            "check the paths and filters given."
+        )
+        return []
+
+    try:
+        keep = set(usage.themes) | _protected_themes()
+    except ValueError as e:
+        print(f"Error: {e}")
+        print("Not removing anything because motheme.lock is unreadable.")
+        return []
+    unused = [
+        name
+        for name, location in get_theme_index().items()
+        if location.layer.name == "user" and name not in keep
+    ]
+    if not unused:
+        print(f"All installed themes are used by {usage.scanned} notebook(s).")
+        return []
+
+    if dry_run:
+        print("Would remove unused themes:")
+        for name in unused:
+            print(f"- {name}")
+        return unused
+
+    remove_theme_files(unused, yes=yes)
+    return unused
@@ -1,25 +1,98 @@
 """Utility functions."""
 
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
 import subprocess
-from collections.abc import Generator
+import sys
+import tempfile
 from contextlib import contextmanager, redirect_stdout
+from dataclasses import dataclass
+from functools import lru_cache
+from importlib.resources import files
 from io import StringIO
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 import appdirs
 
+from .io_limits import locality_order
+from .notebook_formats import classify_notebook, notebook_suffixes
+
+if sys.platform == "win32":
+    import msvcrt
+else:
+    import fcntl
+
+if TYPE_CHECKING:
+    from collections.abc import Generator
+
+
+THEME_PATH_ENV = "MOTHEME_PATH"
+PROJECT_DIR_NAME = ".motheme"
+PROJECT_MARKERS = (PROJECT_DIR_NAME, ".git", "pyproject.toml")
+THEMES_LOCK_FILE = ".lock"
+# Suffix of the entry stylesheets built by ``motheme build-base``
+ENTRY_SUFFIX = ".entry.css"
+
+
+@dataclass(frozen=True)
+class ThemeLayer:
+    """A directory on the theme search path."""
+
+    name: str
+    path: Path
+
+
+@dataclass(frozen=True)
+class ThemeLocation:
+    """Where a theme name resolved to on the search path."""
+
+    path: Path
+    layer: ThemeLayer
+
+
+def theme_name_for(css_file: str | Path) -> str:
+    """
+    Get the name of the theme a css_file refers to.
+
+    Shared base entries, ``<theme>.entry.css``, refer to their theme.
+    """
+    name = Path(css_file).name
+    if name.endswith(ENTRY_SUFFIX):
+        return name.removesuffix(ENTRY_SUFFIX)
+    return Path(name).stem
+
+
+def is_valid_theme_name(name: str) -> bool:
+    """
+    Check that a theme name can be used as a file name in a directory.
+
+    Names must not be empty, hidden, or contain path separators, so a
+    theme cannot be written outside the themes directory.
+    """
+    return (
+        bool(name)
+        and not name.startswith(".")
+        and not set(name) & set("/\\\0")
+    )
+
 
 def validate_theme_exists(theme_name: str, themes_dir: Path) -> Path:
     """Validate theme exists and return its path."""
+    location = get_theme_index().get(theme_name)
+    if location is not None:
+        return location.path
+
     css_file_path = themes_dir / f"{theme_name}.css"
-    if not css_file_path.exists():
-        print(f"Error: Theme file {css_file_path} does not exist.")
-        print("Available themes:")
-        for theme in themes_dir.glob("*.css"):
-            print(f"- {theme.stem}")
-        msg = f"Theme {theme_name} not found"
-        raise FileNotFoundError(msg)
-    return css_file_path
+    print(f"Error: Theme file {css_file_path} does not exist.")
+    print("Available themes:")
+    for theme in get_theme_index():
+        print(f"- {theme}")
+    msg = f"Theme {theme_name} not found"
+    raise FileNotFoundError(msg)
 
 
 def get_themes_dir() -> Path:
@@ -30,33 +103,205 @@ def get_themes_dir() -> Path:
     return themes_dir
 
 
-def is_marimo_file(path: str) -> bool:
+def find_project_root(start: Path | None = None) -> Path:
     """
-    Check if a file is a Marimo notebook.
+    Find the project root for a directory.
 
-    A file is considered a Marimo notebook if it:
-    1. Has .py extension
-    2. Has an exact 'import marimo' line
-    3. Creates a marimo.App instance
-    4. Contains at least one @app.cell decorator
+    The project root is the nearest ancestor containing a ``.motheme``
+    directory, a ``.git`` entry or a ``pyproject.toml``, falling back to
+    the starting directory itself.
     """
-    if not str(path).endswith(".py"):
-        return False
+    start = (start or Path.cwd()).resolve()
+    for directory in (start, *start.parents):
+        if any((directory / marker).exists() for marker in PROJECT_MARKERS):
+            return directory
+    return start
+
 
+@lru_cache(maxsize=1)
+def get_bundled_themes() -> dict[str, Path]:
+    """
+    Get the themes shipped inside the motheme package.
+
+    Returns:
+        Mapping of theme name to CSS path. Empty if the package was not
+        installed with its themes or is not on a real filesystem (e.g.
+        a zip import), since ``css_file`` needs a path on disk.
+
+    """
+    bundled_dir = files("motheme").joinpath("themes")
+    if not isinstance(bundled_dir, Path) or not bundled_dir.is_dir():
+        return {}
+    return {
+        css_path.stem: css_path
+        for css_path in sorted(bundled_dir.glob("*/*.css"))
+        if css_path.parent.name == css_path.stem
+    }
+
+
+def get_theme_search_path() -> list[ThemeLayer]:
+    """
+    Get the ordered theme search path, highest priority first.
+
+    The layers are the project ``.motheme/themes`` directory, the user
+    themes directory, each entry of ``$MOTHEME_PATH``, the site data
+    directories (``$XDG_DATA_DIRS`` on Linux) and finally the themes
+    bundled with the package. Directories that do not exist are skipped.
+    """
+    layers = [
+        ThemeLayer(
+            "project", find_project_root() / PROJECT_DIR_NAME / "themes"
+        ),
+        ThemeLayer("user", get_themes_dir()),
+    ]
+    layers.extend(
+        ThemeLayer("env", Path(entry))
+        for entry in os.environ.get(THEME_PATH_ENV, "").split(os.pathsep)
+        if entry
+    )
+    site_dirs = appdirs.site_data_dir("mtheme", "marimo", multipath=True)
+    layers.extend(
+        ThemeLayer("site", Path(entry) / "themes")
+        for entry in site_dirs.split(os.pathsep)
+        if entry
+    )
+    seen = set()
+    search_path = []
+    for layer in layers:
+        if layer.path not in seen and layer.path.is_dir():
+            seen.add(layer.path)
+            search_path.append(layer)
+    return search_path
+
+
+@lru_cache(maxsize=8)
+def _build_theme_index(
+    layers: tuple[ThemeLayer, ...],
+) -> dict[str, ThemeLocation]:
+    """Scan every layer once; earlier layers shadow later ones."""
+    index = {}
+    for layer in layers:
+        with os.scandir(layer.path) as entries:
+            for entry in entries:
+                name = entry.name.removesuffix(".css")
+                if name != entry.name and name not in index:
+                    index[name] = ThemeLocation(Path(entry.path), layer)
+    bundled = ThemeLayer("bundled", Path(__file__).parent / "themes")
+    for name, css_path in get_bundled_themes().items():
+        index.setdefault(name, ThemeLocation(css_path, bundled))
+    return dict(sorted(index.items()))
+
+
+def get_theme_index() -> dict[str, ThemeLocation]:
+    """
+    Get the index of every theme on the search path, sorted by name.
+
+    The index is built once per search path, so resolving a name is a
+    single dictionary lookup regardless of the number of layers. Call
+    ``invalidate_theme_index`` after changing any themes directory.
+    """
+    return _build_theme_index(tuple(get_theme_search_path()))
+
+
+def invalidate_theme_index() -> None:
+    """Drop the cached theme index so the next lookup rescans."""
+    _build_theme_index.cache_clear()
+
+
+def atomic_write(path: Path, content: str | bytes) -> None:
+    """
+    Write a file so readers see either the old or the new content.
+
+    The content is written to a temporary file in the same directory and
+    then renamed over the target, which is atomic on POSIX and Windows.
+    """
+    data = content.encode("utf-8") if isinstance(content, str) else content
+    fd, tmp_name = tempfile.mkstemp(
+        prefix=f".{path.name}.", suffix=".tmp", dir=path.parent
+    )
     try:
-        with Path(path).open("r", encoding="utf-8") as file:
-            lines = file.readlines()
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        Path(tmp_name).replace(path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
 
-            # Check for exact 'import marimo' line
-            has_exact_import = "import marimo\n" in lines
 
-            content = "".join(lines)
-            has_app = "marimo.App(" in content
-            has_cell = "@app.cell" in content
+def hash_file(path: Path, chunk_size: int = 64 * 1024) -> str:
+    """Return the sha256 hex digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
 
-            return has_exact_import and has_app and has_cell
-    except OSError:
-        return False
+
+@contextmanager
+def themes_lock(themes_dir: Path | None = None) -> Generator[None, None, None]:
+    """
+    Hold an exclusive advisory lock on a themes directory.
+
+    Processes changing the directory take this lock so their changes
+    serialize; readers never need it because every change is published
+    with an atomic rename. The lock is released when the process exits,
+    so a crashed writer cannot leave it held.
+    """
+    lock_path = (themes_dir or get_themes_dir()) / THEMES_LOCK_FILE
+    with lock_path.open("a+b") as f:
+        if sys.platform == "win32":
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    # LK_LOCK gives up after 10 seconds; keep waiting
+                    continue
+        else:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if sys.platform == "win32":
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+@contextmanager
+def staged_themes(
+    themes_dir: Path | None = None,
+) -> Generator[Path, None, None]:
+    """
+    Stage theme files and publish them atomically when the block succeeds.
+
+    CSS files written to the yielded staging directory are renamed into
+    the themes directory under ``themes_lock``, so readers see each
+    theme either entirely old or entirely new and concurrent installs do
+    not interleave. Nothing is published if the block raises.
+    """
+    themes_dir = themes_dir or get_themes_dir()
+    staging_dir = Path(tempfile.mkdtemp(prefix=".staging-", dir=themes_dir))
+    try:
+        yield staging_dir
+        with themes_lock(themes_dir):
+            for path in sorted(staging_dir.glob("*.css")):
+                path.replace(themes_dir / path.name)
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        invalidate_theme_index()
+
+
+def is_marimo_file(path: str) -> bool:
+    """
+    Check if a file is a Marimo notebook in any registered format.
+
+    Only a bounded prefix of files with a notebook suffix is read, see
+    ``motheme.notebook_formats``.
+    """
+    return classify_notebook(path) is not None
 
 
 @contextmanager
@@ -95,8 +340,132 @@ def get_git_tracked_files() -> set[str]:
         return set()
 
 
+def get_git_changed_files(
+    rev: str | None = None, *, staged: bool = False
+) -> list[str] | None:
+    """
+    Get files changed in git with a single ``git diff`` call.
+
+    Args:
+        rev: Compare against this revision instead of the index
+        staged: Only consider staged changes
+
+    Returns:
+        List of changed (not deleted) file paths relative to the current
+        directory, or None if git could not be run.
+
+    """
+    command = ["git", "diff", "--name-only", "-z", "--relative"]
+    command.append("--diff-filter=d")
+    if staged:
+        command.append("--cached")
+    if rev:
+        command.append(rev)
+    command.append("--")
+    try:
+        output = subprocess.check_output(  # noqa: S603
+            command, stderr=subprocess.PIPE, text=True
+        )
+    except subprocess.CalledProcessError as e:
+        print(f"Error: git diff failed: {e.stderr.strip()}")
+        return None
+    except OSError:
+        print("Error: Not in a git repository")
+        return None
+    return [path for path in output.split("\0") if path]
+
+
+def filter_to_roots(
+    paths: list[str], roots: tuple[str, ...], *, recursive: bool
+) -> list[str]:
+    """
+    Keep the paths that are one of the roots or, if recursive, inside one.
+
+    Args:
+        paths: Candidate file paths
+        roots: File/directory paths given on the command line
+        recursive: If True, directories match every file below them
+
+    """
+    # Paths from git and roots from the command line may be spelled
+    # differently, so both are compared as resolved absolute paths
+    root_paths = [Path(root).resolve() for root in roots]
+    dir_roots = [r for r in root_paths if recursive and r.is_dir()]
+    file_roots = set(root_paths)
+    selected = []
+    for path in paths:
+        candidate = Path(path).resolve()
+        if candidate in file_roots or any(
+            root in candidate.parents for root in dir_roots
+        ):
+            selected.append(path)
+    return selected
+
+
+def parse_shard(spec: str) -> tuple[int, int]:
+    """
+    Parse a ``INDEX/COUNT`` shard spec, with INDEX counted from 1.
+
+    Raises:
+        ValueError: If the spec is malformed or INDEX is out of range.
+
+    """
+    index, sep, count = spec.partition("/")
+    try:
+        shard = int(index), int(count)
+    except ValueError:
+        shard = (0, 0)
+    if not sep or not 1 <= shard[0] <= shard[1]:
+        msg = f"Invalid shard {spec!r}, expected INDEX/COUNT like 1/4"
+        raise ValueError(msg)
+    return shard
+
+
+@lru_cache
+def _git_top_level(cwd: str) -> Path | None:
+    """Get the top level of the git work tree containing a directory."""
+    try:
+        output = subprocess.check_output(
+            ["git", "rev-parse", "--show-toplevel"],  # noqa: S607
+            cwd=cwd,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        )
+    except (subprocess.CalledProcessError, OSError):
+        return None
+    return Path(output.strip()).resolve()
+
+
+def in_shard(path: str, shard: tuple[int, int] | None) -> bool:
+    """
+    Check whether a file belongs to a shard.
+
+    Files are assigned by a stable hash of their resolved path relative
+    to the git top level (or the current directory outside git), so
+    every runner computes the same split without coordinating, whatever
+    directory it runs from.
+    """
+    if shard is None:
+        return True
+    index, count = shard
+    cwd = Path.cwd()
+    base = _git_top_level(str(cwd)) or cwd.resolve()
+    resolved = Path(path).resolve()
+    try:
+        key = resolved.relative_to(base).as_posix().encode("utf-8")
+    except ValueError:
+        key = resolved.as_posix().encode("utf-8")
+    digest = hashlib.blake2b(key, digest_size=8).digest()
+    return int.from_bytes(digest, "big") % count == index - 1
+
+
 def expand_files(
-    *files: str, recursive: bool, git_ignore: bool = False
+    *files: str,
+    recursive: bool,
+    git_ignore: bool = False,
+    shard: tuple[int, int] | None = None,
+    changed_since: str | None = None,
+    staged: bool = False,
 ) -> list[str]:
     """
     Expand file paths, optionally recursively for directories.
@@ -106,9 +475,14 @@ def expand_files(
         files: Tuple of file/directory paths
         recursive: If True, recursively search directories for Python files
         git_ignore: If True, skip files that are git ignored
+        shard: Optional ``(index, count)`` to keep only the files of one
+            shard; files are sharded before being read
+        changed_since: Only consider files changed since this git revision
+        staged: Only consider files with staged changes
 
     Returns:
-        List of expanded file paths that are Marimo notebooks
+        List of expanded file paths that are Marimo notebooks, ordered
+        by directory and by inode within each directory
 
     """
     if git_ignore:
@@ -121,22 +495,32 @@ def expand_files(
             in tracked_files
         )
 
-    if not recursive:
-        return [f for f in files if is_marimo_file(f) and is_tracked(f)]
-
-    expanded_files = []
-    for file in files:
-        path = Path(file)
-        if path.is_dir():
-            # Find all .py files and filter for Marimo notebooks
-            expanded_files.extend(
-                str(f)
-                for f in path.rglob("*.py")
-                if is_marimo_file(str(f)) and is_tracked(str(f))
-            )
-        elif is_marimo_file(str(path)) and is_tracked(str(path)):
-            expanded_files.append(str(path))
-    return expanded_files
+    if changed_since or staged:
+        # Take candidates from git instead of walking the tree
+        changed = get_git_changed_files(changed_since, staged=staged) or []
+        candidates = filter_to_roots(changed, files, recursive=recursive)
+    elif not recursive:
+        candidates = list(files)
+    else:
+        candidates = []
+        for file in files:
+            path = Path(file)
+            if path.is_dir():
+                candidates.extend(
+                    str(f)
+                    for suffix in notebook_suffixes()
+                    for f in path.rglob(f"*{suffix}")
+                )
+            else:
+                candidates.append(str(path))
+
+    # Classify files directory by directory, in on-disk order, instead
+    # of seeking back and forth across the tree
+    return [
+        f
+        for f in locality_order(c for c in candidates if in_shard(c, shard))
+        if is_marimo_file(f) and is_tracked(f)
+    ]
 
 
 def check_files_provided(
@@ -0,0 +1,95 @@
+import asyncio
+from pathlib import Path
+
+from motheme.api import (
+    apply_files_async,
+    apply_to_source,
+    clear_files,
+    clear_source,
+    read_files,
+    read_theme,
+)
+from motheme.app_parser import find_app_block, find_app_span, split_lines
+
+NOTEBOOK = """import marimo
+
+app = marimo.App()
+
+
+@app.cell
+def _():
+    return
+
+
+if __name__ == "__main__":
+    app.run()
+"""
+
+
+def test_apply_and_clear_source_round_trip() -> None:
+    themed = apply_to_source(NOTEBOOK, "/themes/nord.css")
+
+    assert 'app = marimo.App(css_file="/themes/nord.css")\n' in themed
+    assert read_theme(themed) == "nord"
+    assert clear_source(themed) == NOTEBOOK
+    assert read_theme(NOTEBOOK) is None
+
+
+def test_apply_and_clear_aliased_notebook() -> None:
+    aliased = NOTEBOOK.replace("import marimo", "import marimo as mo").replace(
+        "marimo.App(", "mo.App("
+    )
+
+    themed = apply_to_source(aliased, "/themes/nord.css")
+
+    assert 'app = mo.App(css_file="/themes/nord.css")\n' in themed
+    assert read_theme(themed) == "nord"
+    assert clear_source(themed) == aliased
+    # Another module's App is not marimo's
+    assert read_theme(themed.replace("app = mo.", "app = np.")) is None
+
+
+def test_apply_to_source_keeps_crlf() -> None:
+    crlf = NOTEBOOK.replace("\n", "\r\n")
+
+    themed = apply_to_source(crlf, "nord.css")
+
+    assert themed.count("\r\n") == crlf.count("\r\n")
+    assert clear_source(themed) == crlf
+
+
+def test_find_app_span_matches_find_app_block() -> None:
+    text = "import marimo\napp = marimo.App(\n    width=f(1),\n)\nx = 1\n"
+
+    span = find_app_span(text)
+    block = find_app_block(split_lines(text))
+
+    assert span is not None
+    assert block is not None
+    assert (span.start_line, span.end_line, span.content) == (
+        block.start_line,
+        block.end_line,
+        block.content,
+    )
+    assert text[span.start_offset : span.end_offset] == (
+        "app = marimo.App(\n    width=f(1),\n)\n"
+    )
+
+
+def test_batch_results(tmp_path: Path) -> None:
+    notebook = tmp_path / "nb.py"
+    notebook.write_text(NOTEBOOK)
+    script = tmp_path / "script.py"
+    script.write_text("print('hi')\n")
+    missing = str(tmp_path / "missing.py")
+    paths = [str(notebook), str(script), missing]
+
+    applied = asyncio.run(apply_files_async(paths, "/themes/nord.css"))
+    read = list(read_files(paths))
+    cleared = list(clear_files(paths))
+
+    assert [r.status for r in applied] == ["applied", "failed", "error"]
+    assert [r.status for r in read] == ["themed", "no_app", "error"]
+    assert read[0].theme == "nord"
+    assert [r.status for r in cleared] == ["cleared", "no_theme", "error"]
+    assert notebook.read_text() == NOTEBOOK
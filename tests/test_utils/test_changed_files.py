@@ -0,0 +1,54 @@
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from motheme.util import filter_to_roots, get_git_changed_files
+
+
+def test_filter_to_roots(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "nb" / "sub").mkdir(parents=True)
+    paths = ["nb/a.py", "nb/sub/b.py", "other/c.py", "nbx/d.py"]
+
+    assert filter_to_roots(paths, ("nb",), recursive=True) == [
+        "nb/a.py",
+        "nb/sub/b.py",
+    ]
+    assert filter_to_roots(paths, (".",), recursive=True) == paths
+    assert filter_to_roots(paths, ("nb",), recursive=False) == []
+    assert filter_to_roots(paths, ("./other/c.py",), recursive=False) == [
+        "other/c.py"
+    ]
+    assert filter_to_roots(paths, (str(tmp_path / "nb"),), recursive=True) == [
+        "nb/a.py",
+        "nb/sub/b.py",
+    ]
+
+
+def test_get_git_changed_files(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.chdir(tmp_path)
+
+    def git(*args: str) -> None:
+        subprocess.run(
+            ["git", "-c", "user.name=t", "-c", "user.email=t@t", *args],
+            check=True,
+            capture_output=True,
+        )
+
+    git("init")
+    for name in ("a.py", "b.py", "c.py"):
+        (tmp_path / name).write_text("x\n")
+    git("add", ".")
+    git("commit", "-m", "init")
+    (tmp_path / "a.py").write_text("changed\n")
+    (tmp_path / "b.py").write_text("staged\n")
+    git("add", "b.py")
+    (tmp_path / "c.py").unlink()
+
+    assert get_git_changed_files("HEAD") == ["a.py", "b.py"]
+    assert get_git_changed_files(staged=True) == ["b.py"]
@@ -0,0 +1,73 @@
+from pathlib import Path
+
+import pytest
+
+from motheme.api import read_css_file
+from motheme.doctor import check_references, relocate_themes, scan_references
+from motheme.util import get_themes_dir, invalidate_theme_index
+
+STALE = "/home/alice/.local/share/mtheme/themes/nord.css"
+
+
+def notebook(css_file: str) -> str:
+    return f'import marimo\n\napp = marimo.App(css_file="{css_file}")\n'
+
+
+@pytest.fixture
+def project(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    project = tmp_path / "project"
+    (project / "sub").mkdir(parents=True)
+    (project / ".git").mkdir()
+    monkeypatch.chdir(project)
+    monkeypatch.setenv("XDG_DATA_HOME", str(tmp_path / "data"))
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    (get_themes_dir() / "nord.css").write_text("nord")
+    invalidate_theme_index()
+    Path("a.py").write_text(notebook(STALE))
+    Path("sub/b.py").write_text(notebook(STALE))
+    Path("sub/c.py").write_text(notebook(str(get_themes_dir() / "nord.css")))
+    return project
+
+
+FILES = ["a.py", "sub/b.py", "sub/c.py"]
+
+
+def test_doctor_finds_missing_css_files(project: Path) -> None:
+    refs = list(scan_references(FILES))
+
+    assert [r.exists for r in refs] == [False, False, True]
+    assert refs[0].resolved == refs[1].resolved == STALE
+    assert not check_references(FILES)
+
+
+def test_relocate_rewrites_stale_paths(project: Path) -> None:
+    assert relocate_themes(FILES, dry_run=True) == ["a.py", "sub/b.py"]
+    assert read_css_file(Path("a.py").read_text()) == STALE
+
+    relocate_themes(FILES)
+
+    nord = str(get_themes_dir() / "nord.css")
+    assert read_css_file(Path("a.py").read_text()) == nord
+    assert read_css_file(Path("sub/b.py").read_text()) == nord
+    assert check_references(FILES)
+
+
+def test_relocate_relative_to_notebook(project: Path) -> None:
+    relocate_themes(["sub/b.py"], relative=True)
+
+    css_file = read_css_file(Path("sub/b.py").read_text())
+    assert not Path(css_file).is_absolute()
+    assert (Path("sub") / css_file).resolve() == (
+        get_themes_dir() / "nord.css"
+    ).resolve()
+
+
+def test_relocate_prefix_matches_whole_components(project: Path) -> None:
+    other = STALE.replace("/alice/", "/alicexyz/")
+    Path("a.py").write_text(notebook(other))
+
+    relocated = relocate_themes(FILES, old_prefix="/home/alice", dry_run=True)
+
+    assert relocated == ["sub/b.py"]
+    assert relocate_themes(FILES, old_prefix="/home/alice/") == ["sub/b.py"]
+    assert read_css_file(Path("a.py").read_text()) == other
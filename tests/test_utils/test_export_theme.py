@@ -0,0 +1,132 @@
+import os
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from motheme.export_theme import export_files
+from motheme.io_limits import io_limits
+
+NOTEBOOK = (
+    "import marimo\n\napp = marimo.App()\n\n@app.cell\ndef _():\n    return\n"
+)
+
+# Stands in for `marimo export html SRC -o OUT`: copies the source it was
+# given to OUT, under a comment naming it, and counts its invocations
+FAKE_MARIMO = """#!{python}
+import sys
+from pathlib import Path
+
+source, output = sys.argv[3], sys.argv[5]
+name = Path(source).name
+Path(output).write_text(f"<!-- {{name}} -->\\n" + Path(source).read_text())
+with open({calls!r}, "a") as f:
+    f.write(source + "\\n")
+"""
+
+
+@pytest.fixture
+def calls(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    calls = tmp_path / "calls.txt"
+    calls.touch()
+    marimo = bin_dir / "marimo"
+    marimo.write_text(
+        FAKE_MARIMO.format(python=sys.executable, calls=str(calls))
+    )
+    marimo.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.chdir(tmp_path)
+    return calls
+
+
+def test_export_injects_theme_without_touching_source(calls: Path) -> None:
+    Path("nb.py").write_text(NOTEBOOK)
+    Path("nord.css").write_text("nord")
+
+    (result,) = export_files(["nb.py"], "nord.css", "out")
+
+    assert result.status == "exported"
+    assert result.output == str(Path("out") / "nb.html")
+    assert "css_file=" in Path("out/nb.html").read_text()
+    assert Path("nb.py").read_text() == NOTEBOOK
+    assert sorted(p.name for p in Path().glob("*.py")) == ["nb.py"]
+
+
+def test_export_reuses_unchanged_pairs(calls: Path) -> None:
+    Path("a.py").write_text(NOTEBOOK)
+    Path("b.py").write_text(NOTEBOOK + "\n")
+    Path("nord.css").write_text("nord")
+
+    list(export_files(["a.py", "b.py"], "nord.css", "out", jobs=2))
+    Path("b.py").write_text(NOTEBOOK + "\n\n")
+    results = list(export_files(["a.py", "b.py"], "nord.css", "out"))
+
+    assert [r.status for r in results] == ["cached", "exported"]
+    assert len(calls.read_text().splitlines()) == 3
+
+    Path("nord.css").write_text("nord v2")
+    results = list(export_files(["a.py"], "nord.css", "out"))
+
+    assert results[0].status == "exported"
+
+
+def test_export_keeps_notebook_names(calls: Path) -> None:
+    Path("a.py").write_text(NOTEBOOK)
+    Path("b.py").write_text(NOTEBOOK)
+    Path("nord.css").write_text("nord")
+
+    results = list(export_files(["a.py", "b.py"], "nord.css", "out"))
+
+    assert [r.status for r in results] == ["exported", "exported"]
+    assert Path("out/a.html").read_text().startswith("<!-- a.py -->")
+    assert Path("out/b.html").read_text().startswith("<!-- b.py -->")
+    assert len(calls.read_text().splitlines()) == 2
+
+
+def test_export_paces_copies_under_io_limits(calls: Path) -> None:
+    Path("nb.py").write_text(NOTEBOOK + "#" * (100 - len(NOTEBOOK)))
+    Path("nord.css").write_text("nord")
+    list(export_files(["nb.py"], "nord.css", "out"))
+
+    start = time.monotonic()
+    with io_limits(max_bytes_per_sec=1000):
+        (result,) = export_files(["nb.py"], "nord.css", "out")
+
+    # The cached page is copied only after the notebook's 100 bytes
+    assert result.status == "cached"
+    assert time.monotonic() - start >= 0.09
+
+
+def test_export_keeps_notebooks_apart(
+    calls: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    for name in ("a", "b"):
+        Path(name).mkdir()
+        Path(name, "nb.py").write_text(NOTEBOOK)
+    Path("a/nb.md").write_text("---\nmarimo-version: 0.10.0\n---\n")
+    Path("nord.css").write_text("nord")
+    Path("work").mkdir()
+    monkeypatch.chdir("work")
+
+    results = list(
+        export_files(
+            ["../a/nb.py", "../b/nb.py", "../a/nb.md"],
+            "../nord.css",
+            "out",
+            jobs=0,
+        )
+    )
+
+    assert [r.status for r in results] == ["exported", "exported", "error"]
+    outputs = {Path(r.output) for r in results[:2] if r.output}
+    assert len(outputs) == 2
+    assert all(out.is_relative_to("out") for out in outputs)
+    assert all(
+        out.parts[-2:] in (("a", "nb.html"), ("b", "nb.html"))
+        for out in outputs
+    )
+    assert "already the export of ../a/nb.py" in str(results[2].error)
@@ -0,0 +1,75 @@
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from motheme.api import read_css_file
+from motheme.fleet import load_manifest, run_fleet
+from motheme.report import Report
+from motheme.util import get_themes_dir, invalidate_theme_index
+
+NOTEBOOK = (
+    "import marimo\n\napp = marimo.App()\n\n@app.cell\ndef _():\n    return\n"
+)
+MANIFEST = """
+theme = "nord"
+
+[[repo]]
+path = "analytics"
+roots = ["notebooks"]
+
+[[repo]]
+path = "reports"
+theme = "wigwam"
+
+[[repo]]
+path = "missing"
+"""
+
+
+def make_repo(path: Path, *notebooks: str) -> None:
+    path.mkdir()
+    subprocess.run(["git", "init", "-q", str(path)], check=True)
+    (path / ".gitignore").write_text("build/\n")
+    for notebook in notebooks:
+        (path / notebook).parent.mkdir(parents=True, exist_ok=True)
+        (path / notebook).write_text(NOTEBOOK)
+
+
+@pytest.fixture
+def fleet(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("XDG_DATA_HOME", str(tmp_path / "data"))
+    for name in ("nord", "wigwam"):
+        (get_themes_dir() / f"{name}.css").write_text(name)
+    invalidate_theme_index()
+    make_repo(tmp_path / "analytics", "notebooks/a.py", "scratch/b.py")
+    make_repo(tmp_path / "reports", "r.py", "build/r.py")
+    (tmp_path / "fleet.toml").write_text(MANIFEST)
+    return tmp_path
+
+
+def test_load_manifest_defaults(fleet: Path) -> None:
+    repos = load_manifest(fleet / "fleet.toml")
+
+    assert [r.theme for r in repos] == ["nord", "wigwam", "nord"]
+    assert repos[0].roots == ("notebooks",)
+    assert repos[1].roots == (".",)
+
+
+def test_fleet_isolates_failing_repositories(fleet: Path) -> None:
+    report = Report("fleet")
+
+    assert not run_fleet(str(fleet / "fleet.toml"), report=report)
+
+    statuses = {e["file"]: e["status"] for e in report.entries}
+    assert statuses == {
+        str(fleet / "analytics/notebooks/a.py"): "applied",
+        str(fleet / "reports/r.py"): "applied",
+        str(fleet / "missing"): "error",
+    }
+    css_file = read_css_file((fleet / "reports/r.py").read_text())
+    assert Path(css_file).stem == "wigwam"
+    assert (
+        read_css_file((fleet / "analytics/scratch/b.py").read_text()) is None
+    )
@@ -0,0 +1,156 @@
+import base64
+from pathlib import Path
+
+import pytest
+
+from motheme import font_vendor
+from motheme.font_vendor import (
+    parse_font_weights,
+    subset_url,
+    vendor_css,
+    vendor_faces,
+    vendor_theme_fonts,
+)
+from motheme.util import get_themes_dir, invalidate_theme_index
+
+CSS2 = "https://fonts.googleapis.com/css2"
+
+IMPORT = (
+    "https://fonts.googleapis.com/css2?family=Merriweather:wght@300..900"
+    "&family=Fira+Code:wght@300..700&display=swap"
+)
+THEME = f"""@import url("{IMPORT}");
+
+:root {{
+    --monospace-font: "Fira Code", monospace;
+    --text-font: system-ui;
+}}
+h1 {{ font-weight: 600; }}
+"""
+FIRA = "https://fonts.gstatic.com/s/firacode/v22/latin.woff2"
+STYLESHEET = f"""/* cyrillic */
+@font-face {{
+  font-family: 'Fira Code';
+  src: url(https://fonts.gstatic.com/s/firacode/v22/cyrillic.woff2) format('woff2');
+  unicode-range: U+0301, U+0400-045F;
+}}
+/* latin */
+@font-face {{
+  font-family: 'Fira Code';
+  src: url({FIRA}) format('woff2');
+  unicode-range: U+0000-00FF, U+0131;
+}}
+"""
+
+
+@pytest.fixture
+def fetched(monkeypatch: pytest.MonkeyPatch) -> list[str]:
+    fetched = []
+
+    def fetch_cached(url: str) -> bytes:
+        fetched.append(url)
+        return STYLESHEET.encode() if "googleapis" in url else b"font"
+
+    monkeypatch.setattr(font_vendor, "fetch_cached", fetch_cached)
+    return fetched
+
+
+def test_subset_url_keeps_used_families_and_weights() -> None:
+    url = subset_url(IMPORT, {"Fira Code"}, parse_font_weights(THEME))
+
+    assert url == (
+        "https://fonts.googleapis.com/css2"
+        "?family=Fira+Code:wght@400;600;700&display=swap"
+    )
+
+
+def test_vendor_css_embeds_selected_faces(fetched: list[str]) -> None:
+    css, replaced = vendor_css(THEME)
+
+    assert replaced == 1
+    assert "@import" not in css
+    assert fetched[1:] == [FIRA]
+    encoded = base64.b64encode(b"font").decode()
+    assert f"url(data:font/woff2;base64,{encoded})" in css
+    assert "cyrillic" not in css
+
+
+def test_vendor_css_selects_faces_by_text(fetched: list[str]) -> None:
+    css, _ = vendor_css(THEME, text="Привет")
+
+    assert "U+0400-045F" in css
+    assert "U+0000-00FF" not in css
+
+
+def test_subset_url_narrows_weight_lists_and_axis_tuples() -> None:
+    weights = {400, 700}
+    families = {"Inter", "Lora"}
+
+    url = subset_url(
+        f"{CSS2}?family=Inter:wght@400;700;900", families, weights
+    )
+    assert url == f"{CSS2}?family=Inter:wght@400;700"
+
+    url = subset_url(
+        f"{CSS2}?family=Lora:ital,wght@0,300..700;1,700;1,800",
+        families,
+        weights,
+    )
+    assert url == f"{CSS2}?family=Lora:ital,wght@0,400;0,700;1,700"
+
+
+def test_vendor_theme_fonts_reports_invalid_specs(
+    fetched: list[str],
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    monkeypatch.setenv("XDG_DATA_HOME", str(tmp_path))
+    theme = THEME.replace("wght@300..700", "wght@bold")
+    (get_themes_dir() / "broken.css").write_text(theme)
+    invalidate_theme_index()
+
+    assert vendor_theme_fonts("broken") is None
+    assert capsys.readouterr().out.startswith(
+        "Error: Could not vendor the fonts of broken: Invalid font family"
+    )
+    assert fetched == []
+
+
+def test_vendor_theme_fonts_rejects_invalid_output_name(
+    fetched: list[str],
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    monkeypatch.setenv("XDG_DATA_HOME", str(tmp_path))
+    (get_themes_dir() / "nord.css").write_text(THEME)
+    invalidate_theme_index()
+
+    assert vendor_theme_fonts("nord", output_name="../escaped") is None
+    assert capsys.readouterr().out.startswith("Error: Invalid theme name")
+    assert not (get_themes_dir().parent / "escaped.css").exists()
+    assert fetched == []
+
+
+def test_vendor_faces_embeds_variable_fonts_once(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    faces = "".join(
+        f"/* latin */\n@font-face {{\n  font-family: 'Fira Code';\n"
+        f"  font-style: normal;\n  font-weight: {weight};\n"
+        f"  src: url({FIRA}) format('woff2');\n}}\n"
+        for weight in (400, 600, 700)
+    )
+
+    def fetch_cached(url: str) -> bytes:
+        return faces.encode() if "googleapis" in url else b"font"
+
+    monkeypatch.setattr(font_vendor, "fetch_cached", fetch_cached)
+
+    assert vendor_faces(IMPORT, ("latin",)) == [
+        "@font-face {\n  font-family: 'Fira Code';\n  font-style: normal;\n"
+        "  font-weight: 400 700;\n"
+        f"  src: url(data:font/woff2;base64,{base64.b64encode(b'font').decode()})"
+        " format('woff2');\n}"
+    ]
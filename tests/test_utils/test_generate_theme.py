@@ -0,0 +1,121 @@
+from pathlib import Path
+
+import pytest
+
+from motheme.generate_theme import (
+    contrast_ratio,
+    generate_themes,
+    parse_color,
+    parse_expression,
+)
+
+SPEC = """
+[family]
+text_font = '"Merriweather", serif'
+radius = "12px"
+
+[palettes.latte]
+base = "#eff1f5"
+text = "#4c4f69"
+mauve = "#8839ef"
+
+[palettes.mocha]
+base = "#1e1e2e"
+text = "#cdd6f4"
+mauve = "#cba6f7"
+
+[palettes.frappe]
+base = "#303446"
+text = "#c6d0f5"
+mauve = "#ca9ee6"
+
+[roles]
+background = "base"
+foreground = "text"
+primary = "mauve"
+primary-foreground = "contrast(primary)"
+action-hover = { light = "darken(primary, 10)", dark = "lighten(primary, 10)" }
+base-shadow = "alpha(text, 40)"
+
+[themes.mocha_dark]
+light = "latte"
+dark = "mocha"
+
+[themes.frappe_dark]
+light = "latte"
+dark = "frappe"
+"""
+
+
+@pytest.fixture
+def spec(tmp_path: Path) -> Path:
+    spec = tmp_path / "family.toml"
+    spec.write_text(SPEC)
+    return spec
+
+
+def test_parse_color_formats() -> None:
+    assert parse_color("#fff") == (1.0, 1.0, 1.0, 1.0)
+    assert parse_color("hsl(0deg 0% 100%)") == (1.0, 1.0, 1.0, 1.0)
+    with pytest.raises(ValueError, match="Invalid color"):
+        parse_color("#ggg")
+
+
+def test_parse_expression_calls() -> None:
+    assert parse_expression("mix(base, #fff, 20)") == (
+        "mix",
+        "base",
+        "#fff",
+        20.0,
+    )
+    with pytest.raises(ValueError, match="Unbalanced"):
+        parse_expression("lighten(base, 10")
+
+
+def test_generate_family(spec: Path, tmp_path: Path) -> None:
+    out = tmp_path / "out"
+    written = generate_themes(str(spec), output_dir=str(out))
+
+    assert sorted(p.name for p in written) == [
+        "frappe_dark.css",
+        "mocha_dark.css",
+    ]
+    css = (out / "mocha_dark.css").read_text()
+    assert "--background: light-dark(#eff1f5, #1e1e2e);" in css
+    assert "--radius: 12px;" in css
+
+    line = next(x for x in css.splitlines() if "--primary-foreground" in x)
+    light, dark = line.split("(")[1].rstrip(");").split(", ")
+    assert contrast_ratio(parse_color(light), parse_color("#8839ef")) >= 4.5
+    assert contrast_ratio(parse_color(dark), parse_color("#cba6f7")) >= 4.5
+
+
+def test_regenerate_only_rewrites_changed_themes(
+    spec: Path, tmp_path: Path
+) -> None:
+    out = tmp_path / "out"
+    generate_themes(str(spec), output_dir=str(out))
+    assert generate_themes(str(spec), output_dir=str(out)) == []
+
+    spec.write_text(SPEC.replace('mauve = "#ca9ee6"', 'mauve = "#ff00ff"'))
+
+    written = generate_themes(str(spec), output_dir=str(out))
+    assert [p.name for p in written] == ["frappe_dark.css"]
+
+
+def test_unknown_palette_is_an_error(spec: Path, tmp_path: Path) -> None:
+    spec.write_text(SPEC.replace('dark = "frappe"', 'dark = "oops"'))
+
+    assert generate_themes(str(spec), output_dir=str(tmp_path)) is None
+
+
+def test_invalid_theme_names_are_reported(
+    spec: Path, tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    out = tmp_path / "out"
+    spec.write_text(SPEC.replace("[themes.frappe_dark]", '[themes."../x"]'))
+
+    assert generate_themes(str(spec), output_dir=str(out)) is None
+    assert "invalid theme name(s): '../x'" in capsys.readouterr().out
+    assert not (tmp_path / "x.css").exists()
+    assert not out.exists()
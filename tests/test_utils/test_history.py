@@ -0,0 +1,102 @@
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from motheme import history
+from motheme.api import apply_to_source
+from motheme.history import list_revisions, show_history, theme_history
+
+NOTEBOOK = (
+    "import marimo\n\napp = marimo.App()\n\n@app.cell\ndef _():\n    return\n"
+)
+
+
+def git(*args: str) -> None:
+    subprocess.run(["git", *args], check=True, capture_output=True)
+
+
+def commit(message: str) -> None:
+    git("add", "-A")
+    git("commit", "-q", "-m", message)
+
+
+@pytest.fixture
+def repo(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    git("init", "-q")
+    git("config", "user.email", "dev@example.com")
+    git("config", "user.name", "dev")
+    (tmp_path / "notebooks").mkdir()
+    (tmp_path / "notebooks/a.py").write_text(NOTEBOOK)
+    (tmp_path / "notebooks/b.py").write_text(NOTEBOOK)
+    (tmp_path / "script.py").write_text("print('not a notebook')\n")
+    commit("Add notebooks")
+    (tmp_path / "notebooks/a.py").write_text(
+        apply_to_source(NOTEBOOK, "themes/nord.css")
+    )
+    commit("Theme a")
+    git("tag", "v1.0")
+    (tmp_path / "notebooks/b.py").write_text(
+        apply_to_source(NOTEBOOK, "themes/wigwam.css")
+    )
+    commit("Theme b")
+    return tmp_path
+
+
+def test_list_revisions_accepts_ranges_and_lists(repo: Path) -> None:
+    assert len(list_revisions()) == 3
+    assert len(list_revisions("v1.0..HEAD")) == 1
+    revisions = list_revisions("HEAD,v1.0")
+    assert [r.is_tagged for r in revisions] == [False, True]
+
+
+def test_theme_history_reads_each_revision(repo: Path) -> None:
+    snapshots = [notebooks for _, notebooks in theme_history((), None)]
+
+    assert snapshots == [
+        {"notebooks/a.py": None, "notebooks/b.py": None},
+        {"notebooks/a.py": "themes/nord.css", "notebooks/b.py": None},
+        {
+            "notebooks/a.py": "themes/nord.css",
+            "notebooks/b.py": "themes/wigwam.css",
+        },
+    ]
+
+
+def test_theme_history_parses_each_blob_once(
+    repo: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    parsed = []
+    classify = history.classify_content
+
+    def counting_classify(path: str, data: bytes) -> object:
+        parsed.append(path)
+        return classify(path, data)
+
+    monkeypatch.setattr(history, "classify_content", counting_classify)
+    list(theme_history(("notebooks",), None))
+    # Three distinct notebook versions, however many revisions hold them
+    assert len(parsed) == 3
+
+    list(theme_history(("notebooks",), None))
+    assert len(parsed) == 3
+
+
+def test_show_history_prints_changes(
+    repo: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    assert show_history(("notebooks/b.py",), "v1.0,HEAD")
+
+    output = capsys.readouterr().out
+    assert "(tag: v1.0)\n  notebooks/b.py: no theme\n" in output
+    assert "notebooks/b.py: no theme -> wigwam" in output
+    assert "a.py" not in output
+
+
+def test_show_history_reports_bad_revisions(
+    repo: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    assert not show_history((), "missing..HEAD")
+    assert capsys.readouterr().out.startswith("Error: ")
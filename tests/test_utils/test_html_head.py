@@ -0,0 +1,46 @@
+from pathlib import Path
+
+from motheme.api import apply_to_source, clear_source
+from motheme.html_head import build_head, parse_font_families, write_head_file
+
+CSS = """@import url("https://fonts.googleapis.com/css2?family=Merriweather:wght@300..900&family=Fira+Code:wght@300..700&display=swap");
+@import url("https://fonts.googleapis.com/css2?family=Unused&display=swap");
+
+:root {
+    --monospace-font: "Fira Code", monospace; /* coding font */
+    --text-font: "Merriweather", serif;
+}
+"""
+
+
+def test_parse_font_families_skips_generic() -> None:
+    assert parse_font_families(CSS) == {"Fira Code", "Merriweather"}
+
+
+def test_build_head_preloads_used_imports() -> None:
+    head = build_head(CSS, "nord")
+
+    assert (
+        '<link rel="preconnect" href="https://fonts.googleapis.com">' in head
+    )
+    assert 'href="https://fonts.gstatic.com" crossorigin>' in head
+    assert head.count('rel="preload"') == 1
+    assert "family=Merriweather:wght@300..900&amp;family=Fira+Code" in head
+    assert "Unused" not in head
+
+
+def test_write_head_file_skips_themes_without_fonts(tmp_path: Path) -> None:
+    css_path = tmp_path / "plain.css"
+    css_path.write_text(":root { --text-font: serif; }")
+
+    assert write_head_file("plain", css_path, tmp_path / "a.head.html") is None
+
+
+def test_head_is_set_and_cleared_with_theme() -> None:
+    source = "app = marimo.App()\n"
+
+    themed = apply_to_source(source, "/t/nord.css", "/h/nord.head.html")
+
+    assert 'html_head_file="/h/nord.head.html"' in themed
+    assert 'css_file="/t/nord.css"' in themed
+    assert clear_source(themed) == source
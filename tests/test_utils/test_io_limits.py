@@ -0,0 +1,98 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from motheme import util
+from motheme.api import read_notebook
+from motheme.io_limits import (
+    IoLimiter,
+    io_limits,
+    is_io_limited,
+    locality_order,
+    parse_size,
+)
+from motheme.util import expand_files
+
+NOTEBOOK = (
+    "import marimo\n\napp = marimo.App()\n\n@app.cell\ndef _():\n    pass\n"
+)
+
+
+def test_parse_size() -> None:
+    assert parse_size("512") == 512
+    assert parse_size("20M") == 20 * 1024**2
+    assert parse_size("1.5kb") == 1536
+    with pytest.raises(ValueError, match="Invalid size"):
+        parse_size("fast")
+
+
+def test_limiter_paces_operations_across_threads() -> None:
+    limiter = IoLimiter(max_iops=50)
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(lambda _: limiter.acquire(), range(6)))
+
+    # The first operation runs at once, the next five are 20 ms apart
+    assert time.monotonic() - start >= 0.09
+
+
+def test_limiter_paces_bytes() -> None:
+    limiter = IoLimiter(max_bytes_per_sec=1000)
+    start = time.monotonic()
+    limiter.acquire(50)
+    limiter.acquire(50)
+
+    assert time.monotonic() - start >= 0.045
+
+
+def test_io_limits_applies_to_notebook_reads(tmp_path: Path) -> None:
+    notebook = tmp_path / "notebook.py"
+    notebook.write_text("x" * 100)
+
+    with io_limits(max_bytes_per_sec=1000):
+        assert is_io_limited()
+        start = time.monotonic()
+        read_notebook(notebook)
+        read_notebook(notebook)
+        assert time.monotonic() - start >= 0.09
+    assert not is_io_limited()
+
+
+def test_locality_order_groups_files_by_directory(tmp_path: Path) -> None:
+    for name in ("b/2.py", "a/1.py", "b/1.py", "a/2.py"):
+        (tmp_path / name).parent.mkdir(exist_ok=True)
+        (tmp_path / name).touch()
+    paths = [
+        str(tmp_path / n) for n in ("b/2.py", "a/1.py", "b/1.py", "a/2.py")
+    ]
+
+    ordered = locality_order(paths)
+
+    assert [Path(p).parent.name for p in ordered] == ["a", "a", "b", "b"]
+    b_files = [Path(p) for p in ordered[2:]]
+    assert [p.stat().st_ino for p in b_files] == sorted(
+        p.stat().st_ino for p in b_files
+    )
+
+
+def test_expand_files_classifies_in_locality_order(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.chdir(tmp_path)
+    for name in ("b/2.py", "a/1.py", "b/1.py", "a/2.py"):
+        Path(name).parent.mkdir(exist_ok=True)
+        Path(name).write_text(NOTEBOOK)
+    classified = []
+    monkeypatch.setattr(
+        util, "is_marimo_file", lambda path: classified.append(path) or True
+    )
+
+    # Without any I/O limit, before the first file is read
+    expanded = expand_files(
+        "b/2.py", "a/1.py", "b/1.py", "a/2.py", recursive=False
+    )
+
+    assert classified == expanded
+    assert [Path(p).parent.name for p in classified] == ["a", "a", "b", "b"]
@@ -0,0 +1,103 @@
+import os
+import re
+from pathlib import Path
+
+import pytest
+
+from motheme.api import read_css_file
+from motheme.live_edit import check_css, edit_theme, publish_revision
+from motheme.util import get_themes_dir, invalidate_theme_index
+
+NOTEBOOK = "import marimo\n\napp = marimo.App()\n"
+VALID = """/* a; { comment */
+@import url("https://example.com/a.css");
+:root {
+    --background: #fff;
+    --font: url(data:font/woff2;base64,AA;BB);
+}
+@media (prefers-color-scheme: dark) { h1 { content: "}"; } }
+"""
+
+
+@pytest.fixture
+def themes(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("XDG_DATA_HOME", str(tmp_path / "data"))
+    (get_themes_dir() / "nord.css").write_text(VALID)
+    invalidate_theme_index()
+    return tmp_path
+
+
+def test_check_css_accepts_valid_theme() -> None:
+    check_css(VALID)
+
+
+@pytest.mark.parametrize(
+    ("css", "error"),
+    [
+        (":root {\n    --a: 1;\n", "line 1, column 7: Unclosed '{'"),
+        (":root {\n    --a 1;\n}", "line 2, column 10: Expected ':'"),
+        ("a { b: c; }\n}", "line 2, column 1: Unexpected '}'"),
+        ('a {\n  content: "x;\n}', "line 2, column 12: Unterminated string"),
+        ("a { b: c; }\n/* open", "line 2, column 1: Unterminated comment"),
+        ("a { b: url(x; }", "line 1, column 11: Unclosed '('"),
+    ],
+)
+def test_check_css_points_at_the_error(css: str, error: str) -> None:
+    with pytest.raises(ValueError, match=re.escape(error)):
+        check_css(css)
+
+
+def test_publish_rejects_invalid_revisions(themes: Path) -> None:
+    draft = themes / "draft.css"
+    theme = get_themes_dir() / "nord.css"
+    draft.write_text(VALID.replace("#fff", "#000"))
+    assert publish_revision(draft, theme)
+    assert "#000" in theme.read_text()
+
+    draft.write_text(":root {\n    --background: #111;\n")
+    assert not publish_revision(draft, theme)
+    assert "#000" in theme.read_text()
+
+
+def test_publish_skips_drafts_caught_mid_save(themes: Path) -> None:
+    draft = themes / "draft.css"
+    theme = get_themes_dir() / "nord.css"
+
+    assert not publish_revision(draft, theme)
+    # A multibyte character cut off by a partial write
+    draft.write_bytes(VALID.encode() + "/* é */".encode()[:-4])
+    assert not publish_revision(draft, theme)
+    assert theme.read_text() == VALID
+
+
+def test_edit_theme_applies_and_publishes_draft(themes: Path) -> None:
+    notebook = themes / "notebook.py"
+    notebook.write_text(NOTEBOOK)
+    polls = []
+
+    def should_stop() -> bool:
+        polls.append(None)
+        if len(polls) == 2:
+            # An editor's atomic save: the draft is briefly missing
+            draft.unlink()
+        if len(polls) == 3:
+            draft.write_text(VALID.replace("#fff", "#222"))
+            # Same size as before, so make sure the mtime moves even on
+            # filesystems with coarse timestamps
+            mtime = draft.stat().st_mtime_ns + 2_000_000_000
+            os.utime(draft, ns=(mtime, mtime))
+        return len(polls) > 4
+
+    draft = themes / "nord.draft.css"
+    edit_theme(
+        "nord",
+        notebook=str(notebook),
+        draft=str(draft),
+        interval=0,
+        should_stop=should_stop,
+    )
+
+    theme = get_themes_dir() / "nord.css"
+    assert read_css_file(notebook.read_text()) == str(theme)
+    assert "#222" in theme.read_text()
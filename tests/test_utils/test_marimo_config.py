@@ -0,0 +1,66 @@
+from pathlib import Path
+
+import pytest
+
+from motheme.marimo_config import (
+    PROJECT_TABLE,
+    read_custom_css,
+    write_custom_css,
+)
+
+
+def test_write_custom_css_creates_table(tmp_path: Path) -> None:
+    config = tmp_path / "pyproject.toml"
+    config.write_text('[project]\nname = "demo"')
+
+    write_custom_css(config, PROJECT_TABLE, ["nord.css"])
+
+    assert config.read_text() == (
+        '[project]\nname = "demo"\n\n'
+        '[tool.marimo.display]\ncustom_css = ["nord.css"]\n'
+    )
+    assert read_custom_css(config, PROJECT_TABLE) == ("nord.css",)
+
+
+def test_write_custom_css_replaces_multi_line_array(tmp_path: Path) -> None:
+    config = tmp_path / "pyproject.toml"
+    config.write_text(
+        "[tool.marimo.display]\n"
+        "# a comment\n"
+        "custom_css = [\n"
+        '    "old.css",\n'
+        "]\n"
+        'theme = "dark"\n'
+        "\n"
+        "[tool.ruff]\n"
+    )
+
+    write_custom_css(config, PROJECT_TABLE, ["new.css"])
+
+    assert config.read_text() == (
+        "[tool.marimo.display]\n"
+        "# a comment\n"
+        'custom_css = ["new.css"]\n'
+        'theme = "dark"\n'
+        "\n"
+        "[tool.ruff]\n"
+    )
+
+
+def test_write_custom_css_removes_key(tmp_path: Path) -> None:
+    config = tmp_path / "marimo.toml"
+    config.write_text('[display]\ncustom_css = ["a.css"]\ntheme = "dark"\n')
+
+    write_custom_css(config, "display", None)
+
+    assert config.read_text() == '[display]\ntheme = "dark"\n'
+
+
+def test_write_custom_css_refuses_inline_table(tmp_path: Path) -> None:
+    config = tmp_path / "pyproject.toml"
+    original = '[tool.marimo]\ndisplay = { custom_css = ["a.css"] }\n'
+    config.write_text(original)
+
+    with pytest.raises(ValueError, match="custom_css"):
+        write_custom_css(config, PROJECT_TABLE, ["b.css"])
+    assert config.read_text() == original
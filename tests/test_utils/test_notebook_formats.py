@@ -0,0 +1,93 @@
+import re
+from dataclasses import replace
+from pathlib import Path
+
+import pytest
+
+from motheme import notebook_formats
+from motheme.api import apply_files, clear_files, read_files
+from motheme.notebook_formats import (
+    MARKDOWN_FORMAT,
+    PYTHON_FORMAT,
+    classify_notebook,
+    get_formats,
+    register_format,
+)
+from motheme.util import expand_files
+
+PYTHON_NOTEBOOK = (
+    "import marimo as mo\r\n\r\napp = mo.App()\r\n\r\n"
+    "@app.cell\r\ndef _():\r\n    return\r\n"
+)
+MARKDOWN_NOTEBOOK = """---
+title: Report
+marimo-version: 0.10.0
+width: medium
+---
+
+# Report
+
+```python {.marimo}
+print("hi")
+```
+"""
+
+
+@pytest.fixture
+def notebooks(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.chdir(tmp_path)
+    Path("docs").mkdir()
+    Path("docs/crlf.py").write_bytes(PYTHON_NOTEBOOK.encode())
+    Path("docs/report.md").write_text(MARKDOWN_NOTEBOOK)
+    Path("docs/README.md").write_text("---\ntitle: Docs\n---\n\n# Docs\n")
+    Path("docs/notes.txt").write_text(MARKDOWN_NOTEBOOK)
+    return tmp_path
+
+
+def test_classify_formats(notebooks: Path) -> None:
+    assert classify_notebook("docs/crlf.py") is PYTHON_FORMAT
+    assert classify_notebook("docs/report.md") is MARKDOWN_FORMAT
+    assert classify_notebook("docs/README.md") is None
+    assert classify_notebook("docs/notes.txt") is None
+
+
+def test_expand_files_finds_every_format(notebooks: Path) -> None:
+    assert sorted(expand_files("docs", recursive=True)) == [
+        str(Path("docs/crlf.py")),
+        str(Path("docs/report.md")),
+    ]
+
+
+def test_markdown_front_matter_is_edited(notebooks: Path) -> None:
+    (result,) = apply_files(["docs/report.md"], "/themes/nord.css")
+    text = Path("docs/report.md").read_text()
+
+    assert result.status == "applied"
+    assert "width: medium\ncss_file: /themes/nord.css\n---\n" in text
+    assert next(read_files(["docs/report.md"])).theme == "nord"
+
+    list(clear_files(["docs/report.md"]))
+    assert Path("docs/report.md").read_text() == MARKDOWN_NOTEBOOK
+
+
+def test_crlf_python_notebook_keeps_line_endings(notebooks: Path) -> None:
+    list(apply_files(["docs/crlf.py"], "nord.css"))
+
+    data = Path("docs/crlf.py").read_bytes()
+    assert b'app = mo.App(css_file="nord.css")\r\n' in data
+    assert b"\n" not in data.replace(b"\r\n", b"")
+
+
+def test_ambiguous_files_are_skipped(
+    notebooks: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(notebook_formats, "_FORMATS", get_formats())
+    register_format(
+        replace(
+            MARKDOWN_FORMAT,
+            name="other-markdown",
+            signatures=(re.compile(rb"marimo-version"),),
+        )
+    )
+
+    assert classify_notebook("docs/report.md") is None
@@ -0,0 +1,227 @@
+"""
+Differential fuzzing of the App call parsers and rewriters.
+
+Generates notebooks with the App call formatting seen in practice and
+checks that the span-based parser and rewriters give the same result as
+the reference: the line-based block finder with a frozen copy of the
+original regex rewriters, so the oracle does not share code with what it
+checks. Set MOTHEME_FUZZ_CASES and MOTHEME_FUZZ_SEED to run a larger or
+different corpus; throughput of each implementation is recorded as a
+test property (see ``--junitxml``) and printed with ``-s``.
+"""
+
+import os
+import random
+import re
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+import pytest
+
+from motheme.api import apply_to_source, clear_source, read_css_file
+from motheme.app_parser import (
+    find_app_block,
+    find_app_span,
+    remove_app_kwarg,
+    set_app_kwarg,
+    split_lines,
+    update_file_content,
+)
+
+CASES = int(os.environ.get("MOTHEME_FUZZ_CASES", "3000"))
+SEED = int(os.environ.get("MOTHEME_FUZZ_SEED", "20241019"))
+CSS_PATHS = ["/themes/nord.css", "themes/coldme.css", "C:\\themes\\wig.css"]
+
+HEADERS = [
+    "import marimo\n",
+    "import marimo as mo\n",
+    '# /// script\n# requires-python = ">=3.12"\n# ///\n\nimport marimo\n',
+    'import marimo\n\n__generated_with = "0.9.14"\n',
+]
+KWARGS = [
+    'width="medium"',
+    "width='full'",
+    'app_title="Report (draft)"',
+    "layout_file='layouts/sample.slides.json'",
+    "auto_download=['html']",
+    "sql_output=get_format(kind=('native'))",
+    'html_head_file="head.html"',
+]
+CELL = "\n\n@app.cell\ndef _():\n    return\n"
+MAIN = '\n\nif __name__ == "__main__":\n    app.run()\n'
+
+
+def generate_notebook(rng: random.Random) -> str:
+    """Generate a notebook with a randomly formatted marimo.App call."""
+    header = rng.choice(HEADERS)
+    module = "mo" if "import marimo as mo" in header else "marimo"
+    kwargs = rng.sample(KWARGS, rng.randint(0, 3))
+    if rng.random() < 0.5:
+        quote = rng.choice("\"'")
+        css_file = f"css_file={quote}{rng.choice(CSS_PATHS)}{quote}"
+        kwargs.insert(rng.randint(0, len(kwargs)), css_file)
+
+    if kwargs and rng.random() < 0.6:
+        indent = " " * rng.choice((4, 8))
+        args = []
+        for i, kwarg in enumerate(kwargs):
+            last = i == len(kwargs) - 1
+            comma = "," if not last or rng.random() < 0.5 else ""
+            comment = "  # (see docs)" if rng.random() < 0.2 else ""
+            args.append(f"{indent}{kwarg}{comma}{comment}\n")
+        call = f"app = {module}.App(\n{''.join(args)})"
+    else:
+        call = f"app = {module}.App({', '.join(kwargs)})"
+
+    text = header + "\n" + call + CELL * rng.randint(1, 3)
+    if rng.random() < 0.5:
+        text += MAIN
+    if rng.random() < 0.2:
+        text = text.replace("\n", "\r\n")
+    return text
+
+
+CORPUS = [generate_notebook(random.Random(SEED + i)) for i in range(CASES)]
+
+
+def modify_app_line(line: str, css_file_path: Path) -> str:
+    """
+    Add or replace css_file, as the original apply_theme did.
+
+    Only the replacement is passed as a function, so backslashes in
+    Windows paths are not read as regex escapes.
+    """
+    if "css_file=" in line:
+        # Replace existing css_file parameter
+        return re.sub(
+            r'css_file=["\'"][^"\']*["\']',
+            lambda _: f'css_file="{css_file_path}"',
+            line,
+        )
+    if line.strip().endswith("marimo.App()"):
+        # No existing parameters
+        return line.replace(
+            "marimo.App()", f'marimo.App(css_file="{css_file_path}")'
+        )
+    # Has existing parameters, insert css_file
+    return line.replace(
+        "marimo.App(", f'marimo.App(css_file="{css_file_path}", '
+    )
+
+
+def clean_app_line(line: str) -> str:
+    """Remove css_file, as the original clear_theme did."""
+    # Remove css_file parameter and its value
+    pattern = r',?\s*css_file=(["\'])(?:(?!\1).)*\1'
+    new_line = re.sub(pattern, "", line)
+
+    # Clean up any potential double commas or empty parentheses
+    new_line = re.sub(r",\s*,", ",", new_line)
+    new_line = re.sub(r"\(\s*,", "(", new_line)
+    return re.sub(r",\s*\)", ")", new_line)
+
+
+def spell_out(text: str) -> tuple[str, Callable[[str], str]]:
+    """
+    Call the App through ``marimo`` for the original rewriters.
+
+    They only knew ``marimo.App``, so aliased notebooks are checked by
+    spelling the call out and restoring the alias in the result.
+    """
+    if "import marimo as mo" not in text:
+        return text, lambda result: result
+    return (
+        text.replace("app = mo.App(", "app = marimo.App("),
+        lambda result: result.replace("app = marimo.App(", "app = mo.App("),
+    )
+
+
+def locate_reference(text: str) -> Optional[tuple]:
+    text, restore = spell_out(text)
+    block = find_app_block(split_lines(text))
+    return block and (block.start_line, block.end_line, restore(block.content))
+
+
+def locate_span(text: str) -> Optional[tuple]:
+    span = find_app_span(text)
+    if span is None:
+        return None
+    # The offsets must cover exactly the lines of the block
+    lines = split_lines(text)[span.start_line : span.end_line + 1]
+    assert text[span.start_offset : span.end_offset] == "".join(lines)
+    return span.start_line, span.end_line, span.content
+
+
+def apply_reference(text: str, css_path: str) -> str:
+    text, restore = spell_out(text)
+    lines = split_lines(text)
+    block = find_app_block(lines)
+    new_content = modify_app_line(block.content, Path(css_path))
+    return restore("".join(update_file_content(lines, block, new_content)))
+
+
+def clear_reference(text: str) -> str:
+    spelled, restore = spell_out(text)
+    lines = split_lines(spelled)
+    block = find_app_block(lines)
+    if "css_file=" not in block.content:
+        return text
+    new_content = clean_app_line(block.content)
+    return restore("".join(update_file_content(lines, block, new_content)))
+
+
+IMPLEMENTATIONS: dict[str, dict[str, Callable]] = {
+    "reference": {
+        "locate": locate_reference,
+        "apply": apply_reference,
+        "clear": clear_reference,
+    },
+    "span": {
+        "locate": locate_span,
+        "apply": apply_to_source,
+        "clear": clear_source,
+    },
+}
+
+
+def run(operation: str, implementation: str) -> tuple[list, float]:
+    """Run one implementation over the corpus, timing it."""
+    function = IMPLEMENTATIONS[implementation][operation]
+    for cached in (set_app_kwarg, remove_app_kwarg):
+        cached.cache_clear()
+    start = time.perf_counter()
+    if operation == "apply":
+        outputs = [
+            function(text, CSS_PATHS[i % len(CSS_PATHS)])
+            for i, text in enumerate(CORPUS)
+        ]
+    else:
+        outputs = [function(text) for text in CORPUS]
+    return outputs, time.perf_counter() - start
+
+
+@pytest.mark.parametrize("operation", ["locate", "apply", "clear"])
+def test_implementations_agree(
+    operation: str, record_property: Callable
+) -> None:
+    results = {name: run(operation, name) for name in IMPLEMENTATIONS}
+    for name, (_, elapsed) in results.items():
+        record_property(f"{operation}.{name}", f"{CASES / elapsed:.0f}/s")
+        print(f"{operation}.{name}: {CASES / elapsed:.0f} notebooks/s")
+
+    expected, _ = results.pop("reference")
+    for name, (outputs, _) in results.items():
+        for i, (output, reference) in enumerate(zip(outputs, expected)):
+            assert output == reference, (
+                f"{name} {operation} differs on case {i} "
+                f"(seed {SEED + i}):\n{CORPUS[i]}"
+            )
+
+
+def test_apply_round_trips() -> None:
+    for i, text in enumerate(CORPUS):
+        css_path = CSS_PATHS[i % len(CSS_PATHS)]
+        themed = apply_to_source(text, css_path)
+        assert read_css_file(themed) == css_path, CORPUS[i]
+        assert read_css_file(clear_source(themed)) is None, CORPUS[i]
@@ -0,0 +1,75 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+from motheme.preview import build_gallery
+from motheme.util import get_themes_dir, invalidate_theme_index
+
+NOTEBOOK = (
+    "import marimo\n\napp = marimo.App()\n\n@app.cell\ndef _():\n    return\n"
+)
+
+# Stands in for `marimo export html SRC -o OUT` and counts its invocations
+FAKE_MARIMO = """#!{python}
+import sys
+from pathlib import Path
+
+source, output = sys.argv[3], sys.argv[5]
+Path(output).write_text(Path(source).read_text())
+with open({calls!r}, "a") as f:
+    f.write(source + "\\n")
+"""
+
+
+@pytest.fixture
+def calls(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    calls = tmp_path / "calls.txt"
+    calls.touch()
+    marimo = bin_dir / "marimo"
+    marimo.write_text(
+        FAKE_MARIMO.format(python=sys.executable, calls=str(calls))
+    )
+    marimo.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.setenv("XDG_DATA_HOME", str(tmp_path / "data"))
+    monkeypatch.chdir(tmp_path)
+    Path("sample.py").write_text(NOTEBOOK)
+    return calls
+
+
+def install(name: str, css: str) -> None:
+    (get_themes_dir() / f"{name}.css").write_text(css)
+    invalidate_theme_index()
+
+
+def test_gallery_exports_each_theme(calls: Path) -> None:
+    install("nord", "nord")
+    install("wigwam", "wigwam")
+
+    gallery = build_gallery(themes=["nord", "wigwam"])
+
+    assert gallery == Path("gallery/index.html")
+    assert 'href="nord.html"' in gallery.read_text()
+    assert "nord.css" in Path("gallery/nord.html").read_text()
+    assert len(calls.read_text().splitlines()) == 2
+
+
+def test_gallery_rerenders_only_changed_themes(calls: Path) -> None:
+    install("nord", "nord")
+    install("wigwam", "wigwam")
+    build_gallery(themes=["nord", "wigwam"])
+
+    install("wigwam", "wigwam v2")
+    # -j 0 runs one export at a time
+    build_gallery(themes=["nord", "wigwam"], jobs=0)
+
+    assert len(calls.read_text().splitlines()) == 3
+
+
+def test_gallery_rejects_unknown_themes(calls: Path) -> None:
+    assert build_gallery(themes=["missing"]) is None
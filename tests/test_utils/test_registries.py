@@ -0,0 +1,186 @@
+import hashlib
+import json
+import threading
+from collections.abc import Iterator
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from motheme.registries import (
+    Registry,
+    load_registries,
+    resolve_catalog,
+    update_from_registries,
+)
+from motheme.util import get_themes_dir
+
+
+class _Handler(SimpleHTTPRequestHandler):
+    requested: list[str] = []
+
+    def do_GET(self) -> None:
+        self.requested.append(self.path)
+        super().do_GET()
+
+    def log_message(self, *args: object) -> None:
+        pass
+
+
+@pytest.fixture
+def http_registry(tmp_path: Path) -> Iterator[str]:
+    """Serve a directory with an index.json as a local HTTP registry."""
+    root = tmp_path / "http"
+    root.mkdir()
+    (root / "nord.css").write_text("internal nord")
+    (root / "corp.css").write_text("corp")
+    index = {
+        "themes": {
+            "nord": {"path": "nord.css"},
+            "corp": {
+                "path": "corp.css",
+                "sha256": hashlib.sha256(b"corp").hexdigest(),
+            },
+        }
+    }
+    (root / "index.json").write_text(json.dumps(index))
+
+    _Handler.requested = []
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", 0), partial(_Handler, directory=str(root))
+    )
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def local_registry(tmp_path: Path) -> Path:
+    root = tmp_path / "local" / "themes"
+    for name in ("nord", "coldme"):
+        (root / name).mkdir(parents=True)
+        (root / name / f"{name}.css").write_text(f"community {name}")
+    return root.parent
+
+
+@pytest.fixture
+def project(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    project = tmp_path / "project"
+    (project / ".git").mkdir(parents=True)
+    monkeypatch.chdir(project)
+    monkeypatch.setenv("XDG_DATA_HOME", str(tmp_path / "data"))
+    monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path / "config"))
+    return project
+
+
+def test_higher_priority_registry_wins(
+    http_registry: str, local_registry: Path
+) -> None:
+    catalog = resolve_catalog(
+        [
+            Registry("community", str(local_registry)),
+            Registry("internal", http_registry, priority=10),
+        ]
+    )
+
+    assert catalog.themes["nord"].registry.name == "internal"
+    assert catalog.themes["coldme"].registry.name == "community"
+    assert [e.registry.name for e in catalog.shadowed["nord"]] == ["community"]
+    assert catalog.conflicts == []
+    # Only the index is fetched while resolving
+    assert _Handler.requested == ["/index.json"]
+
+
+def test_equal_priority_conflict_uses_first(
+    http_registry: str, local_registry: Path
+) -> None:
+    catalog = resolve_catalog(
+        [
+            Registry("internal", http_registry),
+            Registry("community", str(local_registry)),
+        ]
+    )
+
+    assert catalog.themes["nord"].registry.name == "internal"
+    assert len(catalog.conflicts) == 1
+
+
+def test_unreachable_registry_is_skipped(local_registry: Path) -> None:
+    catalog = resolve_catalog(
+        [
+            Registry("down", "http://127.0.0.1:9/"),
+            Registry("community", str(local_registry)),
+        ]
+    )
+
+    assert set(catalog.themes) == {"nord", "coldme"}
+    assert "down" in catalog.errors
+
+
+@pytest.mark.parametrize(
+    "index", [[], {"themes": []}, {"themes": {"nord": "nord.css"}}]
+)
+def test_malformed_index_is_skipped(
+    tmp_path: Path, local_registry: Path, index: object
+) -> None:
+    broken = tmp_path / "broken"
+    broken.mkdir()
+    (broken / "index.json").write_text(json.dumps(index))
+
+    catalog = resolve_catalog(
+        [
+            Registry("broken", str(broken)),
+            Registry("community", str(local_registry)),
+        ]
+    )
+
+    assert set(catalog.themes) == {"nord", "coldme"}
+    assert "Invalid index" in catalog.errors["broken"]
+
+
+def test_update_fetches_winners_on_demand(
+    project: Path, http_registry: str, local_registry: Path
+) -> None:
+    config = project / ".motheme" / "registries.toml"
+    config.parent.mkdir()
+    config.write_text(
+        f'[[registry]]\nname = "community"\nurl = "{local_registry}"\n\n'
+        f'[[registry]]\nname = "internal"\nurl = "{http_registry}"\n'
+        "priority = 10\n"
+    )
+    assert [r.name for r in load_registries()] == ["community", "internal"]
+
+    assert update_from_registries(["nord", "corp"]) == get_themes_dir()
+
+    assert (get_themes_dir() / "nord.css").read_text() == "internal nord"
+    assert (get_themes_dir() / "corp.css").read_text() == "corp"
+    assert not (get_themes_dir() / "coldme.css").exists()
+    assert sorted(_Handler.requested) == [
+        "/corp.css",
+        "/index.json",
+        "/nord.css",
+    ]
+
+
+def test_update_rejects_names_outside_themes_dir(
+    project: Path, tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    root = tmp_path / "evil"
+    root.mkdir()
+    (root / "nord.css").write_text("nord")
+    index = {"themes": {"../../escaped": {"path": "nord.css"}, "nord": {}}}
+    (root / "index.json").write_text(json.dumps(index))
+    config = project / ".motheme" / "registries.toml"
+    config.parent.mkdir()
+    config.write_text(f'[[registry]]\nname = "evil"\nurl = "{root}"\n')
+
+    update_from_registries()
+
+    assert (
+        "Error: Invalid theme name '../../escaped'" in capsys.readouterr().out
+    )
+    assert list(tmp_path.rglob("escaped*")) == []
+    assert (get_themes_dir() / "nord.css").read_text() == "nord"
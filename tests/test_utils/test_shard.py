@@ -0,0 +1,74 @@
+import json
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from motheme.report import Report, combine_reports
+from motheme.util import in_shard, parse_shard
+
+
+def test_parse_shard() -> None:
+    assert parse_shard("2/16") == (2, 16)
+    for spec in ("0/4", "5/4", "1", "a/b", "1/0"):
+        with pytest.raises(ValueError, match="Invalid shard"):
+            parse_shard(spec)
+
+
+def test_shards_partition_files() -> None:
+    files = [f"notebooks/dir{i % 7}/nb_{i}.py" for i in range(500)]
+    count = 8
+
+    shards = [
+        [f for f in files if in_shard(f, (index, count))]
+        for index in range(1, count + 1)
+    ]
+
+    assert sorted(f for shard in shards for f in shard) == sorted(files)
+    assert all(shard for shard in shards)
+
+
+def test_shard_ignores_path_spelling() -> None:
+    assert in_shard("a/b.py", (1, 3)) == in_shard("./a/../a/b.py", (1, 3))
+
+
+def test_combine_reports(tmp_path: Path) -> None:
+    paths = []
+    for index in (1, 2):
+        report = Report("apply", f"{index}/2")
+        report.add(f"nb_{index}.py", "applied", "nord")
+        paths.append(str(tmp_path / f"shard{index}.json"))
+        report.write(paths[-1])
+    output = tmp_path / "merged.json"
+
+    merged = combine_reports(paths, str(output))
+
+    assert merged is not None
+    assert merged["shards"] == ["1/2", "2/2"]
+    assert merged["counts"] == {"applied": 2}
+    assert json.loads(output.read_text()) == merged
+
+
+def test_combine_reports_rejects_mixed_commands(tmp_path: Path) -> None:
+    paths = []
+    for command in ("apply", "clear"):
+        paths.append(str(tmp_path / f"{command}.json"))
+        Report(command).write(paths[-1])
+
+    assert combine_reports(paths) is None
+
+
+def test_shard_is_independent_of_working_directory(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    subprocess.run(["git", "init", "-q", str(tmp_path)], check=True)
+    files = [f"notebooks/nb_{i}.py" for i in range(50)]
+    shard = (1, 4)
+    monkeypatch.chdir(tmp_path)
+    from_top = [in_shard(f, shard) for f in files]
+
+    (tmp_path / "notebooks").mkdir()
+    monkeypatch.chdir(tmp_path / "notebooks")
+
+    assert [in_shard(f"../{f}", shard) for f in files] == from_top
+    assert [in_shard(str(tmp_path / f), shard) for f in files] == from_top
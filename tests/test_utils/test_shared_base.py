@@ -0,0 +1,168 @@
+from pathlib import Path
+
+import pytest
+
+from motheme.api import read_css_file, read_files
+from motheme.apply_theme import apply_theme
+from motheme.shared_base import (
+    build_shared_base,
+    factor_themes,
+    get_entry_path,
+    parse_css_units,
+)
+from motheme.usage import collect_garbage
+from motheme.util import get_themes_dir, invalidate_theme_index
+
+NOTEBOOK = "import marimo\n\napp = marimo.App()\n"
+NORD = """@import url("https://fonts.googleapis.com/css2?family=Fira+Code");
+
+/* Fonts */
+:root {
+    --radius: 4px;
+    --text-font: "Fira Code", monospace;
+    --background: #2e3440;
+}
+h1 { color: #88c0d0; }
+.markdown pre {
+    border-radius: var(--radius);
+    font-family: var(--text-font);
+    padding: 0.5rem 1rem;
+}
+"""
+WIGWAM = """@import url("https://fonts.googleapis.com/css2?family=Fira+Code");
+:root {
+    --radius:   4px;
+    --text-font: "Fira Code", monospace;
+    --background: #fdf6e3;
+}
+h1 { color: #268bd2; }
+.markdown pre {
+    border-radius: var(--radius);
+    font-family: var(--text-font);
+    padding: 0.5rem 1rem;
+}
+"""
+
+
+@pytest.fixture
+def themes(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("XDG_DATA_HOME", str(tmp_path / "data"))
+    (get_themes_dir() / "nord.css").write_text(NORD)
+    (get_themes_dir() / "wigwam.css").write_text(WIGWAM)
+    invalidate_theme_index()
+    return tmp_path
+
+
+def test_parse_css_units_ignores_comments_and_semicolons_in_strings() -> None:
+    units = parse_css_units('/* a; b */ a { content: "x;y"; color: red }')
+
+    assert [(u.prop, u.value) for u in units] == [
+        ("content", '"x;y"'),
+        ("color", "red"),
+    ]
+
+
+def test_factor_keeps_declarations_overridden_later() -> None:
+    themes = {
+        "a": parse_css_units("a { color: red } b { color: blue }"),
+        "b": parse_css_units("a { color: red } b { color: green }"),
+    }
+    base, deltas = factor_themes(themes)
+    assert [u.context for u in base] == ["a"]
+    assert [u.value for u in deltas["b"]] == ["green"]
+
+    # Moving b's rule ahead of its later a rule would change the cascade
+    themes["b"] = parse_css_units("b { color: blue } a { color: red }")
+    base, _ = factor_themes(themes)
+    assert base == []
+
+
+def test_build_shared_base_factors_common_declarations(themes: Path) -> None:
+    base_path = build_shared_base()
+
+    assert base_path is not None
+    base = base_path.read_text()
+    assert "fonts.googleapis.com" in base
+    assert "--radius: 4px;" in base
+    assert "--background" not in base
+    # The entry imports the base from public/ instead of repeating it
+    entry_path = get_entry_path("nord")
+    entry = entry_path.read_text()
+    assert (
+        entry_path.stat().st_size
+        < (get_themes_dir() / "nord.css").stat().st_size
+    )
+    assert f'@import url("public/{base_path.name}");' in entry
+    assert "--radius" not in entry
+    assert "fonts.googleapis.com" not in entry
+    assert "--background: #2e3440;" in entry
+
+
+def test_apply_shared_rebuilds_stale_entries(themes: Path) -> None:
+    first = build_shared_base()
+    (get_themes_dir() / "nord.css").write_text(NORD.replace("4px", "6px"))
+    invalidate_theme_index()
+    notebook = themes / "notebook.py"
+    notebook.write_text(NOTEBOOK)
+
+    apply_theme("nord", [str(notebook)], shared=True)
+
+    entry = get_entry_path("nord")
+    assert read_css_file(notebook.read_text()) == str(entry)
+    assert "--radius: 6px;" in entry.read_text()
+    assert first is not None
+    assert not first.exists()
+    # The rebuilt base is published where marimo serves the import from
+    published = list((themes / "public").glob("base-*.css"))
+    assert [p.name for p in published] != [first.name]
+    assert len(published) == 1
+    assert "--text-font" in published[0].read_text()
+    assert published[0].name in entry.read_text()
+
+
+def test_shared_notebooks_name_their_theme(themes: Path) -> None:
+    notebook = themes / "notebook.py"
+    notebook.write_text(NOTEBOOK)
+    apply_theme("nord", [str(notebook)], shared=True)
+
+    assert [r.theme for r in read_files([str(notebook)])] == ["nord"]
+    assert collect_garbage([str(notebook)], yes=True) == ["wigwam"]
+    assert (get_themes_dir() / "nord.css").exists()
+    assert not (get_themes_dir() / "wigwam.css").exists()
+
+
+def test_factor_keeps_at_rules_in_cascade_order() -> None:
+    media = "@media print { h1 { color: black } }"
+    themes = {
+        "a": parse_css_units(
+            f"h1 {{ color: red }} {media} h2 {{ margin: 0 }}"
+        ),
+        "b": parse_css_units(
+            f"h1 {{ color: blue }} {media} h2 {{ margin: 0 }}"
+        ),
+    }
+    base, deltas = factor_themes(themes)
+    # Moving the @media block ahead of h1 would let h1 override it
+    assert base == []
+    assert deltas == themes
+
+    themes = {
+        "a": parse_css_units(f"{media} h1 {{ color: red }} p {{ margin: 0 }}"),
+        "b": parse_css_units(
+            f"{media} h1 {{ color: blue }} p {{ margin: 0 }}"
+        ),
+    }
+    base, deltas = factor_themes(themes)
+    assert [u.context for u in base] == ["@media print", "p"]
+    for name, units in themes.items():
+        assert base + deltas[name] == [units[0], units[2], units[1]]
+
+
+def test_factor_keeps_at_rules_that_differ() -> None:
+    themes = {
+        "a": parse_css_units("@font-face { font-family: A } p { margin: 0 }"),
+        "b": parse_css_units("@font-face { font-family: B } p { margin: 0 }"),
+    }
+    base, _ = factor_themes(themes)
+    assert base == []
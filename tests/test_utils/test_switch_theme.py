@@ -0,0 +1,82 @@
+import shutil
+from pathlib import Path
+
+import pytest
+
+from motheme.switch_theme import (
+    ACTIVE_THEME_MARKER,
+    resolve_active_theme,
+    switch_theme,
+)
+from motheme.util import get_themes_dir, invalidate_theme_index
+
+
+@pytest.fixture
+def project(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    project = tmp_path / "project"
+    (project / ".git").mkdir(parents=True)
+    monkeypatch.chdir(project)
+    monkeypatch.setenv("XDG_DATA_HOME", str(tmp_path / "data"))
+    themes_dir = get_themes_dir()
+    (themes_dir / "nord.css").write_text("nord")
+    (themes_dir / "coldme.css").write_text("coldme")
+    invalidate_theme_index()
+    return project
+
+
+def test_switch_retargets_alias(project: Path) -> None:
+    alias = switch_theme("nord")
+    assert alias == project / ".motheme" / "active.css"
+    assert alias.read_text().splitlines()[1:] == ["nord"]
+
+    switch_theme("coldme")
+
+    assert alias.read_text().splitlines()[1:] == ["coldme"]
+    assert resolve_active_theme(alias) == "coldme"
+
+
+def test_switch_unknown_theme_keeps_alias(project: Path) -> None:
+    alias = switch_theme("nord")
+
+    assert switch_theme("missing") is None
+    assert resolve_active_theme(alias) == "nord"
+
+
+def test_resolve_generated_alias(tmp_path: Path) -> None:
+    alias = tmp_path / "active.css"
+    alias.write_text(f"{ACTIVE_THEME_MARKER}wigwam */\n:root {{}}\n")
+
+    assert resolve_active_theme(alias) == "wigwam"
+
+
+def test_alias_survives_moving_the_project(
+    project: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    switch_theme("nord")
+    moved = project.rename(tmp_path / "moved")
+    monkeypatch.chdir(moved)
+    shutil.rmtree(tmp_path / "data")
+
+    # User themes are copied, so the alias does not depend on them
+    alias = moved / ".motheme" / "active.css"
+    assert alias.read_text().endswith("\nnord")
+    assert resolve_active_theme(alias) == "nord"
+
+
+def test_alias_links_project_themes_relatively(
+    project: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    local = project / ".motheme" / "themes" / "local.css"
+    local.parent.mkdir(parents=True)
+    local.write_text("local")
+    invalidate_theme_index()
+    switch_theme("local")
+
+    moved = project.rename(tmp_path / "moved")
+    monkeypatch.chdir(moved)
+
+    alias = moved / ".motheme" / "active.css"
+    assert alias.is_symlink()
+    assert not alias.readlink().is_absolute()
+    assert alias.read_text() == "local"
+    assert resolve_active_theme(alias) == "local"
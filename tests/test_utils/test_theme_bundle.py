@@ -0,0 +1,97 @@
+import hashlib
+import tarfile
+from pathlib import Path
+
+import pytest
+
+from motheme.theme_bundle import create_bundle, install_themes
+from motheme.util import get_themes_dir
+
+
+@pytest.fixture
+def themes_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.setenv("XDG_DATA_HOME", str(tmp_path / "data"))
+    themes_dir = get_themes_dir()
+    (themes_dir / "nord.css").write_text(":root { --radius: 4px; }\n")
+    (themes_dir / "coldme.css").write_text(":root { --radius: 8px; }\n")
+    return themes_dir
+
+
+def test_bundle_round_trip(themes_dir: Path, tmp_path: Path) -> None:
+    bundle = create_bundle(str(tmp_path / "themes.tar.gz"))
+    assert bundle is not None
+    for theme in themes_dir.glob("*.css"):
+        theme.unlink()
+
+    assert install_themes(str(bundle)) == themes_dir
+    assert sorted(t.stem for t in themes_dir.glob("*.css")) == [
+        "coldme",
+        "nord",
+    ]
+
+
+def test_bundle_is_reproducible(themes_dir: Path, tmp_path: Path) -> None:
+    first = create_bundle(str(tmp_path / "a.zip"))
+    second = create_bundle(str(tmp_path / "b.zip"))
+
+    assert first is not None
+    assert second is not None
+    assert first.read_bytes() == second.read_bytes()
+
+
+def test_install_rejects_archive_digest_mismatch(
+    themes_dir: Path, tmp_path: Path
+) -> None:
+    bundle = create_bundle(str(tmp_path / "themes.tgz"))
+    (themes_dir / "nord.css").unlink()
+
+    assert install_themes(str(bundle), sha256="0" * 64) is None
+    assert not (themes_dir / "nord.css").exists()
+
+
+def test_install_rejects_tampered_theme(
+    themes_dir: Path, tmp_path: Path
+) -> None:
+    source = tmp_path / "mirror"
+    (source / "nord").mkdir(parents=True)
+    (source / "nord" / "nord.css").write_text("tampered")
+    (source / "SHA256SUMS").write_text(f"{'0' * 64}  nord/nord.css\n")
+    (themes_dir / "nord.css").unlink()
+
+    assert install_themes(source.as_uri()) is None
+    assert not (themes_dir / "nord.css").exists()
+
+
+def test_install_rejects_themes_missing_from_checksums(
+    themes_dir: Path, tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    source = tmp_path / "mirror"
+    for name in ("nord", "extra"):
+        (source / name).mkdir(parents=True)
+        (source / name / f"{name}.css").write_text(name)
+    digest = hashlib.sha256(b"nord").hexdigest()
+    (source / "SHA256SUMS").write_text(f"{digest}  nord/nord.css\n")
+    (themes_dir / "nord.css").unlink()
+
+    assert install_themes(str(source)) is None
+    assert (
+        "SHA256SUMS does not list themes:\n- extra" in capsys.readouterr().out
+    )
+    assert not (themes_dir / "nord.css").exists()
+    assert not (themes_dir / "extra.css").exists()
+
+
+def test_install_ignores_unrelated_members(
+    themes_dir: Path, tmp_path: Path
+) -> None:
+    archive = tmp_path / "repo.tar.gz"
+    extra = tmp_path / "extra.css"
+    extra.write_text("body {}")
+    with tarfile.open(archive, "w:gz") as tar:
+        tar.add(extra, "repo-main/themes/wigwam/wigwam.css")
+        tar.add(extra, "repo-main/docs/assets/site.css")
+
+    install_themes(str(archive))
+
+    assert (themes_dir / "wigwam.css").exists()
+    assert not (themes_dir / "site.css").exists()
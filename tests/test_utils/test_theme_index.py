@@ -0,0 +1,146 @@
+import os
+import shutil
+import subprocess
+import sys
+import zipfile
+from fnmatch import fnmatch
+from pathlib import Path
+
+import pytest
+
+from motheme.util import (
+    get_theme_index,
+    get_themes_dir,
+    invalidate_theme_index,
+    validate_theme_exists,
+)
+
+if sys.version_info >= (3, 11):
+    import tomllib
+else:
+    import tomli as tomllib
+
+
+@pytest.fixture
+def layers(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> dict[str, Path]:
+    project = tmp_path / "project"
+    (project / ".motheme" / "themes").mkdir(parents=True)
+    site = tmp_path / "site"
+    (site / "mtheme" / "themes").mkdir(parents=True)
+    env = tmp_path / "env"
+    env.mkdir()
+
+    monkeypatch.chdir(project)
+    monkeypatch.setenv("XDG_DATA_HOME", str(tmp_path / "data"))
+    monkeypatch.setenv("XDG_DATA_DIRS", str(site))
+    monkeypatch.setenv("MOTHEME_PATH", str(env))
+    invalidate_theme_index()
+    return {
+        "project": project / ".motheme" / "themes",
+        "user": get_themes_dir(),
+        "env": env,
+        "site": site / "mtheme" / "themes",
+    }
+
+
+def test_earlier_layers_shadow_later_ones(layers: dict[str, Path]) -> None:
+    for name, path in layers.items():
+        (path / "shared.css").write_text(name)
+        (path / f"{name}_only.css").write_text(name)
+
+    index = get_theme_index()
+
+    assert index["shared"].layer.name == "project"
+    for name in layers:
+        assert index[f"{name}_only"].layer.name == name
+
+
+def test_validate_theme_uses_index(layers: dict[str, Path]) -> None:
+    (layers["site"] / "nord.css").write_text("site")
+
+    path = validate_theme_exists("nord", layers["user"])
+
+    assert path == layers["site"] / "nord.css"
+
+
+def test_validate_theme_missing(layers: dict[str, Path]) -> None:
+    with pytest.raises(FileNotFoundError):
+        validate_theme_exists("missing", layers["user"])
+
+
+def _install_wheel(root: Path, site: Path) -> None:
+    """
+    Install the package into ``site`` as its wheel lays it out.
+
+    Builds the wheel with hatchling, the build backend, when it is
+    available; otherwise follows the only-include, exclude and sources
+    mappings read from pyproject.toml.
+    """
+    try:
+        from hatchling.builders.wheel import WheelBuilder
+    except ImportError:
+        WheelBuilder = None  # noqa: N806
+    if WheelBuilder is not None:
+        builder = WheelBuilder(str(root))
+        (wheel,) = builder.build(
+            directory=str(site.parent / "dist"), versions=["standard"]
+        )
+        with zipfile.ZipFile(wheel) as archive:
+            archive.extractall(site)
+        return
+
+    config = tomllib.loads((root / "pyproject.toml").read_text())
+    wheel_config = config["tool"]["hatch"]["build"]["targets"]["wheel"]
+    for include in wheel_config["only-include"]:
+        for path in (root / include).rglob("*"):
+            relative = path.relative_to(root).as_posix()
+            if not path.is_file() or "__pycache__" in relative:
+                continue
+            if any(fnmatch(relative, p) for p in wheel_config["exclude"]):
+                continue
+            for source, destination in wheel_config["sources"].items():
+                if relative.startswith(f"{source}/"):
+                    relative = destination + relative[len(source) :]
+                    break
+            target = site / relative.lstrip("/")
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(path, target)
+
+
+def test_bundled_themes_resolve_from_wheel_layout(tmp_path: Path) -> None:
+    site = tmp_path / "site"
+    _install_wheel(Path(__file__).parents[2], site)
+
+    script = (
+        "import sys; sys.path.insert(0, sys.argv[1])\n"
+        "from importlib.resources import files\n"
+        "import motheme\n"
+        "from motheme.util import get_theme_index\n"
+        "location = get_theme_index()['nord']\n"
+        "resource = files('motheme') / 'themes' / 'nord' / 'nord.css'\n"
+        "print(motheme.__file__, location.layer.name, location.path)\n"
+        "print(resource, resource.is_file())\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", script, str(site)],
+        check=True,
+        capture_output=True,
+        text=True,
+        cwd=tmp_path,
+        env={
+            **os.environ,
+            "XDG_DATA_HOME": str(tmp_path / "data"),
+            "XDG_DATA_DIRS": str(tmp_path / "share"),
+            "MOTHEME_PATH": "",
+        },
+    ).stdout.split()
+
+    nord = str(site / "motheme" / "themes" / "nord" / "nord.css")
+    assert output == [
+        str(site / "motheme" / "__init__.py"),
+        "bundled",
+        nord,
+        nord,
+        "True",
+    ]
+    assert not list((site / "motheme" / "themes").rglob("*.png"))
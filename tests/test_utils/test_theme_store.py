@@ -0,0 +1,123 @@
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+
+from motheme.api import read_css_file
+from motheme.apply_theme import apply_theme
+from motheme.current_theme import describe_theme
+from motheme.theme_store import (
+    LOCK_FILE,
+    lock_themes,
+    read_lock,
+    verify_lock,
+)
+from motheme.util import get_themes_dir, hash_file, invalidate_theme_index
+
+NOTEBOOK = "import marimo\n\napp = marimo.App()\n"
+
+
+@pytest.fixture
+def project(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    project = tmp_path / "project"
+    (project / ".git").mkdir(parents=True)
+    monkeypatch.chdir(project)
+    monkeypatch.setenv("XDG_DATA_HOME", str(tmp_path / "data"))
+    (get_themes_dir() / "nord.css").write_text("nord v1")
+    invalidate_theme_index()
+    return project
+
+
+def test_lock_records_each_theme_once(project: Path) -> None:
+    for name in ("a.py", "b.py"):
+        (project / name).write_text(NOTEBOOK)
+    apply_theme("nord", ["a.py", "b.py"])
+
+    lock_path = lock_themes(["a.py", "b.py"])
+
+    assert lock_path == project / LOCK_FILE
+    digest = hash_file(get_themes_dir() / "nord.css")
+    assert read_lock(lock_path) == {"nord": digest}
+    assert json.loads(lock_path.read_text())["version"] == 1
+
+
+def test_verify_detects_changed_theme(project: Path) -> None:
+    (project / "a.py").write_text(NOTEBOOK)
+    apply_theme("nord", ["a.py"])
+    lock_themes(["a.py"])
+    assert verify_lock()
+
+    (get_themes_dir() / "nord.css").write_text("nord v2")
+
+    assert not verify_lock()
+
+
+def test_pinned_notebook_survives_update(project: Path) -> None:
+    (project / "a.py").write_text(NOTEBOOK)
+    apply_theme("nord", ["a.py"], pin=True)
+    (get_themes_dir() / "nord.css").write_text("nord v2")
+
+    css_file = (project / "a.py").read_text().split('css_file="')[1]
+    stored_path = Path(css_file.split('"')[0])
+    assert stored_path.read_text() == "nord v1"
+    assert describe_theme("a.py", str(stored_path)).startswith("nord@")
+    assert read_lock(project / LOCK_FILE) == {"nord": stored_path.stem}
+
+
+def test_pinned_reference_survives_moving_the_project(
+    project: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    (project / "a.py").write_text(NOTEBOOK)
+    apply_theme("nord", ["a.py"], pin=True)
+
+    moved = project.rename(tmp_path / "moved")
+    monkeypatch.chdir(moved)
+    shutil.rmtree(tmp_path / "data")
+
+    css_file = read_css_file((moved / "a.py").read_text())
+    assert css_file is not None
+    assert css_file.startswith(".motheme/store/")
+    assert (moved / css_file).read_text() == "nord v1"
+    assert describe_theme("a.py", css_file).startswith("nord@")
+
+
+@pytest.mark.parametrize(
+    "content",
+    ["[]", '{"themes": []}', '{"themes": {"nord": "abc"}}', "{"],
+)
+def test_invalid_lock_is_reported(
+    project: Path, content: str, capsys: pytest.CaptureFixture[str]
+) -> None:
+    (project / LOCK_FILE).write_text(content)
+
+    with pytest.raises(ValueError, match="Invalid lockfile"):
+        read_lock(project / LOCK_FILE)
+    assert not verify_lock()
+    assert capsys.readouterr().out.startswith("Error: Invalid lockfile")
+
+
+def test_pin_keeps_lock_when_locked_content_is_missing(
+    project: Path, tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    (project / "a.py").write_text(NOTEBOOK)
+    apply_theme("nord", ["a.py"], pin=True)
+    locked = read_lock(project / LOCK_FILE)
+
+    # A fresh clone: neither store has the locked content
+    shutil.rmtree(project / ".motheme")
+    shutil.rmtree(tmp_path / "data")
+    (get_themes_dir() / "nord.css").write_text("nord v2")
+    invalidate_theme_index()
+    (project / "b.py").write_text(NOTEBOOK)
+    apply_theme("nord", ["b.py"], pin=True)
+
+    assert read_lock(project / LOCK_FILE) == locked
+    assert read_css_file((project / "b.py").read_text()) is None
+    assert "Error: motheme.lock pins nord" in capsys.readouterr().out
+
+    # The installed theme is used when it still matches the lock
+    (get_themes_dir() / "nord.css").write_text("nord v1")
+    apply_theme("nord", ["b.py"], pin=True)
+    css_file = read_css_file((project / "b.py").read_text())
+    assert css_file == f".motheme/store/{locked['nord']}.css"
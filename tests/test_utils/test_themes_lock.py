@@ -0,0 +1,87 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from motheme.create_theme import create_theme
+from motheme.util import (
+    THEMES_LOCK_FILE,
+    get_theme_index,
+    get_themes_dir,
+    invalidate_theme_index,
+    staged_themes,
+    themes_lock,
+)
+
+# Tries to take the lock without blocking and reports whether it could
+TRY_LOCK = """
+import fcntl, sys
+with open(sys.argv[1], "a+b") as f:
+    try:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        print("locked")
+    else:
+        print("free")
+"""
+
+
+@pytest.fixture
+def themes_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("XDG_DATA_HOME", str(tmp_path / "data"))
+    invalidate_theme_index()
+    return get_themes_dir()
+
+
+def test_staged_themes_publish_on_success(themes_dir: Path) -> None:
+    (themes_dir / "nord.css").write_text("old")
+
+    with staged_themes() as staging_dir:
+        (staging_dir / "nord.css").write_text("new")
+        (staging_dir / "coldme.css").write_text("coldme")
+        assert (themes_dir / "nord.css").read_text() == "old"
+
+    assert (themes_dir / "nord.css").read_text() == "new"
+    assert set(get_theme_index()) >= {"nord", "coldme"}
+    assert sorted(p.name for p in themes_dir.iterdir()) == [
+        THEMES_LOCK_FILE,
+        "coldme.css",
+        "nord.css",
+    ]
+
+
+def test_staged_themes_publish_nothing_on_error(themes_dir: Path) -> None:
+    with pytest.raises(RuntimeError), staged_themes() as staging_dir:
+        (staging_dir / "nord.css").write_text("partial")
+        raise RuntimeError
+
+    assert list(themes_dir.glob("*.css")) == []
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="uses fcntl")
+def test_themes_lock_excludes_other_processes(themes_dir: Path) -> None:
+    lock_path = str(themes_dir / THEMES_LOCK_FILE)
+
+    def try_lock() -> str:
+        return subprocess.check_output(
+            [sys.executable, "-c", TRY_LOCK, lock_path], text=True
+        ).strip()
+
+    with themes_lock():
+        assert try_lock() == "locked"
+    assert try_lock() == "free"
+
+
+def test_create_theme_rejects_names_outside_themes_dir(
+    themes_dir: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    (themes_dir / "nord.css").write_text("nord")
+
+    create_theme("nord", "../escaped")
+
+    assert not (themes_dir.parent / "escaped.css").exists()
+    assert "Error: Invalid theme name" in capsys.readouterr().out
+    create_theme("nord", "copy")
+    assert (themes_dir / "copy.css").read_text() == "nord"
@@ -0,0 +1,67 @@
+from pathlib import Path
+
+import pytest
+
+from motheme.apply_theme import apply_theme
+from motheme.usage import collect_garbage, scan_files, scan_usage
+from motheme.util import get_themes_dir, invalidate_theme_index
+
+NOTEBOOK = "import marimo\n\napp = marimo.App()\n"
+
+
+@pytest.fixture
+def project(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    project = tmp_path / "project"
+    (project / ".git").mkdir(parents=True)
+    monkeypatch.chdir(project)
+    monkeypatch.setenv("XDG_DATA_HOME", str(tmp_path / "data"))
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path / "config"))
+    for name in ("nord", "coldme", "wigwam"):
+        (get_themes_dir() / f"{name}.css").write_text(name)
+    invalidate_theme_index()
+    for name in ("docs/a.py", "docs/b.py", "src/c.py", "src/d.py"):
+        (project / name).parent.mkdir(exist_ok=True)
+        (project / name).write_text(NOTEBOOK)
+    apply_theme("nord", ["docs/a.py", "docs/b.py", "src/c.py"])
+    return project
+
+
+FILES = ["docs/a.py", "docs/b.py", "src/c.py", "src/d.py"]
+
+
+def test_usage_rolls_up_per_directory(project: Path) -> None:
+    usage = scan_usage(FILES)
+
+    assert sorted(usage.themes) == ["nord"]
+    assert usage.by_directory("nord") == {"docs": 2, "src": 1}
+    assert usage.unthemed == ["src/d.py"]
+    assert usage.scanned == 4
+
+
+def test_scan_reuses_unchanged_files(project: Path) -> None:
+    list(scan_files(FILES))
+    Path("src/d.py").write_text(NOTEBOOK.replace("App()", 'App(css_file="x")'))
+
+    results = {r.path: r for r in scan_files(FILES)}
+
+    assert results["src/d.py"].css_file == "x"
+    assert results["docs/a.py"].theme == "nord"
+
+
+def test_gc_dry_run_then_remove(project: Path) -> None:
+    assert collect_garbage(FILES, dry_run=True) == ["coldme", "wigwam"]
+    assert (get_themes_dir() / "coldme.css").exists()
+
+    collect_garbage(FILES, yes=True)
+
+    assert sorted(p.stem for p in get_themes_dir().glob("*.css")) == ["nord"]
+
+
+def test_gc_refuses_without_notebooks(
+    project: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    assert collect_garbage([], yes=True) == []
+
+    assert "no notebooks were scanned" in capsys.readouterr().out
+    assert len(list(get_themes_dir().glob("*.css"))) == 3